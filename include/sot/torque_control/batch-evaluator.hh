@@ -0,0 +1,113 @@
+/*
+ * Copyright 2017, Andrea Del Prete, LAAS-CNRS
+ *
+ * This file is part of sot-torque-control.
+ * sot-torque-control is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ * sot-torque-control is distributed in the hope that it will be
+ * useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+ * of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.  You should
+ * have received a copy of the GNU Lesser General Public License along
+ * with sot-torque-control.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#ifndef __sot_torque_control_batch_evaluator_H__
+#define __sot_torque_control_batch_evaluator_H__
+
+/* --------------------------------------------------------------------- */
+/* --- API ------------------------------------------------------------- */
+/* --------------------------------------------------------------------- */
+
+#if defined (WIN32)
+#  if defined (__sot_torque_control_batch_evaluator_H__)
+#    define SOTBATCHEVALUATOR_EXPORT __declspec(dllexport)
+#  else
+#    define SOTBATCHEVALUATOR_EXPORT __declspec(dllimport)
+#  endif
+#else
+#  define SOTBATCHEVALUATOR_EXPORT
+#endif
+
+
+/* --------------------------------------------------------------------- */
+/* --- INCLUDE --------------------------------------------------------- */
+/* --------------------------------------------------------------------- */
+
+#include <sot/torque_control/signal-helper.hh>
+#include <sot/torque_control/utils/vector-conversions.hh>
+#include <sot/torque_control/utils/logger.hh>
+#include <map>
+
+
+namespace dynamicgraph {
+  namespace sot {
+    namespace torque_control {
+
+      /* --------------------------------------------------------------------- */
+      /* --- CLASS ----------------------------------------------------------- */
+      /* --------------------------------------------------------------------- */
+
+
+      /**
+       * @brief Entity to evaluate a graph of entities offline on whole logs.
+       *
+       * The command addOutputSignal creates an output signal that takes
+       * the rows of the specified matrix (one sample per row), and
+       * addInputSignal creates an input signal. After plugging the
+       * output signals to the inputs of the entities to evaluate and
+       * their output to an input signal, the command compute feeds all
+       * the samples to the graph, one iteration per sample, and returns
+       * the values taken by the input signal as a matrix (one row per
+       * sample). The loop over the samples runs in C++, so that a log can
+       * be processed much faster than by setting the signal values from
+       * python at every iteration.
+       */
+      class SOTBATCHEVALUATOR_EXPORT BatchEvaluator
+        :public::dynamicgraph::Entity
+      {
+        typedef BatchEvaluator EntityClassName;
+        DYNAMIC_GRAPH_ENTITY_DECL();
+
+      public:
+
+        /* --- CONSTRUCTOR ---- */
+        BatchEvaluator( const std::string & name );
+
+        /* --- SIGNALS --- */
+        typedef dynamicgraph::Signal<dynamicgraph::Vector, int>    OutputSignalType;
+        typedef dynamicgraph::SignalPtr<dynamicgraph::Vector, int> InputSignalType;
+
+        /* --- COMMANDS --- */
+        void addOutputSignal(const std::string & signalName, const dynamicgraph::Matrix & data);
+        void addInputSignal(const std::string & signalName);
+
+        /** Feed all the samples of the output signals to the graph and return the values
+         *  of the specified input signal, one per row. */
+        dynamicgraph::Matrix compute(const std::string & signalName);
+
+        /* --- ENTITY INHERITANCE --- */
+        virtual void display( std::ostream& os ) const;
+
+        void sendMsg(const std::string& msg, MsgType t=MSG_TYPE_INFO, const char* file="", int line=0)
+        {
+          getLogger().sendMsg("["+name+"] "+msg, t, file, line);
+        }
+
+      protected:
+        std::map<std::string, OutputSignalType*> m_outputSignals;
+        std::map<std::string, dynamicgraph::Matrix> m_data;   /// samples of the output signals (one per row)
+        std::map<std::string, InputSignalType*> m_inputSignals;
+        int m_iter;         /// iteration number of the next sample
+
+      }; // class BatchEvaluator
+
+    }    // namespace torque_control
+  }      // namespace sot
+}        // namespace dynamicgraph
+
+
+
+#endif // #ifndef __sot_torque_control_batch_evaluator_H__
@@ -0,0 +1,134 @@
+/*
+ * Copyright 2017, Andrea Del Prete, LAAS-CNRS
+ *
+ * This file is part of sot-torque-control.
+ * sot-torque-control is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ * sot-torque-control is distributed in the hope that it will be
+ * useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+ * of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.  You should
+ * have received a copy of the GNU Lesser General Public License along
+ * with sot-torque-control.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#ifndef __sot_torque_control_signal_recorder_H__
+#define __sot_torque_control_signal_recorder_H__
+
+/* --------------------------------------------------------------------- */
+/* --- API ------------------------------------------------------------- */
+/* --------------------------------------------------------------------- */
+
+#if defined (WIN32)
+#  if defined (__sot_torque_control_signal_recorder_H__)
+#    define SOTSIGNALRECORDER_EXPORT __declspec(dllexport)
+#  else
+#    define SOTSIGNALRECORDER_EXPORT __declspec(dllimport)
+#  endif
+#else
+#  define SOTSIGNALRECORDER_EXPORT
+#endif
+
+
+/* --------------------------------------------------------------------- */
+/* --- INCLUDE --------------------------------------------------------- */
+/* --------------------------------------------------------------------- */
+
+#include <sot/torque_control/signal-helper.hh>
+#include <sot/torque_control/utils/vector-conversions.hh>
+#include <sot/torque_control/utils/logger.hh>
+#include <boost/atomic.hpp>
+#include <map>
+#include <vector>
+
+
+namespace dynamicgraph {
+  namespace sot {
+    namespace torque_control {
+
+      /* --------------------------------------------------------------------- */
+      /* --- CLASS ----------------------------------------------------------- */
+      /* --------------------------------------------------------------------- */
+
+
+      /**
+       * @brief Entity to record the values of some signals at every control cycle.
+       *
+       * The values are copied into a ring buffer allocated by the command init,
+       * so that recording does not allocate memory nor write to file.
+       * A typical use of this entity would be to call the command
+       * addInputSignal for every signal to record, plug the signals,
+       * add the output signal "trigger" to the signals computed after
+       * every iteration of the device (device.after.addSignal),
+       * and then periodically call the command getData from python
+       * to get all the samples recorded since the previous call.
+       *
+       * The control thread is the only one writing in the buffer and
+       * getData never blocks it: the samples that are overwritten before
+       * being read are lost and counted (see getLostSamples).
+       * The iterations in which a signal is not plugged or does not have
+       * the declared size are not recorded for that signal, so its rows
+       * returned by getData may skip some iteration numbers.
+       */
+      class SOTSIGNALRECORDER_EXPORT SignalRecorder
+        :public::dynamicgraph::Entity
+      {
+        typedef SignalRecorder EntityClassName;
+        DYNAMIC_GRAPH_ENTITY_DECL();
+
+      public:
+
+        /* --- CONSTRUCTOR ---- */
+        SignalRecorder( const std::string & name );
+
+        void init(const int& bufferSize);
+
+        /* --- SIGNALS --- */
+        typedef dynamicgraph::SignalPtr<dynamicgraph::Vector, int> InputSignalType;
+        DECLARE_SIGNAL_OUT(trigger, int);
+
+        /* --- COMMANDS --- */
+        void addInputSignal(const std::string & signalName, const int& size);
+
+        /** Return the samples of the specified signal recorded since the last call,
+         *  one per row, with the iteration number in the first column. */
+        dynamicgraph::Matrix getData(const std::string & signalName);
+        int getLostSamples(const std::string & signalName);
+        void reset();
+
+        /* --- ENTITY INHERITANCE --- */
+        virtual void display( std::ostream& os ) const;
+
+        void sendMsg(const std::string& msg, MsgType t=MSG_TYPE_INFO, const char* file="", int line=0)
+        {
+          getLogger().sendMsg("["+name+"] "+msg, t, file, line);
+        }
+
+      protected:
+        struct Recording
+        {
+          InputSignalType*      signal;
+          dynamicgraph::Matrix  buffer;     /// (bufferSize, 1+size) ring buffer
+          std::vector<char>     valid;      /// whether each row of buffer contains a recorded sample
+          long int              readIndex;  /// number of samples already read (or lost)
+          long int              lost;       /// number of samples overwritten before being read
+        };
+
+        std::map<std::string, Recording> m_recordings;
+        /// number of samples recorded (written only by the control thread, with release semantics,
+        /// after the sample has been written in the buffers)
+        boost::atomic<long int> m_writeIndex;
+        int  m_bufferSize;
+        bool m_initSucceeded;
+
+      }; // class SignalRecorder
+
+    }    // namespace torque_control
+  }      // namespace sot
+}        // namespace dynamicgraph
+
+
+
+#endif // #ifndef __sot_torque_control_signal_recorder_H__
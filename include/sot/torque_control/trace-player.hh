@@ -61,6 +61,9 @@ namespace dynamicgraph {
        * the Tracer. Then you can either call the command
        * playNext, or you can call recompute on the output
        * signal "trigger".
+       * The samples are stored in arrays, so that the commands seek
+       * and seekTime can jump directly to any sample, and playRange
+       * limits the playback to a window of the data.
        */
       class SOTTRACEPLAYER_EXPORT TracePlayer
         :public::dynamicgraph::Entity
@@ -86,6 +89,9 @@ namespace dynamicgraph {
         void playNext();
         void rewind();
         void clear();
+        void seek(const int& sample);
+        void seekTime(const double& time);
+        void playRange(const int& start, const int& end);
 
         /* --- ENTITY INHERITANCE --- */
         virtual void display( std::ostream& os ) const;
@@ -97,11 +103,19 @@ namespace dynamicgraph {
 
       protected:
         typedef dynamicgraph::Vector            DataType;
-        typedef std::list< DataType >           DataHistoryType;
-        typedef DataHistoryType::const_iterator DataPointerType;
+        typedef std::vector< DataType >         DataHistoryType;
+        typedef std::vector< double >           TimeHistoryType;
+
+        bool readTextFile(const std::string & fileName, DataHistoryType & data, TimeHistoryType & time);
+        bool readBinaryFile(const std::string & fileName, DataHistoryType & data, TimeHistoryType & time);
+        void setOutput(const std::string & signalName, std::size_t index);
 
         std::map<std::string, DataHistoryType> m_data;
-        std::map<std::string, DataPointerType> m_dataPointers;
+        std::map<std::string, TimeHistoryType> m_time;        /// time stamps (first column of the files)
+        std::map<std::string, std::size_t>     m_dataIndex;   /// index of the last sample played
+
+        int m_rangeStart;   /// first sample played after rewind
+        int m_rangeEnd;     /// samples from this index on are not played (-1 for no limit)
 
       }; // class TraceReader
 
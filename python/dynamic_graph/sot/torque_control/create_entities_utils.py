@@ -455,66 +455,71 @@ def create_topic(ros_import, signal, name, robot=None, entity=None, data_type='v
     sleep(sleep_time);
     
 
-def create_ros_topics(robot):
+''' Topics published by create_ros_topics: (signal, topic name, data type, downsampling).
+    The signals are specified by their path in the robot object, so that the topics of
+    the entities that have not been created are simply reported as failed. '''
+ROS_TOPICS = [
+    ('device.robotState',                       'robotState',               'vector', None),
+    ('device.gyrometer',                        'gyrometer',                'vector', None),
+    ('device.accelerometer',                    'accelerometer',            'vector', None),
+    ('device.forceRLEG',                        'forceRLEG',                'vector', None),
+    ('device.forceLLEG',                        'forceLLEG',                'vector', None),
+    ('device.currents',                         'currents',                 'vector', None),
+#    ('device.forceRARM',                        'forceRARM',                'vector', None),
+#    ('device.forceLARM',                        'forceLARM',                'vector', None),
+    ('filters.estimator_kin.dx',                'jointsVelocities',         'vector', None),
+    ('torque_ctrl.u',                           'i_des_torque_ctrl',        'vector', None),
+    ('traj_gen.q',                              'q_ref',                    'vector', None),
+#    ('traj_gen.dq',                             'dq_ref',                   'vector', None),
+    ('ctrl_manager.pwmDes',                     'i_des',                    'vector', None),
+    ('ctrl_manager.pwmDesSafe',                 'i_des_safe',               'vector', None),
+    ('inv_dyn.tau_des',                         'tau_des',                  'vector', None),
+    ('ff_locator.base6dFromFoot_encoders',      'base6dFromFoot_encoders',  'vector', None),
+    ('floatingBase.soutPos',                    'floatingBase_pos',         'vector', None),
+];
+
+def get_signal(robot, path):
+    ''' Get the signal with the specified path (e.g. 'ctrl_manager.pwmDes') in the robot object '''
+    obj = robot;
+    for attr in path.split('.'):
+        obj = getattr(obj, attr);
+    return obj;
+
+def create_topics(ros_import, topics, robot=None, settle_time=0.1):
+    ''' Create all the specified topics and wait only once for the publisher to settle.
+        @param topics List of tuples (signal, name, data_type, downsampling), where signal is
+                      either a signal or its path in robot (see get_signal), and downsampling
+                      (None to skip) is the factor used to add the signal to robot.device.before
+        @return The list of tuples (name, error message) of the topics that could not be created
+    '''
+    failed = [];
+    for (signal, name, data_type, downsampling) in topics:
+        try:
+            if(isinstance(signal, str)):
+                signal = get_signal(robot, signal);
+            ros_import.add(data_type, name+'_ros', name);
+            plug(signal, ros_import.signal(name+'_ros'));
+            if(downsampling is not None):
+                # signal names have the form Class(entity)::output(type)::signal
+                entity_name = signal.name.split('::')[0].split('(')[1][:-1];
+                robot.device.before.addDownsampledSignal(entity_name+'.'+signal.name.split('::')[-1], downsampling);
+        except Exception as e:
+            failed.append((name, str(e)));
+    if(len(failed)<len(topics)):
+        from time import sleep
+        sleep(settle_time);
+    return failed;
+
+def create_ros_topics(robot, topics=None, verbose=True):
     from dynamic_graph.ros import RosPublish
     ros = RosPublish('rosPublish');
-    try:
-        create_topic(ros, robot.device.robotState,      'robotState');
-        create_topic(ros, robot.device.gyrometer,       'gyrometer');
-        create_topic(ros, robot.device.accelerometer,   'accelerometer');
-        create_topic(ros, robot.device.forceRLEG,       'forceRLEG');
-        create_topic(ros, robot.device.forceLLEG,       'forceLLEG');
-        create_topic(ros, robot.device.currents,        'currents');
-#        create_topic(ros, robot.device.forceRARM,       'forceRARM');
-#        create_topic(ros, robot.device.forceLARM,       'forceLARM');
-        robot.device.after.addDownsampledSignal('rosPublish.trigger',1);
-    except:
-        pass;
-    
-    try:
-        create_topic(ros, robot.filters.estimator_kin.dx,                            'jointsVelocities');
-
-#        create_topic(ros, robot.estimator.jointsTorquesFromInertiaModel,  'jointsTorquesFromInertiaModel');
-#        create_topic(ros, robot.estimator.jointsTorquesFromMotorModel,    'jointsTorquesFromMotorModel');
-#        create_topic(ros, robot.estimator.currentFiltered,                'currentFiltered');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.torque_ctrl.u, 'i_des_torque_ctrl');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.traj_gen.q,   'q_ref');
-#        create_topic(ros, robot.traj_gen.dq,  'dq_ref');
-#        create_topic(ros, robot.traj_gen.ddq, 'ddq_ref');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.ctrl_manager.pwmDes,                  'i_des');
-        create_topic(ros, robot.ctrl_manager.pwmDesSafe,              'i_des_safe');
-#        create_topic(ros, robot.ctrl_manager.signOfControlFiltered,   'signOfControlFiltered');
-#        create_topic(ros, robot.ctrl_manager.signOfControl,           'signOfControl');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.inv_dyn.tau_des, 'tau_des');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.ff_locator.base6dFromFoot_encoders,        'base6dFromFoot_encoders');
-    except:
-        pass;
-
-    try:
-        create_topic(ros, robot.floatingBase.soutPos, 'floatingBase_pos');
-    except:
-        pass;
-    
+    if(topics is None):
+        topics = ROS_TOPICS;
+    failed = create_topics(ros, topics, robot);
+    robot.device.after.addDownsampledSignal('rosPublish.trigger',1);
+    if(verbose):
+        for (name, msg) in failed:
+            print "Topic %s not created: %s" % (name, msg);
     return ros;
     
     
@@ -539,9 +544,11 @@ def addSignalsToTracer(tracer, device):
 
 
 def create_tracer(device, traj_gen=None, estimator_kin=None,
-                  inv_dyn=None, torque_ctrl=None):
+                  inv_dyn=None, torque_ctrl=None, buffer_size=80*(2**20)):
+    ''' For experiments made of several segments use utils.double_buffered_tracer, which
+        records the next segment while the previous one is written to disk. '''
     tracer = TracerRealTime('motor_id_trace');
-    tracer.setBufferSize(80*(2**20));
+    tracer.setBufferSize(buffer_size);
     tracer.open('/tmp/','dg_','.dat');
     device.after.addSignal('{0}.triger'.format(tracer.name));
 
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:40:26 2026
+
+Stages of the pipeline converting the tracer files of an identification experiment
+into the data_j<ID>.npz files read by the identification scripts:
+    raw sensor data -> joint velocities/accelerations -> joint torques -> per-joint files
+Every stage is memoized in a ResultCache, keyed by the content of the tracer files and
+by the parameters the stage depends on, so that changing a parameter only recomputes
+the stages that use it.
+"""
+import os
+import numpy as np
+from dynamic_graph.sot.torque_control.utils.tracer_log_store import open_tracer_log
+from dynamic_graph.sot.torque_control.utils.result_cache import ResultCache
+from compute_estimates_from_sensors import compute_estimates_from_sensors_batch
+
+NJ = 30;                ''' number of joints '''
+DATA_FILE_NAME = 'data';
+
+signal_ctrl    = 'HRP2LAAS-control';
+signal_enc     = 'HRP2LAAS-robotState';
+signal_acc     = 'HRP2LAAS-accelerometer';
+signal_gyro    = 'HRP2LAAS-gyrometer';
+signal_forceLA = 'HRP2LAAS-forceLARM';
+signal_forceRA = 'HRP2LAAS-forceRARM';
+signal_forceLL = 'HRP2LAAS-forceLLEG';
+signal_forceRL = 'HRP2LAAS-forceRLEG';
+signal_current = 'HRP2LAAS-currents';
+SIGNALS = (signal_ctrl, signal_enc, signal_acc, signal_gyro, signal_forceLA, signal_forceRA,
+           signal_forceLL, signal_forceRL, signal_current);
+
+def _load_legacy_data(data_folder, JOINT_ID):
+    ''' Read the data saved by older versions of this script: the sensor data are in data.npz,
+        while control and current of every joint are only in its file data_j<ID>.npz, so they
+        are available only for the joints whose file exists (the other columns are NaN).
+    '''
+    filename = os.path.join(data_folder, DATA_FILE_NAME+'.npz');
+    if(not os.path.exists(filename)):
+        raise IOError("No tracer files nor "+DATA_FILE_NAME+".npz found in "+data_folder);
+    print 'No tracer files found, reading data from '+filename;
+    with np.load(filename) as f:
+        data = dict([(k, f[k]) for k in f.files]);
+    N = data['enc'].shape[0];
+    data['ctrl']    = np.full((N, NJ), np.nan);
+    data['current'] = np.full((N, NJ), np.nan);
+    for j in range(NJ):
+        filename_j = os.path.join(data_folder, DATA_FILE_NAME+'_j'+str(j)+'.npz');
+        if(not os.path.exists(filename_j)):
+            if(j in JOINT_ID):
+                raise IOError("Control and current of joint %d are not in %s: the legacy data.npz does "
+                              "not contain them, the tracer files are needed" % (j, filename_j));
+            continue;
+        with np.load(filename_j) as f:
+            data['ctrl'][:,j]    = f['ctrl'];
+            data['current'][:,j] = f['current'];
+    return data;
+
+def load_raw_data(data_folder, cache, JOINT_ID=range(NJ)):
+    ''' Read the sensor data from the tracer files (through the binary tracer log store,
+        which is the cache of this stage). If the folder contains no tracer files the data
+        are read from the files data.npz and data_j<ID>.npz written by older versions of this
+        script, which must exist for all the joints in JOINT_ID.
+        @return (raw_key, data) where data is a dictionary with time, enc, acc, gyro, forceLA,
+                forceRA, forceLL, forceRL, ctrl and current of all the joints
+    '''
+    log = open_tracer_log(data_folder);
+    if(not all([log.has(s) for s in SIGNALS])):
+        data = _load_legacy_data(data_folder, JOINT_ID);
+        return (cache.key('raw', cache.digest(os.path.join(data_folder, DATA_FILE_NAME+'.npz'))), data);
+
+    raw_key = cache.key('raw', [(s, cache.digest(log.source(s))) for s in SIGNALS]);
+    # check that largest signal has same length of smallest signal
+    n_enc  = log.n_samples(signal_enc);
+    n_acc  = log.n_samples(signal_acc);
+    if(n_acc!=n_enc):
+        print "Reducing size of signals from %d to %d" % (n_acc, n_enc);
+    N = np.min([n_enc,n_acc]);
+    data = {'time':    log.time(signal_enc)[:N],
+            'ctrl':    log.get(signal_ctrl, None, N),
+            'current': log.get(signal_current, None, N),
+            'enc':     log.get(signal_enc, slice(6,None), N),
+            'acc':     log.get(signal_acc, None, N),
+            'gyro':    log.get(signal_gyro, None, N),
+            'forceLA': log.get(signal_forceLA, None, N),
+            'forceRA': log.get(signal_forceRA, None, N),
+            'forceLL': log.get(signal_forceLL, None, N),
+            'forceRL': log.get(signal_forceRL, None, N)};
+    return (raw_key, data);
+
+def _sensor_array(data, DT, NEGLECT_GYROSCOPE, NEGLECT_ACCELEROMETER, SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO):
+    N = data['enc'].shape[0];
+    dt='f4';
+    a = np.zeros(N, dtype=[ ('enc',dt,NJ)
+                           ,('forceLA',dt,6)
+                           ,('forceRA',dt,6)
+                           ,('forceLL',dt,6)
+                           ,('forceRL',dt,6)
+                           ,('acc',dt,3)
+                           ,('gyro',dt,3)
+                           ,('time',dt,1)]);
+    a['enc']      = data['enc'];
+    a['forceLA']  = data['forceLA'];
+    a['forceRA']  = data['forceRA'];
+    a['forceLL']  = data['forceLL'];
+    a['forceRL']  = data['forceRL'];
+    if(SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO):
+        a['forceRL'][:,2] = 0.0;
+    if(NEGLECT_ACCELEROMETER):
+        a['acc']      = np.array([0, 0, 9.81]); #np.mean(acc,0);
+    else:
+        a['acc']      = data['acc'];
+    if(NEGLECT_GYROSCOPE==False):
+        a['gyro']     = data['gyro'];
+    a['time']     = np.squeeze(data['time']*DT);
+    return a;
+
+def _compensate_delay(x, N_DELAY):
+    ''' shift estimate backward in time to compensate for estimation delay,
+        setting last N_DELAY samples to constant value '''
+    x[:-N_DELAY,:] = x[N_DELAY::,:];
+    x[-N_DELAY:,:] = x[-N_DELAY,:];
+    return x;
+
+def estimate_joint_states(cache, raw_key, data, EST_DELAY, DT, NEGLECT_GYROSCOPE, NEGLECT_ACCELEROMETER,
+                          SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO, USE_FT_SENSORS, force=False):
+    ''' Estimate joint velocities, accelerations and torques of all the joints, compensating
+        the estimation delay. Velocities and accelerations only depend on the encoders and
+        on the estimation delay, so they are cached separately from the torques.
+        @return (key, dq, ddq, tau) where key identifies the three estimates
+    '''
+    N_DELAY = int(EST_DELAY/DT);
+    def compute_derivatives():
+        a = _sensor_array(data, DT, True, True, False);
+        (tau, dq, ddq) = compute_estimates_from_sensors_batch(a, EST_DELAY, COMPUTE_TORQUES=False);
+        return {'dq': _compensate_delay(dq, N_DELAY), 'ddq': _compensate_delay(ddq, N_DELAY)};
+    def compute_torques():
+        a = _sensor_array(data, DT, NEGLECT_GYROSCOPE, NEGLECT_ACCELEROMETER, SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO);
+        (tau, dq, ddq) = compute_estimates_from_sensors_batch(a, EST_DELAY, USE_FT_SENSORS=USE_FT_SENSORS);
+        return {'tau': _compensate_delay(tau, N_DELAY)};
+    (der_key, der) = cache.memoize('derivatives', (raw_key, EST_DELAY, DT), compute_derivatives, force);
+    (tau_key, res) = cache.memoize('torques', (raw_key, EST_DELAY, DT, NEGLECT_GYROSCOPE, NEGLECT_ACCELEROMETER,
+                                               SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO, USE_FT_SENSORS),
+                                   compute_torques, force);
+    return (cache.key('estimates', der_key, tau_key), der['dq'], der['ddq'], res['tau']);
+
+def save_joint_data(data_folder, key, JOINT_ID, data, dq, ddq, tau):
+    ''' Write the file data_j<ID>.npz of every joint in JOINT_ID, unless it already contains
+        the data identified by key.
+    '''
+    for j in JOINT_ID:
+        filename = os.path.join(data_folder, DATA_FILE_NAME+'_j'+str(j)+'.npz');
+        try:
+            with np.load(filename) as f:
+                if('cache_key' in f.files and str(f['cache_key'])==key):
+                    continue;
+        except (IOError, OSError, ValueError):
+            pass;
+        print 'Writing '+filename;
+        np.savez(filename, ctrl=data['ctrl'][:,j], enc=data['enc'][:,j], tau=tau[:,j], dq=dq[:,j], ddq=ddq[:,j],
+                 current=data['current'][:,j], cache_key=key);
+
+def compress_identification_data(data_folder, JOINT_ID, EST_DELAY=0.1, DT=0.001, NEGLECT_GYROSCOPE=True,
+                                 NEGLECT_ACCELEROMETER=True, SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO=False,
+                                 USE_FT_SENSORS=True, cache=None, force=False):
+    ''' Run the whole pipeline on the specified folder and write the files of the joints in JOINT_ID.
+        @param cache ResultCache used to store the intermediate results (default: ResultCache())
+        @param force If True recompute all the estimates even if they are in the cache
+        @return (data, dq, ddq, tau), with the estimates of all the joints
+    '''
+    if(cache is None):
+        cache = ResultCache();
+    (raw_key, data) = load_raw_data(data_folder, cache, JOINT_ID);
+    (key, dq, ddq, tau) = estimate_joint_states(cache, raw_key, data, EST_DELAY, DT, NEGLECT_GYROSCOPE,
+                                                NEGLECT_ACCELEROMETER, SET_NORMAL_FORCE_RIGHT_FOOT_TO_ZERO,
+                                                USE_FT_SENSORS, force);
+    save_joint_data(data_folder, key, JOINT_ID, data, dq, ddq, tau);
+    return (data, dq, ddq, tau);
@@ -13,8 +13,10 @@ PLOT_SENSOR_DATA = False;
 from dynamic_graph import plug
 from dynamic_graph.sot.torque_control.force_torque_estimator import ForceTorqueEstimator
 from dynamic_graph.sot.torque_control.numerical_difference import NumericalDifference
+from dynamic_graph.sot.torque_control.batch_evaluator import BatchEvaluator
 import numpy as np
 import dynamic_graph.sot.torque_control.utils.plot_utils as plut
+from dynamic_graph.sot.torque_control.utils.poly_estimator import numerical_difference
 import matplotlib.pyplot as plt
 if USE_ROBOT_VIEWER:
     import robotviewer  # start robotviewer from bash with 'robotviewer -sXML-RPC'.
@@ -46,6 +48,26 @@ def set_sensor_data_in_estimator(estimator_ft, estimator_kin, acc_filter, gyro_f
     ft_LH_filter.x.value = tuple(sensor_data['forceLA']);
     
 
+def set_motor_model_parameters_in_estimator(estimator_ft, NJ):
+    estimator_ft.rotor_inertias.value = NJ*(0.,);
+    estimator_ft.gear_ratios.value    = NJ*(0.,);
+
+    estimator_ft.dqRef.value = NJ*(0.0,);
+    estimator_ft.ddqRef.value = NJ*(0.0,);
+    #Only use inertia model (not current) to estimate torques.
+    estimator_ft.wCurrentTrust.value     = NJ*(0.0,);
+    estimator_ft.current.value           = NJ*(0.0,);
+    estimator_ft.saturationCurrent.value = NJ*(0.0,);
+    estimator_ft.motorParameterKt_p.value  = tuple(NJ*[1.,])
+    estimator_ft.motorParameterKt_n.value  = tuple(NJ*[1.,])
+    estimator_ft.motorParameterKf_p.value  = tuple(NJ*[0.,])
+    estimator_ft.motorParameterKf_n.value  = tuple(NJ*[0.,])
+    estimator_ft.motorParameterKv_p.value  = tuple(NJ*[0.,])
+    estimator_ft.motorParameterKv_n.value  = tuple(NJ*[0.,])
+    estimator_ft.motorParameterKa_p.value  = tuple(NJ*[0.,])
+    estimator_ft.motorParameterKa_n.value  = tuple(NJ*[0.,])
+    
+
 def compute_estimates_from_sensors(sensors, delay, ftSensorOffsets=None, USE_FT_SENSORS=True):
     NJ = 30;                                        # number of joints
     m = sensors['time'].shape[0];                           # number of time steps
@@ -73,23 +95,7 @@ def compute_estimates_from_sensors(sensors, delay, ftSensorOffsets=None, USE_FT_
     plug(ft_RH_filter.x_filtered,                 estimator_ft.ftSensRightHand);
     plug(ft_LH_filter.x_filtered,                 estimator_ft.ftSensLeftHand);
 
-    estimator_ft.rotor_inertias.value = NJ*(0.,);
-    estimator_ft.gear_ratios.value    = NJ*(0.,);
-
-    estimator_ft.dqRef.value = NJ*(0.0,);
-    estimator_ft.ddqRef.value = NJ*(0.0,);
-    #Only use inertia model (not current) to estimate torques.
-    estimator_ft.wCurrentTrust.value     = NJ*(0.0,);
-    estimator_ft.current.value           = NJ*(0.0,);
-    estimator_ft.saturationCurrent.value = NJ*(0.0,);
-    estimator_ft.motorParameterKt_p.value  = tuple(30*[1.,])
-    estimator_ft.motorParameterKt_n.value  = tuple(30*[1.,])
-    estimator_ft.motorParameterKf_p.value  = tuple(30*[0.,])
-    estimator_ft.motorParameterKf_n.value  = tuple(30*[0.,])
-    estimator_ft.motorParameterKv_p.value  = tuple(30*[0.,])
-    estimator_ft.motorParameterKv_n.value  = tuple(30*[0.,])
-    estimator_ft.motorParameterKa_p.value  = tuple(30*[0.,])
-    estimator_ft.motorParameterKa_n.value  = tuple(30*[0.,]) 
+    set_motor_model_parameters_in_estimator(estimator_ft, NJ);
     
     set_sensor_data_in_estimator(estimator_ft, estimator_kin, acc_filter, gyro_filter, ft_RH_filter, 
                                      ft_LF_filter, ft_LH_filter, ft_RF_filter, sensors[0]);
@@ -137,6 +143,146 @@ def compute_estimates_from_sensors(sensors, delay, ftSensorOffsets=None, USE_FT_
     
     return (torques, dq, ddq);
     
+
+def compute_estimates_from_sensors_batch(sensors, delay, ftSensorOffsets=None, USE_FT_SENSORS=True, COMPUTE_TORQUES=True):
+    ''' Same as compute_estimates_from_sensors, but all the filters (NumericalDifference entities)
+        are applied to the whole (N, k) sensor arrays at once with their NumPy implementation.
+        The filtered arrays are then played into the ForceTorqueEstimator entity by a
+        BatchEvaluator entity, which computes the joint torques of all the samples in a single
+        C++ loop and returns them as one (N, NJ) matrix. If COMPUTE_TORQUES is False no entity
+        is used at all and the returned torques are None.
+        @param sensors Structured array (or dict) with fields time, enc, acc, gyro,
+                       forceRL, forceLL, forceRA, forceLA
+        @return (tau, dq, ddq)
+    '''
+    NJ = 30;                                        # number of joints
+    m = sensors['time'].shape[0];                           # number of time steps
+    dt = float(np.mean(sensors['time'][1:]-sensors['time'][:-1])); # sampling period
+    print "Time step: %f" % dt;
+    print "Estimation delay: %f" % delay;
+
+    enc = np.asarray(sensors['enc'])[:,:NJ];
+    (_, dq, ddq)    = numerical_difference(enc, dt, delay, 2);
+    if(not COMPUTE_TORQUES):
+        return (None, dq, ddq);
+
+    acc             = numerical_difference(np.asarray(sensors['acc'])[:,0:3], dt, delay, 1)[0];
+    (gyro, dgyro, _) = numerical_difference(sensors['gyro'], dt, delay, 1);
+    ft_RF           = numerical_difference(sensors['forceRL'], dt, delay, 1)[0];
+    ft_LF           = numerical_difference(sensors['forceLL'], dt, delay, 1)[0];
+    ft_RH           = numerical_difference(sensors['forceRA'], dt, delay, 1)[0];
+    ft_LH           = numerical_difference(sensors['forceLA'], dt, delay, 1)[0];
+
+    # as in the graph of compute_estimates_from_sensors, q_filtered is the raw encoder signal (estimator_kin.x)
+    filtered_data = [('base6d_encoders', np.hstack((np.zeros((m,6)), enc))),
+                     ('q_filtered',      enc),
+                     ('dq_filtered',     dq),
+                     ('ddq_filtered',    ddq),
+                     ('accelerometer',   acc),
+                     ('gyro',            gyro),
+                     ('dgyro',           dgyro),
+                     ('ftSensRightFoot', ft_RF),
+                     ('ftSensLeftFoot',  ft_LF),
+                     ('ftSensRightHand', ft_RH),
+                     ('ftSensLeftHand',  ft_LH)];
+
+    # the BatchEvaluator plays the filtered data into the estimator and collects the torques in C++
+    evaluator = BatchEvaluator("batch_evaluator"+str(np.random.rand()));
+    estimator_ft = ForceTorqueEstimator("estimator_ft"+str(np.random.rand()));
+    for (name, data) in filtered_data:
+        evaluator.addOutputSignal(name, tuple(map(tuple, np.asarray(data).tolist())));
+        plug(evaluator.signal(name), estimator_ft.signal(name));
+    evaluator.addInputSignal('jointsTorques');
+    plug(estimator_ft.jointsTorques, evaluator.signal('jointsTorques'));
+
+    set_motor_model_parameters_in_estimator(estimator_ft, NJ);
+    if(ftSensorOffsets==None):
+        estimator_ft.init(True);
+    else:
+        estimator_ft.init(False);
+        estimator_ft.setFTsensorOffsets(tuple(ftSensorOffsets));
+    estimator_ft.setUseRawEncoders(False);
+    estimator_ft.setUseRefJointVel(False);
+    estimator_ft.setUseRefJointAcc(False);
+    estimator_ft.setUseFTsensors(USE_FT_SENSORS);
+
+    torques = np.array(evaluator.compute('jointsTorques'));
+    if(torques.shape[0]<m):
+        print "WARNING: torques computed only for the first %d of %d samples" % (torques.shape[0], m);
+    return (torques, dq, ddq);
+    
+
+def compute_estimates_from_sensors_batch(sensors, delay, ftSensorOffsets=None, USE_FT_SENSORS=True, COMPUTE_TORQUES=True):
+    ''' Same as compute_estimates_from_sensors, but all the filters (NumericalDifference entities)
+        are applied to the whole (N, k) sensor arrays at once with their NumPy implementation.
+        The filtered arrays are then played into the ForceTorqueEstimator entity by a
+        BatchEvaluator entity, which computes the joint torques of all the samples in a single
+        C++ loop and returns them as one (N, NJ) matrix. If COMPUTE_TORQUES is False no entity
+        is used at all and the returned torques are None.
+        @param sensors Structured array (or dict) with fields time, enc, acc, gyro,
+                       forceRL, forceLL, forceRA, forceLA
+        @return (tau, dq, ddq)
+    '''
+    NJ = 30;                                        # number of joints
+    m = sensors['time'].shape[0];                           # number of time steps
+    dt = float(np.mean(sensors['time'][1:]-sensors['time'][:-1])); # sampling period
+    print "Time step: %f" % dt;
+    print "Estimation delay: %f" % delay;
+
+    enc = np.asarray(sensors['enc'])[:,:NJ];
+    (_, dq, ddq)    = numerical_difference(enc, dt, delay, 2);
+    if(not COMPUTE_TORQUES):
+        return (None, dq, ddq);
+
+    acc             = numerical_difference(np.asarray(sensors['acc'])[:,0:3], dt, delay, 1)[0];
+    (gyro, dgyro, _) = numerical_difference(sensors['gyro'], dt, delay, 1);
+    ft_RF           = numerical_difference(sensors['forceRL'], dt, delay, 1)[0];
+    ft_LF           = numerical_difference(sensors['forceLL'], dt, delay, 1)[0];
+    ft_RH           = numerical_difference(sensors['forceRA'], dt, delay, 1)[0];
+    ft_LH           = numerical_difference(sensors['forceLA'], dt, delay, 1)[0];
+
+    base6d_encoders = np.hstack((np.zeros((m,6)), enc)).tolist();
+    # as in the graph of compute_estimates_from_sensors, q_filtered is the raw encoder signal (estimator_kin.x)
+    (q, dq_l, ddq_l) = (enc.tolist(), dq.tolist(), ddq.tolist());
+    (acc, gyro, dgyro) = (acc.tolist(), gyro.tolist(), dgyro.tolist());
+    (ft_RF, ft_LF, ft_RH, ft_LH) = (ft_RF.tolist(), ft_LF.tolist(), ft_RH.tolist(), ft_LH.tolist());
+
+    def set_filtered_data_in_estimator(estimator_ft, i):
+        estimator_ft.base6d_encoders.value = tuple(base6d_encoders[i]);
+        estimator_ft.q_filtered.value      = tuple(q[i]);
+        estimator_ft.dq_filtered.value     = tuple(dq_l[i]);
+        estimator_ft.ddq_filtered.value    = tuple(ddq_l[i]);
+        estimator_ft.accelerometer.value   = tuple(acc[i]);
+        estimator_ft.gyro.value            = tuple(gyro[i]);
+        estimator_ft.dgyro.value           = tuple(dgyro[i]);
+        estimator_ft.ftSensRightFoot.value = tuple(ft_RF[i]);
+        estimator_ft.ftSensLeftFoot.value  = tuple(ft_LF[i]);
+        estimator_ft.ftSensRightHand.value = tuple(ft_RH[i]);
+        estimator_ft.ftSensLeftHand.value  = tuple(ft_LH[i]);
+
+    estimator_ft = ForceTorqueEstimator("estimator_ft"+str(np.random.rand()));
+    set_motor_model_parameters_in_estimator(estimator_ft, NJ);
+    set_filtered_data_in_estimator(estimator_ft, 0);
+    if(ftSensorOffsets==None):
+        estimator_ft.init(True);
+    else:
+        estimator_ft.init(False);
+        estimator_ft.setFTsensorOffsets(tuple(ftSensorOffsets));
+    estimator_ft.setUseRawEncoders(False);
+    estimator_ft.setUseRefJointVel(False);
+    estimator_ft.setUseRefJointAcc(False);
+    estimator_ft.setUseFTsensors(USE_FT_SENSORS);
+
+    torques = np.zeros((m,NJ));
+    for i in range(m):
+        set_filtered_data_in_estimator(estimator_ft, i);
+        estimator_ft.jointsTorques.recompute(i);
+        torques[i,:] = estimator_ft.jointsTorques.value;
+        if(i%10000==0):
+            print 'Estimation time: \t %.3f' % (i*dt);
+
+    return (torques, dq, ddq);
+    
     
     
     
@@ -49,6 +49,38 @@ def solve1stOrderLeastSquare(x,y):
 def solveLeastSquare(A, b):
     return np.linalg.pinv(A)*np.matrix(b).T;
 
+''' Find the runs of consecutive True values in a boolean array.
+    @return (starts, ends) indexes of the first sample of each run and of the sample following it
+'''
+def find_runs(mask):
+    d = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])));
+    return (np.nonzero(d==1)[0], np.nonzero(d==-1)[0]);
+
+''' Find the phases where the velocity is constant and not zero, i.e. |ddq|<zero_acc_threshold
+    and |dq|>zero_vel_threshold, discarding margin samples at both ends of each phase
+    (same samples as ndimage.binary_erosion(mask, None, margin), in linear time).
+    @return (starts, ends) indexes of the first sample of each plateau and of the sample following it
+'''
+def find_velocity_plateaus(dq, ddq, zero_vel_threshold, zero_acc_threshold, margin=100):
+    mask = np.logical_and(np.abs(ddq)<zero_acc_threshold, np.abs(dq)>zero_vel_threshold);
+    (starts, ends) = find_runs(mask);
+    starts = starts + margin;
+    ends   = ends - margin;
+    keep = ends>starts;
+    return (starts[keep], ends[keep]);
+
+''' Mean value of x over each segment [starts[i], ends[i]) '''
+def segment_means(x, starts, ends):
+    c = np.concatenate(([0.0], np.cumsum(x)));
+    return (c[ends]-c[starts]) / (ends-starts);
+
+''' Boolean mask that is True on all the segments [starts[i], ends[i]) '''
+def segments_to_mask(n, starts, ends):
+    d = np.zeros(n+1, np.int64);
+    np.add.at(d, starts, 1);
+    np.add.at(d, ends, -1);
+    return np.cumsum(d[:n])>0;
+
 ''' Stop the joint when vel is low'''
 def gentleStop(traj_gen,joint):
   while(abs(traj_gen.dq.value[jID[joint]]) > 0.0001 ):
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:05:37 2026
+
+Identify the motor parameters of several joints with a single command.
+For every joint listed in the manifest the static, velocity and acceleration
+identifications (identify_motor_static, identify_motor_vel, identify_motor_acc)
+are run one after the other, as done by identify_motor_with_current.py, while
+different joints are processed in parallel by a pool of processes.
+The figures are saved in the data folders instead of being shown, and the
+identified parameters are written in a python module with the same format as
+hrp2/motors_parameters.py. With --base-params the values of the joints that are
+not identified are copied from an existing parameter module.
+
+Usage:
+    python identify_all_motors.py motors_parameters_identified.py
+    python identify_all_motors.py out.py --manifest manifest.json --joints rhy rhr --processes 4
+    python identify_all_motors.py out.py --joints rk --base-params ../hrp2/motors_parameters.py
+where manifest.json contains:
+    {"result_dir": "../../../../../results/hrp2_motor_identification/",
+     "joints": {"rhy": {"static": "20161114_135332_rhy_static/",
+                        "vel":    "20161114_143152_rhy_vel/",
+                        "acc":    "20161114_142351_rhy_acc/",
+                        "invert_current": true}, ...}}
+"""
+import matplotlib as mpl
+mpl.use('Agg');   # never open windows, figures are only saved to file
+
+import os
+import sys
+import json
+import traceback
+import multiprocessing
+import numpy as np
+
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
+from identification_utils import jID
+from identify_motor_static import identify_motor_static
+from identify_motor_vel import identify_motor_vel
+from identify_motor_acc import identify_motor_acc
+
+DEFAULT_RESULT_DIR = '../../../../../results/hrp2_motor_identification/';
+
+''' Data folders (relative to the result directory) and options of the leg joints '''
+DEFAULT_MANIFEST = {
+    'rhy': {'static': '20161114_135332_rhy_static/', 'vel': '20161114_143152_rhy_vel/',
+            'acc': '20161114_142351_rhy_acc/', 'invert_current': True},
+    'rhr': {'static': '20161114_144232_rhr_static/', 'vel': '20161114_150356_rhr_vel/',
+            'acc': '20161114_145456_rhr_acc/', 'invert_current': True},
+    'rhp': {'static': '20161114_150722_rhp_static/', 'vel': '20161114_151812_rhp_vel/',
+            'acc': '20161114_151259_rhp_acc/'},
+    'rk':  {'static': '20161114_152140_rk_static/', 'vel': '20161114_153220_rk_vel/',
+            'acc': '20161114_152706_rk_acc/', 'invert_current': True},
+    'rap': {'static': '20161114_153739_rap_static/', 'vel': '20161114_154559_rap_vel/',
+            'acc': '20161114_154316_rap_acc/', 'invert_current': True},
+    'rar': {'static': '20161114_154945_rar_static/', 'vel': '20161114_160038_rar_vel/',
+            'acc': '20161114_155545_rar_acc/'},
+    'lhy': {'static': '20171002_163413_lhy_static/', 'vel': '20171002_151718_lhy_vel/',
+            'acc': '20170113_144710_lhy_const_acc/'},
+    'lhr': {'static': '20171002_164436_lhr_static/', 'vel': '20171002_153334_lhr_vel/',
+            'acc': '20170113_145826_lhr_const_acc/'},
+    'lhp': {'static': '20171002_165335_lhp_static/', 'vel': '20171002_154449_lhp_vel/',
+            'acc': '20170113_151103_lhp_const_acc/'},
+    'lk':  {'static': '20170113_151748_lk_static/', 'vel': '20170113_152924_lk_const_vel/',
+            'acc': '20170113_152606_lk_const_acc/'},
+    'lap': {'static': '20170113_154007_lap_static/', 'vel': '20170113_154834_lap_const_vel/',
+            'acc': '20170113_154303_lap_const_acc/'},
+    'lar': {'static': '20170113_155150_lar_static/', 'vel': '20170113_160057_lar_const_vel/',
+            'acc': '20170113_155706_lar_const_acc/'},
+};
+
+''' Default values of the options that can be specified for each joint in the manifest '''
+DEFAULT_OPTIONS = {
+    'dt':                               0.001,
+    'ZERO_VEL_THRESHOLD':               0.1,
+    'POSITIVE_VEL_THRESHOLD':           0.001,
+    'ZERO_ACC_THRESHOLD':               0.2,
+    'ZERO_JERK_THRESHOLD':              3.0,
+    'CURRENT_SATURATION':               9.5,
+    'invert_current':                   False,
+    'plots':                            'file',     # 'file' to save the figures in the data folders, 'none' to skip them
+};
+
+''' Parameters written in the output module, in the order in which they are written '''
+PARAMETER_NAMES = ('Kt_p', 'Kt_n', 'Kf_p', 'Kf_n', 'Kv_p', 'Kv_n', 'Ka_p', 'Ka_n',
+                   'K_bemf', 'deadzone', 'cur_sens_gains');
+NJ = 30;
+
+def load_joint_data(data_folder, joint_id, invert_current, current_saturation):
+    ''' Load the file written by compress_identification_data.py for the specified joint,
+        removing the samples where the current is saturated.
+        @return (enc, dq, ddq, tau, ctrl, current)
+    '''
+    data = np.load(os.path.join(data_folder, 'data_j'+str(joint_id)+'.npz'));
+    (enc, dq, ddq, tau, ctrl, current) = [np.squeeze(data[k]) for k in ('enc', 'dq', 'ddq', 'tau', 'ctrl', 'current')];
+    mask = np.logical_and(current>-current_saturation, current<current_saturation);
+    if(invert_current):
+        current = -current;
+    return (enc[mask], dq[mask], ddq[mask], tau[mask], ctrl[mask], current[mask]);
+
+def identify_joint(joint_name, folders, options):
+    ''' Run the static, velocity and acceleration identifications of a joint.
+        @param folders Dictionary with the data folders of the 'static', 'vel' and 'acc' experiments
+        @param options Dictionary of options (see DEFAULT_OPTIONS)
+        @return Dictionary of the identified parameters (keys in PARAMETER_NAMES) plus
+                the name of the data folder used for every parameter ('source')
+    '''
+    opt = dict(DEFAULT_OPTIONS);
+    opt.update(options);
+    dt = opt['dt'];
+    joint_id = jID[joint_name];
+    plots = plot_utils.DeferredFigures();
+    # figures are saved by this process: joints are already processed in parallel
+    render = lambda folder, prefix: plots.render(opt['plots'], folder, prefix+'_'+joint_name+'_', ['jpg'], 1);
+
+    (enc, dq, ddq, tau, ctrl, current) = load_joint_data(folders['static'], joint_id,
+                                                         opt['invert_current'], opt['CURRENT_SATURATION']);
+    (Ktp, Ktn, Ks, DZ) = identify_motor_static(enc, dq, ctrl, current, tau, joint_id, joint_name,
+                                               opt['ZERO_VEL_THRESHOLD'], opt['POSITIVE_VEL_THRESHOLD'], False, plots);
+    np.savez(os.path.join(folders['static'], 'motor_param_'+joint_name+'.npz'), Ktp=Ktp, Ktn=Ktn, Ks=Ks, DZ=DZ);
+    render(folders['static'], 'static');
+
+    (enc, dq, ddq, tau, ctrl, current) = load_joint_data(folders['vel'], joint_id,
+                                                         opt['invert_current'], opt['CURRENT_SATURATION']);
+    (Kvp, Kvn, Kfp, Kfn, DeadZone, K_bemf) = identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks,
+                                                                opt['ZERO_VEL_THRESHOLD'], opt['ZERO_ACC_THRESHOLD'],
+                                                                False, plots);
+    np.savez(os.path.join(folders['vel'], 'motor_param_'+joint_name+'.npz'), Ktp=Ktp, Ktn=Ktn, Kvp=Kvp, Kvn=Kvn,
+             Kfp=Kfp, Kfn=Kfn, DeadZone=DeadZone, K_bemf=K_bemf);
+    render(folders['vel'], 'vel');
+
+    (enc, dq, ddq, tau, ctrl, current) = load_joint_data(folders['acc'], joint_id,
+                                                         opt['invert_current'], opt['CURRENT_SATURATION']);
+    (Kap, Kan, Kfp_acc, Kfn_acc) = identify_motor_acc(dt, dq, ddq, current, tau, Ktp, Kvp,
+                                                      opt['POSITIVE_VEL_THRESHOLD'], opt['ZERO_JERK_THRESHOLD'], False, plots);
+    render(folders['acc'], 'acc');
+
+    static = os.path.basename(os.path.normpath(folders['static']));
+    vel    = os.path.basename(os.path.normpath(folders['vel']));
+    acc    = os.path.basename(os.path.normpath(folders['acc']));
+    return {'Kt_p': Ktp, 'Kt_n': Ktn, 'Kf_p': Kfp, 'Kf_n': Kfn, 'Kv_p': Kvp, 'Kv_n': Kvn,
+            'Ka_p': Kap, 'Ka_n': Kan, 'K_bemf': K_bemf, 'deadzone': DeadZone, 'cur_sens_gains': Ks,
+            'source': {'Kt_p': static, 'Kt_n': static, 'Kf_p': vel, 'Kf_n': vel, 'Kv_p': vel, 'Kv_n': vel,
+                       'Ka_p': acc, 'Ka_n': acc, 'K_bemf': vel, 'deadzone': vel, 'cur_sens_gains': static}};
+
+def _identify_joint_worker(args):
+    (joint_name, folders, options) = args;
+    try:
+        return (joint_name, identify_joint(joint_name, folders, options), None);
+    except Exception:
+        return (joint_name, None, traceback.format_exc());
+
+def read_manifest(filename):
+    ''' Read a json manifest and return a dictionary mapping every joint name to the
+        absolute paths of its data folders and its options. '''
+    with open(filename, 'r') as f:
+        manifest = json.load(f);
+    return expand_manifest(manifest['joints'], manifest.get('result_dir', ''));
+
+def expand_manifest(joints, result_dir):
+    ''' Prepend result_dir to the data folders of all the joints. '''
+    res = {};
+    for (name, entry) in joints.items():
+        if(name not in jID):
+            raise ValueError("Unknown joint name "+name);
+        options = dict([(k,v) for (k,v) in entry.items() if k not in ('static', 'vel', 'acc')]);
+        folders = dict([(k, os.path.join(result_dir, entry[k])) for k in ('static', 'vel', 'acc')]);
+        res[name] = (folders, options);
+    return res;
+
+def identify_all_motors(manifest, processes=None, verbose=True):
+    ''' Identify the parameters of all the joints in the manifest in parallel.
+        @param manifest Dictionary joint name -> (folders, options), see expand_manifest
+        @param processes Number of worker processes (default: number of cores)
+        @return (results, errors) two dictionaries mapping joint names to the identified
+                parameters and to the traceback of the failed identifications
+    '''
+    jobs = [(name, folders, options) for (name, (folders, options)) in sorted(manifest.items(), key=lambda x: jID[x[0]])];
+    results = {};
+    errors = {};
+    pool = multiprocessing.Pool(processes);
+    try:
+        for (name, res, err) in pool.imap_unordered(_identify_joint_worker, jobs):
+            if(err is None):
+                results[name] = res;
+                if(verbose):
+                    print("Joint %s identified" % name);
+            else:
+                errors[name] = err;
+                if(verbose):
+                    print("ERROR while identifying joint %s:\n%s" % (name, err));
+        pool.close();
+    except:
+        pool.terminate();
+        raise;
+    finally:
+        pool.join();
+    return (results, errors);
+
+def load_base_parameters(name):
+    ''' Load the module containing the base values of the motor parameters, e.g. a file
+        written by this script or hrp2/motors_parameters.py.
+        @param name Path of a python file or name of an importable module
+        @return Dictionary mapping every name in PARAMETER_NAMES to an array of NJ values
+    '''
+    if(name.endswith('.py') or os.path.isfile(name)):
+        import imp
+        module = imp.load_source('base_motors_parameters', name);
+    else:
+        import importlib
+        module = importlib.import_module(name);
+    base = {};
+    for p in PARAMETER_NAMES:
+        if(not hasattr(module, p)):
+            raise ValueError("Parameter %s not found in base module %s" % (p, name));
+        base[p] = np.array(getattr(module, p), dtype=float).reshape(-1);
+        if(base[p].shape[0]!=NJ):
+            raise ValueError("Parameter %s of base module %s has %d values instead of %d" % (p, name, base[p].shape[0], NJ));
+    return base;
+
+def write_motors_parameters(filename, results, base=None, base_name=None):
+    ''' Write the identified parameters in a python module with the same format as
+        hrp2/motors_parameters.py.
+        @param base Dictionary of base parameters (see load_base_parameters). The parameters
+                    of the joints that have not been identified keep their base values.
+                    If None only the identified entries are written, in dictionaries indexed
+                    by joint id, so that using the parameters of another joint fails.
+        @param base_name Name of the base module, written in the header of the file
+    '''
+    names = sorted(results.keys(), key=lambda n: jID[n]);
+    with open(filename, 'w') as f:
+        f.write('# -*- coding: utf-8 -*-\n');
+        f.write('"""\nMotor parameters identified with identify_all_motors.py on joints: '+', '.join(names)+'\n');
+        if(base is not None):
+            f.write('The parameters of the other joints are taken from '+str(base_name)+'\n');
+        f.write('"""\n');
+        f.write('import numpy as np\n\n');
+        f.write('NJ = %d;\n' % NJ);
+        for p in PARAMETER_NAMES:
+            if(base is None):
+                f.write('%-15s= {};\n' % p);
+            else:
+                f.write('%-15s= np.array([%s]);\n' % (p, ', '.join(['%f' % v for v in base[p]])));
+        for name in names:
+            f.write('\n# %s\n' % name);
+            for p in PARAMETER_NAMES:
+                f.write('%-19s= %f #Using %s\n' % ('%s[%d]' % (p, jID[name]), results[name][p], results[name]['source'][p]));
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Identify the motor parameters of several joints in parallel');
+    parser.add_argument('output', help='name of the python module where to write the identified parameters');
+    parser.add_argument('--manifest', default=None, help='json file with the data folders of every joint '
+                                                         '(default: the leg joints of DEFAULT_MANIFEST)');
+    parser.add_argument('--result-dir', default=DEFAULT_RESULT_DIR, help='directory containing the data folders '
+                                                                         'of the default manifest');
+    parser.add_argument('--joints', nargs='+', default=None, help='identify only these joints');
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes');
+    parser.add_argument('--no-plots', action='store_true', help='do not save the figures');
+    parser.add_argument('--base-params', default=None, help='python file or module with the parameters of all the '
+                                                            'joints, only the identified joints are overwritten '
+                                                            '(default: write only the identified joints)');
+    args = parser.parse_args();
+
+    if(args.manifest is None):
+        manifest = expand_manifest(DEFAULT_MANIFEST, args.result_dir);
+    else:
+        manifest = read_manifest(args.manifest);
+    if(args.joints is not None):
+        manifest = dict([(j, manifest[j]) for j in args.joints]);
+    if(args.no_plots):
+        for (folders, options) in manifest.values():
+            options['plots'] = 'none';
+
+    # load the base parameters before the identification, so that a wrong module fails immediately
+    base = None if args.base_params is None else load_base_parameters(args.base_params);
+    (results, errors) = identify_all_motors(manifest, args.processes);
+    if(len(results)>0):
+        write_motors_parameters(args.output, results, base, args.base_params);
+        print("Parameters of %d joints written to %s" % (len(results), args.output));
+    if(len(errors)>0):
+        sys.exit("Identification failed for joints: "+', '.join(sorted(errors.keys())));
+
+if __name__=='__main__':
+    main();
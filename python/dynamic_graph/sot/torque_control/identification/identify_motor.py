@@ -24,6 +24,7 @@ from qpoases import PySQProblem as SQProblem
 from qpoases import PyOptions as Options
 from qpoases import PyPrintLevel as PrintLevel
 from qpoases import PyReturnValue
+from streaming_least_squares import asymmetric_least_squares
 
 
 def update_line(num, data, force, line, line_head, line_torque, line_force):
@@ -102,9 +103,8 @@ else:
 DATA_FILE_NAME = 'data_j'+str(JOINT_ID)+'.npz';
 USE_LOW_VELOCITY_DATA_ONLY = False;
 DO_IDENTIFICATION_WITH_FIRST_ORDER_DYNAMICS = False;
-MAX_N_SAMPLES = 300;  ''' max number of samples handled by the QP solver '''
 
-w = 100;    # weight used for positive penalty
+w = 100;    # weight used for positive penalty (the squared residual is multiplied by w^2)
 
 PLOT_LOW_VEL_DATA_3D    = True;
 PLOT_LOW_VEL_DATA       = True;
@@ -246,31 +246,6 @@ print 'k_tp[%d] = %f\nk_tn[%d] = %f' % (JOINT_ID, k_tp_c1, JOINT_ID, k_tn_c1);
 
 
 print '    Perform identification with asymmetric penalty function ';
-''' If necessary, downsample data '''
-if(m>MAX_N_SAMPLES):
-    ds   = int(m/MAX_N_SAMPLES)+1;
-#    q    = q[0:-1:ds];
-    enc  = enc[0:-1:ds];
-    dq   = dq[0:-1:ds];
-    tau  = tau[0:-1:ds];
-    ctrl = ctrl[0:-1:ds];
-    print 'Downsample data from %d to %d' % (m, len(dq));
-    m = len(dq);
-    
-n = 2;
-A       = np.zeros((m,2*m+n));
-b       = np.zeros(m);
-A[:,n:n+m]  = w*np.identity(m);
-A[:,n+m:] = np.identity(m);
-lb = np.zeros(2*m+n);
-lb[0:n] = -1e99;
-
-i_pos = np.where(ctrl>0);
-m_pos = len(i_pos[0]);
-i_neg = np.where(ctrl<=0);
-m_neg = len(i_neg[0]);
-A_bar = np.zeros((m,n));
-b_bar = np.zeros(m);
 dq_max = np.max(dq);
 tau_max = np.max(tau);
 ctrl_max = np.max(ctrl);
@@ -278,19 +253,12 @@ A_norm  = np.zeros((m,2));
 A_norm[:,0]  = dq/dq_max;
 A_norm[:,1]  = tau/tau_max;
 b_norm       = ctrl/ctrl_max;
-A_bar[0:m_pos,:]    = A_norm[i_pos,0:2]; 
-A_bar[m_pos:m,:]    = -A_norm[i_neg,0:2];
-b_bar[0:m_pos]      = b_norm[i_pos]; 
-b_bar[m_pos:m]      = -b_norm[i_neg];
-A_in = np.zeros((2*m,2*m+n));
-ub_in = np.zeros(2*m);
-A_in[0:m,0:n]       = A_bar;
-A_in[0:m,n:n+m]     = -np.identity(m);
-A_in[m:,0:n]        = -A_bar;
-A_in[m:,n+m:]       = -np.identity(m);
-ub_in[0:m]          = b_bar;
-ub_in[m:]           = -b_bar;
-x_norm = solveLeastSquare(A, b, lb, ub=None, A_in=A_in, lb_in=None, ub_in=ub_in);
+# flip the sign of the samples with negative ctrl, so that the penalty is always larger
+# when the model overestimates the magnitude of ctrl
+sign_ctrl    = np.where(ctrl>0, 1.0, -1.0);
+A_bar        = A_norm*sign_ctrl[:,np.newaxis];
+b_bar        = b_norm*sign_ctrl;
+x_norm = asymmetric_least_squares(A_bar, b_bar, w*w, verbose=True);
 #x_norm = solveLeastSquare(A_bar, b_bar);
 k_v   = x_norm[0]*ctrl_max/dq_max;
 k_tau = x_norm[1]*ctrl_max/tau_max;
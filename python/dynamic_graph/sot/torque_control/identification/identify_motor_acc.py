@@ -7,12 +7,16 @@ Created on Tue Sep 12 18:47:50 2017
 from scipy import signal
 import numpy as np
 from scipy import ndimage
-import matplotlib.pyplot as plt
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
 from identification_utils import solve1stOrderLeastSquare
 
 
 def identify_motor_acc(dt, dq, ddq, current, tau, Kt_p, Kv_p, ZERO_VELOCITY_THRESHOLD_SMALL, 
-                       ZERO_JERK_THRESHOLD, SHOW_THRESHOLD_EFFECT):
+                       ZERO_JERK_THRESHOLD, SHOW_THRESHOLD_EFFECT, plots=None):
+    ''' @param plots DeferredFigures where to record the plots (if None they are shown at the end) '''
+    render = (plots is None);
+    if(render):
+        plots = plot_utils.DeferredFigures();
     #Filter current*****************************************************
     win = signal.hann(10)
     filtered_current = signal.convolve(current, win, mode='same') / sum(win)
@@ -30,12 +34,12 @@ def identify_motor_acc(dt, dq, ddq, current, tau, Kt_p, Kv_p, ZERO_VELOCITY_THRE
     maskConstNegAcc=np.logical_and( maskConstAcc ,maskNegVel )
     
     if SHOW_THRESHOLD_EFFECT :
-        plt.figure()
-        plt.plot(ddq); plt.ylabel('ddq')
+        plots.figure()
+        plots.plot(ddq); plots.ylabel('ddq')
         ddq_const=ddq.copy()
         ddq_const[np.logical_not(maskConstAcc)]=np.nan
-        plt.plot(ddq_const); plt.ylabel('ddq_const')
-        plt.show()
+        plots.plot(ddq_const); plots.ylabel('ddq_const')
+        plots.show()
 
     #~ y              = a. x   +  b
     #~ i-Kt.tau-Kv.dq = Ka.ddq +  Kf
@@ -52,18 +56,20 @@ def identify_motor_acc(dt, dq, ddq, current, tau, Kt_p, Kv_p, ZERO_VELOCITY_THRE
     Kfn=-b
     
     # Plot *************************************************************
-    plt.figure()    
-    plt.axhline(0, color='black',lw=1)
-    plt.axvline(0, color='black',lw=1)
-    plt.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot(x[maskConstPosAcc],y[maskConstPosAcc],'rx',lw=3,markersize=1); 
-    plt.plot(x[maskConstNegAcc],y[maskConstNegAcc],'bx',lw=3,markersize=1); 
+    plots.figure()    
+    plots.axhline(0, color='black',lw=1)
+    plots.axvline(0, color='black',lw=1)
+    plots.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot(x[maskConstPosAcc],y[maskConstPosAcc],'rx',lw=3,markersize=1); 
+    plots.plot(x[maskConstNegAcc],y[maskConstNegAcc],'bx',lw=3,markersize=1); 
     
     #plot identified lin model
-    plt.plot([min(x),max(x)],[Kap*min(x)+Kfp ,Kap*max(x)+Kfp],'g:',lw=3)
-    plt.plot([min(x),max(x)],[Kan*min(x)-Kfn ,Kan*max(x)-Kfn],'g:',lw=3)
-    plt.ylabel(y_label)
-    plt.xlabel(x_label)
-    plt.show()
+    plots.plot([min(x),max(x)],[Kap*min(x)+Kfp ,Kap*max(x)+Kfp],'g:',lw=3)
+    plots.plot([min(x),max(x)],[Kan*min(x)-Kfn ,Kan*max(x)-Kfn],'g:',lw=3)
+    plots.ylabel(y_label)
+    plots.xlabel(x_label)
+    plots.show()
+    if(render):
+        plots.render()
     
     return (Kap, Kan, Kfp, Kfn)
\ No newline at end of file
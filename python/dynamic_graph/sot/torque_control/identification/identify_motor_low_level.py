@@ -5,46 +5,47 @@ Created on Tue Sep 12 18:47:50 2017
 @author: adelpret
 """
 import numpy as np
-import matplotlib.pyplot as plt
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
 from matplotlib import cm
 from matplotlib.ticker import LinearLocator, FormatStrFormatter
 from dynamic_graph.sot.torque_control.hrp2.control_manager_conf import IN_OUT_GAIN
 
 
-def identify_motor_low_level(dq, ctrl, current):
+def identify_motor_low_level(dq, ctrl, current, plots=None):
+    render = (plots is None);
+    if(render):
+        plots = plot_utils.DeferredFigures();
     DZ = 0.4
     K3 = 1.0#1.06
     mask=abs(K3*ctrl/IN_OUT_GAIN-current)<DZ
     times = np.arange(len(dq))*0.001
     
-    plt.figure()
-    plt.subplot(411)
-    plt.plot(times,current      ,'.')
-    plt.plot(times[mask],current[mask],'.')
-    plt.title('current')
+    plots.figure()
+    plots.subplot(411)
+    plots.plot(times,current      ,'.')
+    plots.plot(times[mask],current[mask],'.')
+    plots.title('current')
     
-    plt.subplot(412)
-    plt.plot(times,dq            ,'.')
-    plt.plot(times[mask],dq[mask],'.')
-    plt.title('dq')
+    plots.subplot(412)
+    plots.plot(times,dq            ,'.')
+    plots.plot(times[mask],dq[mask],'.')
+    plots.title('dq')
     
-    plt.subplot(413)
-    plt.plot(times,ctrl            ,'.')
-    plt.plot(times[mask],ctrl[mask],'.')
-    plt.title(ctrl)
-    plt.title('ctrl')
+    plots.subplot(413)
+    plots.plot(times,ctrl            ,'.')
+    plots.plot(times[mask],ctrl[mask],'.')
+    plots.title('ctrl')
     
-    plt.subplot(414)
-    plt.plot(times,K3*ctrl/IN_OUT_GAIN-current            ,'.')
-    plt.plot(times[mask],K3*ctrl[mask]/IN_OUT_GAIN-current[mask],'.')
-    plt.title(ctrl)
-    plt.title('ctrl-current ')
+    plots.subplot(414)
+    plots.plot(times,K3*ctrl/IN_OUT_GAIN-current            ,'.')
+    plots.plot(times[mask],K3*ctrl[mask]/IN_OUT_GAIN-current[mask],'.')
+    plots.title('ctrl-current ')
     
-    plt.show()
+    plots.show()
     
     #~ embed()
-    fig = plt.figure()
-    ax = fig.gca(projection='3d')
+    fig = plots.figure()
+    ax = fig.add_subplot(111, projection='3d')
     NDZ= 100
     NK3= 100
     lDZs = np.linspace(0.3,0.5,NDZ)
@@ -73,21 +74,21 @@ def identify_motor_low_level(dq, ctrl, current):
                        
     # Customize the z axis.
     ax.set_zlim(np.min(cost), 1.01)
-    ax.zaxis.set_major_locator(LinearLocator(2))
-    ax.zaxis.set_major_formatter(FormatStrFormatter('%.02f'))
+    ax.call('zaxis.set_major_locator', LinearLocator(2))
+    ax.call('zaxis.set_major_formatter', FormatStrFormatter('%.02f'))
 
     # Add a color bar which maps values to colors.
     fig.colorbar(surf, shrink=0.5, aspect=5)                       
-    plt.show()
+    plots.show()
     
     #plot a particular case
     DZ=0.4
     K3=1.0
     mask=abs(K3*ctrl/IN_OUT_GAIN-current) < DZ
-    plt.xlabel('current') 
-    plt.ylabel('dq') 
-    plt.plot(current[mask],dq[mask],'.')
-    plt.show()
+    plots.xlabel('current') 
+    plots.ylabel('dq') 
+    plots.plot(current[mask],dq[mask],'.')
+    plots.show()
     
     #plot the optimum
     iDZ,iK3 = np.unravel_index(np.argmax(cost),cost.shape)
@@ -96,13 +97,15 @@ def identify_motor_low_level(dq, ctrl, current):
     print 'DZ = ' + str(DZ)
     print 'K3 = ' + str(K3)
     mask=abs(K3*ctrl/IN_OUT_GAIN-current) < DZ
-    plt.xlabel('current') 
-    plt.ylabel('dq') 
-    plt.plot(current[mask],dq[mask],'.')
+    plots.xlabel('current') 
+    plots.ylabel('dq') 
+    plots.plot(current[mask],dq[mask],'.')
     print -np.corrcoef(current[mask],dq[mask])[0,1]
     print cost[iDZ,iK3]
     
-    plt.show()
+    plots.show()
+    if(render):
+        plots.render()
     
     #~ maskInDZ=abs(ctrl/IN_OUT_GAIN) < 0.5
 #~ tt=np.arange(maskInDZ.size)
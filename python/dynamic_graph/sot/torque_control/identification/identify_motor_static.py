@@ -6,13 +6,17 @@ Created on Tue Sep 12 18:47:50 2017
 """
 import numpy as np
 from scipy import ndimage
-import matplotlib.pyplot as plt
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
 from identification_utils import solve1stOrderLeastSquare
 from dynamic_graph.sot.torque_control.hrp2.control_manager_conf import IN_OUT_GAIN
 
 
 def identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZERO_VELOCITY_THRESHOLD, 
-                          ZERO_VELOCITY_THRESHOLD_SMALL, SHOW_THRESHOLD_EFFECT):
+                          ZERO_VELOCITY_THRESHOLD_SMALL, SHOW_THRESHOLD_EFFECT, plots=None):
+    ''' @param plots DeferredFigures where to record the plots (if None they are shown at the end) '''
+    render = (plots is None);
+    if(render):
+        plots = plot_utils.DeferredFigures();
     # remove high velocity
     maskConstAng = (abs (dq)<ZERO_VELOCITY_THRESHOLD)
     # erode to get only steady phases where velocity is small 
@@ -22,12 +26,12 @@ def identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZER
     maskConstPosAng=np.logical_and( maskConstAng ,maskPosVel )
     maskConstNegAng=np.logical_and( maskConstAng ,maskNegVel ) 
     if SHOW_THRESHOLD_EFFECT :
-        plt.figure()
-        plt.plot(enc, label='q')
+        plots.figure()
+        plots.plot(enc, label='q')
         q_const=enc.copy()
         q_const[np.logical_not(maskConstAng)]=np.nan
-        plt.plot(q_const, label='q_const')
-        plt.legend()
+        plots.plot(q_const, label='q_const')
+        plots.legend()
         
     # identify current sensor gain
     x = current[maskConstAng]
@@ -52,60 +56,60 @@ def identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZER
         
         x_neg = x[maskNegErr]
         y_neg = y[maskNegErr]
-        plt.figure()    
-        plt.plot(x_neg, y_neg,'.' ,lw=3,markersize=1,c='0.5');  
-        plt.plot([min(x_neg),max(x_neg)],[Ksn*min(x_neg)+DZn ,Ksn*max(x_neg)+DZn],'g:',lw=3)
-        plt.ylabel(r'$i(t)$'); plt.xlabel(r'$u(t)$')
-        plt.title('Negative current errors - Joint '+JOINT_NAME)
+        plots.figure()    
+        plots.plot(x_neg, y_neg,'.' ,lw=3,markersize=1,c='0.5');  
+        plots.plot([min(x_neg),max(x_neg)],[Ksn*min(x_neg)+DZn ,Ksn*max(x_neg)+DZn],'g:',lw=3)
+        plots.ylabel(r'$i(t)$'); plots.xlabel(r'$u(t)$')
+        plots.title('Negative current errors - Joint '+JOINT_NAME)
         
         x_pos = x[maskPosErr]
         y_pos = y[maskPosErr]
-        plt.figure()    
-        plt.plot(x_pos, y_pos,'.' ,lw=3,markersize=1,c='0.5');  
-        plt.plot([min(x_pos),max(x_pos)],[Ksp*min(x_pos)+DZp ,Ksp*max(x_pos)+DZp],'g:',lw=3)
-        plt.ylabel(r'$i(t)$'); plt.xlabel(r'$u(t)$')
-        plt.title('Positive current errors - Joint '+JOINT_NAME)
-        plt.show()
+        plots.figure()    
+        plots.plot(x_pos, y_pos,'.' ,lw=3,markersize=1,c='0.5');  
+        plots.plot([min(x_pos),max(x_pos)],[Ksp*min(x_pos)+DZp ,Ksp*max(x_pos)+DZp],'g:',lw=3)
+        plots.ylabel(r'$i(t)$'); plots.xlabel(r'$u(t)$')
+        plots.title('Positive current errors - Joint '+JOINT_NAME)
+        plots.show()
     
     if(Ks<0.0):
         print "ERROR: estimated Ks is negative! Setting it to 1"
         Ks = 1.0;
     
     # plot dead zone effect ********************************************
-    plt.figure()
-    plt.plot(Ks*current, label='current')
-    plt.plot(ctrl/IN_OUT_GAIN, label='control')
-    plt.legend()
+    plots.figure()
+    plots.plot(Ks*current, label='current')
+    plots.plot(ctrl/IN_OUT_GAIN, label='control')
+    plots.legend()
     
-    plt.figure()
+    plots.figure()
     y = Ks*current[maskConstAng]
     x = ctrl[maskConstAng]/IN_OUT_GAIN - Ks*current[maskConstAng]
-    plt.ylabel(r'$i(t)$')
-    plt.xlabel(r'$ctrl(t)-i(t)$')
-    plt.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot(x[maskPosErr],y[maskPosErr],'rx',lw=3,markersize=1, label='pos err'); 
-    plt.plot(x[maskNegErr],y[maskNegErr],'bx',lw=3,markersize=1, label='neg err'); 
-    plt.legend()
+    plots.ylabel(r'$i(t)$')
+    plots.xlabel(r'$ctrl(t)-i(t)$')
+    plots.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot(x[maskPosErr],y[maskPosErr],'rx',lw=3,markersize=1, label='pos err'); 
+    plots.plot(x[maskNegErr],y[maskNegErr],'bx',lw=3,markersize=1, label='neg err'); 
+    plots.legend()
     
-    plt.figure()
+    plots.figure()
     y = ctrl[maskConstAng]/IN_OUT_GAIN
     x = ctrl[maskConstAng]/IN_OUT_GAIN - Ks*current[maskConstAng]
-    plt.ylabel(r'$ctrl(t)$')
-    plt.xlabel(r'$ctrl(t)-i(t)$')    
-    plt.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot(x[maskPosErr],y[maskPosErr],'rx',lw=3,markersize=1, label='pos err'); 
-    plt.plot(x[maskNegErr],y[maskNegErr],'bx',lw=3,markersize=1, label='neg err'); 
-    plt.legend()
+    plots.ylabel(r'$ctrl(t)$')
+    plots.xlabel(r'$ctrl(t)-i(t)$')    
+    plots.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot(x[maskPosErr],y[maskPosErr],'rx',lw=3,markersize=1, label='pos err'); 
+    plots.plot(x[maskNegErr],y[maskNegErr],'bx',lw=3,markersize=1, label='neg err'); 
+    plots.legend()
     
-    plt.figure()
+    plots.figure()
     y = ctrl/IN_OUT_GAIN
     x = Ks*current
-    plt.ylabel(r'$ctrl(t)$')
-    plt.xlabel(r'$i(t)$')    
-    plt.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot([-3,3],[-3,3]);  
+    plots.ylabel(r'$ctrl(t)$')
+    plots.xlabel(r'$i(t)$')    
+    plots.plot(x,y,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot([-3,3],[-3,3]);  
     
-    plt.show()
+    plots.show()
 #    y = a. x   +  b
 #    i = Kt.tau + Kf
     
@@ -117,18 +121,18 @@ def identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZER
     Kfn=-b
     
     # Plot *************************************************************
-    plt.figure()    
-    plt.axhline(0, color='black',lw=1)
-    plt.axvline(0, color='black',lw=1)
-    plt.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot(x[maskConstPosAng],y[maskConstPosAng],'rx',lw=3,markersize=1); 
-    plt.plot(x[maskConstNegAng],y[maskConstNegAng],'bx',lw=3,markersize=1); 
+    plots.figure()    
+    plots.axhline(0, color='black',lw=1)
+    plots.axvline(0, color='black',lw=1)
+    plots.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot(x[maskConstPosAng],y[maskConstPosAng],'rx',lw=3,markersize=1); 
+    plots.plot(x[maskConstNegAng],y[maskConstNegAng],'bx',lw=3,markersize=1); 
     #plot identified lin model
-    plt.plot([min(x),max(x)],[Ktp*min(x)+Kfp ,Ktp*max(x)+Kfp],'g:',lw=3)
-    plt.plot([min(x),max(x)],[Ktn*min(x)-Kfn ,Ktn*max(x)-Kfn],'g:',lw=3)
-    plt.ylabel(r'$i(t)$')
-    plt.xlabel(r'$\tau(t)$')
-    plt.title('Static experiment - Joint '+JOINT_NAME)
+    plots.plot([min(x),max(x)],[Ktp*min(x)+Kfp ,Ktp*max(x)+Kfp],'g:',lw=3)
+    plots.plot([min(x),max(x)],[Ktn*min(x)-Kfn ,Ktn*max(x)-Kfn],'g:',lw=3)
+    plots.ylabel(r'$i(t)$')
+    plots.xlabel(r'$\tau(t)$')
+    plots.title('Static experiment - Joint '+JOINT_NAME)
 
     print "cur_sens_gain[%d] = %f" % (JOINT_ID, Ks);
     print 'deadzone[%d]      = %f' % (JOINT_ID, DZ);    
@@ -140,4 +144,6 @@ def identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZER
     print 'Kt_m[%d]          = %f' % (JOINT_ID,(Ktp+Ktn)/2.0);
     print 'Kf_m[%d]          = %f' % (JOINT_ID,(Kfp+Kfn)/2.0);
     
+    if(render):
+        plots.render();
     return (Ktp, Ktn, Ks, DZ);
\ No newline at end of file
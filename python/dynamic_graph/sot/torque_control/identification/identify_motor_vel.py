@@ -5,72 +5,63 @@ Created on Tue Sep 12 18:47:50 2017
 @author: adelpret
 """
 from scipy import signal
-from scipy.cluster.vq import kmeans
 import numpy as np
-from scipy import ndimage
-import matplotlib.pyplot as plt
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
 from identification_utils import solve1stOrderLeastSquare, solveLeastSquare
+from identification_utils import find_velocity_plateaus, segment_means, segments_to_mask
 from dynamic_graph.sot.torque_control.hrp2.control_manager_conf import IN_OUT_GAIN
 
 
 def identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks, ZERO_VEL_THRESHOLD, 
-                       ZERO_ACC_THRESHOLD, Nvel, SHOW_THRESHOLD_EFFECT):
+                       ZERO_ACC_THRESHOLD, SHOW_THRESHOLD_EFFECT, plots=None):
+    ''' @param plots DeferredFigures where to record the plots (if None they are shown at the end) '''
+    render = (plots is None);
+    if(render):
+        plots = plot_utils.DeferredFigures();
     # Mask valid data***************************************************
-    # remove high acceleration
-    maskConstVel = np.logical_and( (abs (ddq)<ZERO_ACC_THRESHOLD) , (abs (dq)>ZERO_VEL_THRESHOLD))
-    # erode to get only steady phases where velocity is constant 
-    maskConstVel=ndimage.morphology.binary_erosion(maskConstVel,None,100)
+    # find steady phases where velocity is constant (low acceleration), removing their first and last samples
+    (starts, ends) = find_velocity_plateaus(dq, ddq, ZERO_VEL_THRESHOLD, ZERO_ACC_THRESHOLD)
+    maskConstVel = segments_to_mask(len(dq), starts, ends)
     maskPosVel=(dq> ZERO_VEL_THRESHOLD)
     maskNegVel=(dq<-ZERO_VEL_THRESHOLD)
     maskConstPosVel=np.logical_and( maskConstVel ,maskPosVel )
     maskConstNegVel=np.logical_and( maskConstVel ,maskNegVel ) 
     
     if SHOW_THRESHOLD_EFFECT :
-        plt.figure()
+        plots.figure()
         time = np.arange(0, dt*ddq.shape[0], dt);
-        plt.plot(time, ddq, label='ddq'); plt.ylabel('ddq');
-        plt.plot(time[maskConstVel], ddq[maskConstVel], 'rx ', label='ddq const vel');
-        plt.legend();
+        plots.plot(time, ddq, label='ddq'); plots.ylabel('ddq');
+        plots.plot(time[maskConstVel], ddq[maskConstVel], 'rx ', label='ddq const vel');
+        plots.legend();
         
-        plt.figure()
-        plt.plot(dq); plt.ylabel('dq')
+        plots.figure()
+        plots.plot(dq); plots.ylabel('dq')
         dq_const=dq.copy()
         dq_const[np.logical_not(maskConstVel)]=np.nan
-        plt.plot(dq_const); plt.ylabel('dq_const')
-        plt.show()
+        plots.plot(dq_const); plots.ylabel('dq_const')
+        plots.show()
 
     # Identification of BEMF effect ************************************
     times = np.arange(len(dq))*dt
-    plt.subplot(221)
-    plt.plot(times,dq,lw=1)
-    vels = kmeans(dq[maskConstVel],Nvel)
-    #print 'Velocity founds are:', vels
-    couleurs = [ 'g', 'r', 'c', 'm', 'y', 'k'] * 10 #why not?
-    masksVels = []
-    av_dq = [] #List of point kept for identification of BEMF effect
-    av_delta_i = []
-    it=0;
-    for vel in vels[0]:
-        it+=1
-        currentMask = np.logical_and( dq > vel-0.1 , dq < vel+0.1  )
-        currentMask = np.logical_and( currentMask,maskConstVel  )
-        masksVels.append(currentMask)
-        plt.subplot(221)
-        plt.plot(times[currentMask],dq[currentMask],'o'+couleurs[it])
-        plt.subplot(222)
-        plt.xlabel('control')
-        plt.ylabel('current')
-        plt.plot(ctrl[currentMask] /IN_OUT_GAIN,Ks*current[currentMask],'x'+couleurs[it])
-        plt.subplot(223)
-        plt.xlabel('control - current')
-        plt.ylabel('velocity')
-        plt.plot(ctrl[currentMask] /IN_OUT_GAIN-Ks*current[currentMask],dq[currentMask],'x'+couleurs[it])
-        av_dq.append(      np.mean(dq[currentMask]                               ))
-        av_delta_i.append( np.mean(ctrl[currentMask] /IN_OUT_GAIN-Ks*current[currentMask] ))
-    plt.plot(av_delta_i,av_dq,'o')
+    plots.subplot(221)
+    plots.plot(times,dq,lw=1)
+    # every plateau gives one point for the identification of BEMF effect
+    delta_i = ctrl/IN_OUT_GAIN-Ks*current
+    av_dq      = segment_means(dq, starts, ends)
+    av_delta_i = segment_means(delta_i, starts, ends)
+    print "Number of constant velocity plateaus found:", len(starts)
+    plots.subplot(221)
+    plots.plot(times[maskConstVel],dq[maskConstVel],'og')
+    plots.subplot(222)
+    plots.xlabel('control')
+    plots.ylabel('current')
+    plots.plot(ctrl[maskConstVel] /IN_OUT_GAIN,Ks*current[maskConstVel],'xr')
+    plots.subplot(223)
+    plots.xlabel('control - current')
+    plots.ylabel('velocity')
+    plots.plot(delta_i[maskConstVel],dq[maskConstVel],'xc')
+    plots.plot(av_delta_i,av_dq,'o')
     
-    av_dq      = np.array(av_dq)
-    av_delta_i = np.array(av_delta_i)
     av_dq_pos = av_dq[av_dq>0]
     av_dq_neg = av_dq[av_dq<0]
     av_delta_i_pos = av_delta_i[av_dq>0]
@@ -83,10 +74,10 @@ def identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks, ZERO_VEL_T
     K_bemf = 1.0/a;
     
     x=av_delta_i
-    plt.plot([-b/a,b/a],[0. ,0.          ],'g:',lw=3)    
-    plt.plot([min(x),-b/a],[a*min(x)+b ,0.          ],'g:',lw=3)    
-    plt.plot([b/a,max(x)],[0.,a*max(x)-b],'g:',lw=3)
-    plt.show()
+    plots.plot([-b/a,b/a],[0. ,0.          ],'g:',lw=3)    
+    plots.plot([min(x),-b/a],[a*min(x)+b ,0.          ],'g:',lw=3)    
+    plots.plot([b/a,max(x)],[0.,a*max(x)-b],'g:',lw=3)
+    plots.show()
     #~ y        = a. x +  b
     #~ i-Kt.tau = Kv.dq + Kf
     #~ 
@@ -103,18 +94,18 @@ def identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks, ZERO_VEL_T
     Kfn=-b
    
     # Plot *************************************************************
-    plt.figure()    
-    plt.axhline(0, color='black',lw=1)
-    plt.axvline(0, color='black',lw=1)
-    plt.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
-    plt.plot(x[maskConstPosVel],y[maskConstPosVel],'rx',lw=3,markersize=1); 
-    plt.plot(x[maskConstNegVel],y[maskConstNegVel],'bx',lw=3,markersize=1); 
+    plots.figure()    
+    plots.axhline(0, color='black',lw=1)
+    plots.axvline(0, color='black',lw=1)
+    plots.plot(x     ,y     ,'.' ,lw=3,markersize=1,c='0.5');  
+    plots.plot(x[maskConstPosVel],y[maskConstPosVel],'rx',lw=3,markersize=1); 
+    plots.plot(x[maskConstNegVel],y[maskConstNegVel],'bx',lw=3,markersize=1); 
     #plot identified lin model
-    plt.plot([0.0,max(dq)],[ Kfp,Kvp*max(dq)+Kfp],'g-')
-    plt.plot([0.0,min(dq)],[-Kfn,Kvn*min(dq)-Kfn],'g-')
-    plt.ylabel(r'$i(t)-{K_t}{\tau(t)}$')
-    plt.xlabel(r'$\dot{q}(t)$')
-    plt.title('Fixed Kt identification')
+    plots.plot([0.0,max(dq)],[ Kfp,Kvp*max(dq)+Kfp],'g-')
+    plots.plot([0.0,min(dq)],[-Kfn,Kvn*min(dq)-Kfn],'g-')
+    plots.ylabel(r'$i(t)-{K_t}{\tau(t)}$')
+    plots.xlabel(r'$\dot{q}(t)$')
+    plots.title('Fixed Kt identification')
 
     # Identification with variable Kt ***************************************************
 #    y = Ks*current
@@ -157,7 +148,9 @@ def identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks, ZERO_VEL_T
 #    plt.plot(Ktn2*tau+Kvn2*dq-Kfn2, label='Ktn2*tau+Kvn2*dq-Kfn2');
 #    plt.legend();
 
-    plt.show()
+    plots.show()
+    if(render):
+        plots.render()
     
     return (Kvp, Kvn, Kfp, Kfn, DeadZone, K_bemf)
     
\ No newline at end of file
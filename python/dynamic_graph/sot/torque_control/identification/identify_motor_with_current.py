@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
 import numpy as np
 import sys
-#import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
+import dynamic_graph.sot.torque_control.utils.plot_utils as plot_utils
 import matplotlib as mpl
 mpl.rcParams['lines.linewidth']     = 4;
 import matplotlib.pyplot as plt
-from motor_model import Motor_model
+from motor_model import Motor_model, create_motor_model
 from dynamic_graph.sot.torque_control.hrp2.control_manager_conf import IN_OUT_GAIN
 from identify_motor_static import identify_motor_static
 from identify_motor_low_level import identify_motor_low_level
@@ -24,11 +24,11 @@ POSITIVE_VEL_THRESHOLD              = 0.001
 ZERO_ACC_THRESHOLD                  = 0.2
 ZERO_JERK_THRESHOLD                 = 3.0
 CURRENT_SATURATION                  = 9.5
-Nvel                                = 10
 SHOW_THRESHOLD_EFFECT               = True
 USING_CONTROL_AS_CURRENT_MEASURE    = False
 INVERT_CURRENT                      = False
 result_dir                          = '../../../../../results/hrp2_motor_identification/'
+plots = plot_utils.DeferredFigures()      # figures are rendered at the end of each identification step
 IDENTIFICATION_MODE ='static'
 IDENTIFICATION_MODE ='vel'
 #IDENTIFICATION_MODE ='acc'
@@ -60,13 +60,11 @@ JOINT_NAME = 'lhp';  #USING_CONTROL_AS_CURRENT_MEASURE = True  # 8
 if (IDENTIFICATION_MODE != 'test_model') :
     if(JOINT_NAME == 'rhy' ):
         INVERT_CURRENT = True
-        Nvel = 9
         data_folder_static = result_dir+'20161114_135332_rhy_static/';
         data_folder_vel    = result_dir+'20161114_143152_rhy_vel/';
         data_folder_acc    = result_dir+'20161114_142351_rhy_acc/';
     if(JOINT_NAME == 'rhr' ):
         INVERT_CURRENT = True
-        Nvel = 10
         data_folder_static = result_dir+'20161114_144232_rhr_static/';
         data_folder_vel    = result_dir+'20161114_150356_rhr_vel/';
         data_folder_acc    = result_dir+'20161114_145456_rhr_acc/';
@@ -162,16 +160,17 @@ if USING_CONTROL_AS_CURRENT_MEASURE:
 
 #IDENTIFICATION_MODE='low_level'
 if(IDENTIFICATION_MODE=='low_level'):
-    identify_motor_low_level(dq, ctrl, current);
+    identify_motor_low_level(dq, ctrl, current, plots);
+    plots.render();
     
 #Ktau,Tau0 Identification
 if(IDENTIFICATION_MODE=='static'):
     (Ktp, Ktn, Ks, DZ) = identify_motor_static(enc, dq, ctrl, current, tau, JOINT_ID, JOINT_NAME, ZERO_VEL_THRESHOLD, 
-                                               POSITIVE_VEL_THRESHOLD, SHOW_THRESHOLD_EFFECT);
+                                               POSITIVE_VEL_THRESHOLD, SHOW_THRESHOLD_EFFECT, plots);
     #save parameters for next identification level**********************
     np.savez(data_folder+'motor_param_'+JOINT_NAME+'.npz',Ktp=Ktp, Ktn=Ktn, Ks=Ks, DZ=DZ)
-    plt.savefig(data_folder+"static_"+JOINT_NAME+".jpg")
-    plt.show()
+    plots.render('file', data_folder, 'static_'+JOINT_NAME+'_', ['jpg'], clear=False)
+    plots.render()
 
 if(IDENTIFICATION_MODE=='vel' or IDENTIFICATION_MODE=='acc'):
     #load parameters from last identification level*********************
@@ -188,7 +187,7 @@ if(IDENTIFICATION_MODE=='vel'):
     Ks =(data_motor_param['Ks'].item())
     (Kvp, Kvn, Kfp, Kfn, DeadZone, K_bemf) = identify_motor_vel(dt, dq, ddq, ctrl, current, tau, Ktp, Ktn, Ks,
                                                               ZERO_VEL_THRESHOLD, ZERO_ACC_THRESHOLD, 
-                                                              Nvel, SHOW_THRESHOLD_EFFECT);
+                                                              SHOW_THRESHOLD_EFFECT, plots);
     np.savez(data_folder+'motor_param_'+JOINT_NAME+'.npz', Ktp=Ktp, Ktn=Ktn, Kvp=Kvp, Kvn=Kvn,
              Kfp=Kfp, Kfn=Kfn, DeadZone=DeadZone, K_bemf=K_bemf)
     warning = ""
@@ -206,51 +205,33 @@ if(IDENTIFICATION_MODE=='vel'):
     print 'Kf_p[%d]          = %f #Using %s' % (JOINT_ID, Kfp, data_folder_vel.split('/')[-2] + warning);
     print 'Kf_n[%d]          = %f #Using %s' % (JOINT_ID, Kfn, data_folder_vel.split('/')[-2] + warning);
 
-    plt.savefig(data_folder+"vel_"+JOINT_NAME+".jpg")
+    plots.render('file', data_folder, 'vel_'+JOINT_NAME+'_', ['jpg'], clear=False)
+    plots.render()
     
 #J Identification
 if(IDENTIFICATION_MODE=='acc'):
     Kvp=(data_motor_param['Kvp'].item())
     (Kap, Kan, Kfp, Kfn) = identify_motor_acc(dt, dq, ddq, current, tau, Ktp, Kvp, 
                                               POSITIVE_VEL_THRESHOLD, ZERO_JERK_THRESHOLD, 
-                                              SHOW_THRESHOLD_EFFECT);
+                                              SHOW_THRESHOLD_EFFECT, plots);
     print 'Ka_p[%d] = %f' % (JOINT_ID,Kap);
     print 'Ka_n[%d] = %f' % (JOINT_ID,Kan);
     print 'Kf_p[%d] = %f' % (JOINT_ID,Kfp);
     print 'Kf_n[%d] = %f' % (JOINT_ID,Kfn);
+    plots.render()
 
 #model vs measurement
 if (IDENTIFICATION_MODE=='test_model'):
     #load motor parameters
     import dynamic_graph.sot.torque_control.hrp2.motors_parameters as hrp2_motors_parameters
-    Kt_p = hrp2_motors_parameters.Kt_p
-    Kt_n = hrp2_motors_parameters.Kt_n
-    
-    Kf_p = hrp2_motors_parameters.Kf_p
-    Kf_n = hrp2_motors_parameters.Kf_n
-    
-    Kv_p = hrp2_motors_parameters.Kv_p
-    Kv_n = hrp2_motors_parameters.Kv_n
-    
-    Ka_p = hrp2_motors_parameters.Ka_p
-    Ka_n = hrp2_motors_parameters.Ka_n
-    
-    motor = Motor_model(Kt_p[JOINT_ID], Kt_n[JOINT_ID], 
-                        Kf_p[JOINT_ID], Kf_n[JOINT_ID],
-                        Kv_p[JOINT_ID], Kv_n[JOINT_ID],
-                        Ka_p[JOINT_ID], Ka_n[JOINT_ID],dqThreshold=0.01)
+    motor = create_motor_model(hrp2_motors_parameters, JOINT_ID, dqThreshold=0.01)
     
-    tau_motor=np.zeros(len(tau))
-    tau_motor_current=np.zeros(len(tau))
-    tau_motor_vel=np.zeros(len(tau))
-    tau_motor_acc=np.zeros(len(tau))
-    i_motor=np.zeros(len(current))
-    for idx in range(len(tau)):
-        tau_motor[idx]          =motor.getTorque    (current[idx], dq[idx], ddq[idx])
-        tau_motor_current[idx]  =motor.getTorque    (current[idx], 0.0,     0.0)
-        tau_motor_vel[idx]      =motor.getTorque    (0.0,          dq[idx], 0.0)
-        tau_motor_acc[idx]      =motor.getTorque    (0.0,          0.0,     ddq[idx])
-        i_motor[idx]            =motor.getCurrent   (tau[idx],     dq[idx], ddq[idx])
+    zero = np.zeros(len(tau))
+    tau_motor               =motor.getTorque    (current, dq,   ddq)
+    tau_motor_current       =motor.getTorque    (current, zero, zero)
+    tau_motor_vel           =motor.getTorque    (zero,    dq,   zero)
+    tau_motor_acc           =motor.getTorque    (zero,    zero, ddq)
+    i_motor                 =motor.getCurrent   (tau,     dq,   ddq)
 
     plt.figure()
     alpha = 0.7
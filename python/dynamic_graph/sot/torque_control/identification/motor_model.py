@@ -4,69 +4,69 @@
 ## i = Kt*tau + Kv*dq + Ka*ddq + sign(dq)Kf
 ## tau = i/Kt - (Kv/Kt)*dq - (Ka/Kt)*ddq - sign(dq)(Kf/Kt)  
 from IPython import embed
+import numpy as np
+
 def smoothSign(value, threshold):
-    if(value>threshold):
-        return 1.0
-    elif(value<-threshold):
-        return -1.0
-    return pow(value/threshold,3)
+    ''' Smooth approximation of the sign function, equal to (value/threshold)^3 for
+        |value|<threshold. It works element-wise on arrays (value and threshold can be
+        arrays with broadcastable shapes) and returns a float for scalar inputs.
+    '''
+    s = np.clip(np.true_divide(value, threshold), -1.0, 1.0);
+    s = s*s*s;
+    if(np.ndim(s)==0):
+        return float(s);
+    return s;
     
 class Motor_model:
-    
+    ''' Motor model with different coefficients for positive and negative velocities.
+        The parameters can be scalars (one motor) or arrays of length NJ (one value per joint);
+        in the latter case getCurrent and getTorque accept (N, NJ) arrays and evaluate the
+        model for all joints and all samples in one call.
+    '''
     def __init__(self, Kt_p,  Kt_n, Kf_p,  Kf_n, Kv_p,  Kv_n, Ka_p,  Ka_n, dqThreshold=0.8 ):
-        self.Kt_p = Kt_p
-        self.Kt_n = Kt_n
-        
-        self.Kf_p = Kf_p
-        self.Kf_n = Kf_n
-        
-        self.Kv_p = Kv_p
-        self.Kv_n = Kv_n
+        self.Kt_p = np.asarray(Kt_p, dtype=np.float64)
+        self.Kt_n = np.asarray(Kt_n, dtype=np.float64)
         
-        self.Ka_p = Ka_p
-        self.Ka_n = Ka_n
-        self.dqThreshold = dqThreshold
+        self.Kf_p = np.asarray(Kf_p, dtype=np.float64)
+        self.Kf_n = np.asarray(Kf_n, dtype=np.float64)
         
-    def getCurrent(self, tau, dq, ddq):
-        Kt_p = self.Kt_p 
-        Kt_n = self.Kt_n
-        
-        Kf_p = self.Kf_p 
-        Kf_n = self.Kf_n
+        self.Kv_p = np.asarray(Kv_p, dtype=np.float64)
+        self.Kv_n = np.asarray(Kv_n, dtype=np.float64)
         
-        Kv_p = self.Kv_p
-        Kv_n = self.Kv_n
-        
-        Ka_p = self.Ka_p
-        Ka_n = self.Ka_n
+        self.Ka_p = np.asarray(Ka_p, dtype=np.float64)
+        self.Ka_n = np.asarray(Ka_n, dtype=np.float64)
+        self.dqThreshold = np.asarray(dqThreshold, dtype=np.float64)
         
+    def getCoefficients(self, dq):
+        ''' Smoothly set coefficients according to velocity sign
+            @return (signDq, Kt, Kv, Ka, Kf)
+        '''
         signDq = smoothSign(dq,self.dqThreshold); #in [-1;1]
-        #Smoothly set Coefficients according to velocity sign
-        Kt = 0.5* ( Kt_p * (1+signDq) + Kt_n * (1-signDq) );
-        Kv = 0.5* ( Kv_p * (1+signDq) + Kv_n * (1-signDq) );
-        Ka = 0.5* ( Ka_p * (1+signDq) + Ka_n * (1-signDq) );
-        Kf = 0.5* ( Kf_p * (1+signDq) + Kf_n * (1-signDq) );
+        Kt = 0.5* ( self.Kt_p * (1+signDq) + self.Kt_n * (1-signDq) );
+        Kv = 0.5* ( self.Kv_p * (1+signDq) + self.Kv_n * (1-signDq) );
+        Ka = 0.5* ( self.Ka_p * (1+signDq) + self.Ka_n * (1-signDq) );
+        Kf = 0.5* ( self.Kf_p * (1+signDq) + self.Kf_n * (1-signDq) );
+        return (signDq, Kt, Kv, Ka, Kf);
+        
+    def getCurrent(self, tau, dq, ddq):
+        (signDq, Kt, Kv, Ka, Kf) = self.getCoefficients(dq);
         current = Kt * tau + Kv*dq + Ka*ddq + signDq*Kf;
         return current;
         
     def getTorque(self, current, dq, ddq):
-        Kt_p = self.Kt_p 
-        Kt_n = self.Kt_n
-        
-        Kf_p = self.Kf_p 
-        Kf_n = self.Kf_n
-        
-        Kv_p = self.Kv_p
-        Kv_n = self.Kv_n
-        
-        Ka_p = self.Ka_p
-        Ka_n = self.Ka_n
-        
-        signDq = smoothSign(dq,self.dqThreshold); #in [-1;1]
-        #Smoothly set Coefficients according to velocity sign
-        Kt = 0.5* ( Kt_p * (1+signDq) + Kt_n * (1-signDq) );
-        Kv = 0.5* ( Kv_p * (1+signDq) + Kv_n * (1-signDq) );
-        Ka = 0.5* ( Ka_p * (1+signDq) + Ka_n * (1-signDq) );
-        Kf = 0.5* ( Kf_p * (1+signDq) + Kf_n * (1-signDq) );
+        (signDq, Kt, Kv, Ka, Kf) = self.getCoefficients(dq);
         torque = (current/Kt) - (Kv/Kt)*dq - (Ka/Kt)*ddq - signDq*(Kf/Kt) ; 
         return torque;
+
+def create_motor_model(motors_parameters, joint_ids=None, dqThreshold=0.8):
+    ''' Create a Motor_model from a module (or any object) defining the arrays
+        Kt_p, Kt_n, Kf_p, Kf_n, Kv_p, Kv_n, Ka_p, Ka_n (e.g. hrp2.motors_parameters).
+        @param joint_ids Indexes of the joints to model (default: all)
+    '''
+    p = motors_parameters;
+    if(joint_ids is None):
+        joint_ids = slice(None);
+    return Motor_model(np.asarray(p.Kt_p)[joint_ids], np.asarray(p.Kt_n)[joint_ids],
+                       np.asarray(p.Kf_p)[joint_ids], np.asarray(p.Kf_n)[joint_ids],
+                       np.asarray(p.Kv_p)[joint_ids], np.asarray(p.Kv_n)[joint_ids],
+                       np.asarray(p.Ka_p)[joint_ids], np.asarray(p.Ka_n)[joint_ids], dqThreshold);
@@ -13,7 +13,7 @@ from __future__ import division, print_function, absolute_import
 #   Rewrote abcd_normalize.
 #
 
-from scipy.signal.filter_design import tf2zpk, zpk2tf, normalize, freqs
+from scipy.signal.filter_design import tf2zpk, zpk2tf, normalize, freqs, findfreqs
 import numpy
 from numpy import product, zeros, array, dot, transpose, ones, \
     nan_to_num, zeros_like, linspace
@@ -21,12 +21,14 @@ import scipy.interpolate as interpolate
 import scipy.integrate as integrate
 import scipy.linalg as linalg
 import scipy
+from scipy.signal import lfilter
 #from scipy.lib.six import xrange
 from numpy import r_, eye, real, atleast_1d, atleast_2d, poly, \
      squeeze, diag, asarray
 
 __all__ = ['tf2ss', 'ss2tf', 'abcd_normalize', 'zpk2ss', 'ss2zpk', 'lti',
-           'lsim', 'lsim2', 'impulse', 'impulse2', 'step', 'step2', 'bode',
+           'lsim', 'lsim2', 'lsim_uniform', 'lsim_batch', 'discretize', 'freqresp_batch',
+           'bode_batch', 'impulse', 'impulse2', 'step', 'step2', 'bode',
            'freqresp']
 
 
@@ -607,7 +609,7 @@ def _cast_to_array_dtype(in1, in2):
     return in1
 
 
-def lsim(system, U, T, X0=None, interp=1):
+def lsim(system, U, T, X0=None, interp=1, fast=True):
     """
     Simulate output of a continuous-time linear system.
 
@@ -633,6 +635,8 @@ def lsim(system, U, T, X0=None, interp=1):
         The initial conditions on the state vector (zero by default).
     interp : {1, 0}
         Whether to use linear (1) or zero-order hold (0) interpolation.
+    fast : bool
+        If True and the time steps are uniform, simulate with `lsim_uniform`.
 
     Returns
     -------
@@ -650,6 +654,9 @@ def lsim(system, U, T, X0=None, interp=1):
         sys = lti(*system)
     U = atleast_1d(U)
     T = atleast_1d(T)
+    if fast and len(T.shape) == 1 and len(T) > 1 and _is_uniform(T):
+        yout, xout = lsim_uniform(sys, U, T[1] - T[0], X0, interp)
+        return T, yout, xout
     if len(U.shape) == 1:
         U = U.reshape((U.shape[0], 1))
     sU = U.shape
@@ -703,6 +710,188 @@ def lsim(system, U, T, X0=None, interp=1):
     return T, squeeze(yout), squeeze(xout)
 
 
+# Discretizations computed by discretize, indexed by system matrices, time step and interpolation
+_discretization_cache = {}
+_DISCRETIZATION_CACHE_SIZE = 256
+
+
+def _is_uniform(T, rtol=1e-9):
+    dT = numpy.diff(T)
+    return numpy.all(numpy.abs(dT - dT[0]) <= rtol * abs(dT[0])) and dT[0] > 0
+
+
+def discretize(A, B, dt, interp=1):
+    """Discretize the continuous-time system dx/dt = A x + B u.
+
+    The matrix exponential is computed once for every (A, B, dt, interp)
+    and kept in a cache, so simulating the same system several times (or
+    the same candidate model during a fit) does not recompute it.
+
+    Parameters
+    ----------
+    A, B : ndarray
+        State and input matrices.
+    dt : float
+        Sampling period.
+    interp : {1, 0}
+        Whether to assume linear (first-order hold, 1) or constant
+        (zero-order hold, 0) input between samples.
+
+    Returns
+    -------
+    Ad, B0, B1 : ndarray
+        Matrices of the recurrence x[k+1] = Ad x[k] + B0 u[k] + B1 u[k+1]
+        (B1 is zero for zero-order hold).
+
+    """
+    A = numpy.ascontiguousarray(A, dtype=numpy.float64)
+    B = numpy.ascontiguousarray(B, dtype=numpy.float64)
+    key = (A.shape, A.tobytes(), B.shape, B.tobytes(), float(dt), bool(interp))
+    res = _discretization_cache.get(key)
+    if res is not None:
+        return res
+    n, m = B.shape
+    # exp([[A, B, 0], [0, 0, I/dt], [0, 0, 0]] * dt) contains the exponential of A
+    # and the integrals of the response to a constant and to a ramp input
+    M = zeros((n + 2 * m, n + 2 * m))
+    M[:n, :n] = A * dt
+    M[:n, n:n + m] = B * dt
+    M[n:n + m, n + m:] = eye(m)
+    E = linalg.expm(M)
+    Ad = E[:n, :n]
+    if interp:
+        B1 = E[:n, n + m:]
+        B0 = E[:n, n:n + m] - B1
+    else:
+        B0 = E[:n, n:n + m]
+        B1 = zeros((n, m))
+    if len(_discretization_cache) >= _DISCRETIZATION_CACHE_SIZE:
+        _discretization_cache.clear()
+    res = (Ad, B0, B1)
+    _discretization_cache[key] = res
+    return res
+
+
+def _state_response(Ad, Bd, X0, U):
+    """States of x[k+1] = Ad x[k] + Bd u[k] with x[0] = X0.
+
+    Ad is brought to complex Schur form Ad = Z T Z^H (Z unitary, T upper
+    triangular), so the states z = Z^H x are computed from the last to the
+    first, each one as the output of a first-order filter (lfilter) of the
+    inputs and of the states already computed. The unitary change of
+    coordinates keeps the accuracy of the state-space recurrence, while the
+    loop over the samples runs inside lfilter."""
+    N, m = U.shape
+    n = Ad.shape[0]
+    if n == 0:
+        return zeros((N, 0))
+    T, Z = linalg.schur(Ad, output='complex')
+    ZH = Z.conj().T
+    F = dot(U, dot(ZH, Bd).T)
+    z0 = dot(ZH, X0)
+    zout = zeros((N, n), dtype=numpy.complex128)
+    for i in range(n - 1, -1, -1):
+        f = F[:-1, i] + dot(zout[:-1, i + 1:], T[i, i + 1:])
+        zout[0, i] = z0[i]
+        # z[k+1] = t z[k] + f[k]: lfilter with the state initialized to t z[0]
+        zout[1:, i] = lfilter([1.0], [1.0, -T[i, i]], f, zi=[T[i, i] * z0[i]])[0]
+    return real(dot(zout, Z.T))
+
+
+def lsim_uniform(system, U, dt, X0=None, interp=1):
+    """
+    Simulate output of a continuous-time linear system with uniformly
+    sampled input.
+
+    The system is discretized exactly (see `discretize`) and the resulting
+    recurrence is computed in the Schur coordinates of the discretized
+    state matrix with first-order linear filters (`scipy.signal.lfilter`)
+    instead of a python loop over the samples, so long inputs are simulated
+    quickly with the accuracy of the state-space recurrence.
+
+    Parameters
+    ----------
+    system : an instance of the LTI class or a tuple describing the system.
+        See `lsim`.
+    U : array_like
+        The input at each time step (one column per input).
+    dt : float
+        The sampling period of the input.
+    X0 :
+        The initial conditions on the state vector (zero by default).
+    interp : {1, 0}
+        Whether to use linear (1) or zero-order hold (0) interpolation.
+
+    Returns
+    -------
+    yout : 1D ndarray
+        System response.
+    xout : ndarray
+        Time-evolution of the state-vector.
+
+    """
+    if isinstance(system, lti):
+        sys = system
+    else:
+        sys = lti(*system)
+    U = atleast_1d(asarray(U, dtype=numpy.float64))
+    if len(U.shape) == 1:
+        U = U.reshape((U.shape[0], 1))
+    if U.shape[1] != sys.inputs:
+        raise ValueError("System does not define that many inputs.")
+    n = sys.A.shape[0]
+    if X0 is None:
+        X0 = zeros(n)
+    X0 = asarray(X0, dtype=numpy.float64).reshape(n)
+    Ad, B0, B1 = discretize(sys.A, sys.B, dt, interp)
+    # With w[k] = x[k] - B1 u[k] the recurrence becomes w[k+1] = Ad w[k] + (Ad B1 + B0) u[k]
+    xout = _state_response(Ad, dot(Ad, B1) + B0, X0 - dot(B1, U[0]), U)
+    xout += dot(U, transpose(B1))
+    yout = (squeeze(dot(U, transpose(sys.D))) +
+            squeeze(dot(xout, transpose(sys.C))))
+    return squeeze(yout), squeeze(xout)
+
+
+def lsim_batch(systems, U, dt, X0=None, interp=1):
+    """
+    Simulate the output of several single-output continuous-time linear
+    systems (e.g. the candidate models of an identification) with the same
+    uniformly sampled input.
+
+    Every system is simulated as in `lsim_uniform` (exact discretization,
+    recurrence computed with first-order linear filters in the Schur
+    coordinates of its state matrix), so there is no python loop over the
+    samples and the outputs are written in a single preallocated array.
+
+    Parameters
+    ----------
+    systems : list
+        List of instances of the LTI class or of tuples describing the systems.
+    U : array_like
+        The input at each time step (one column per input).
+    dt : float
+        The sampling period of the input.
+    X0 : list, optional
+        The initial states of the systems (zero by default).
+    interp : {1, 0}
+        Whether to use linear (1) or zero-order hold (0) interpolation.
+
+    Returns
+    -------
+    yout : 2D ndarray
+        Responses of the systems, one row per system.
+
+    """
+    U = atleast_1d(asarray(U, dtype=numpy.float64))
+    if len(U.shape) == 1:
+        U = U.reshape((U.shape[0], 1))
+    yout = zeros((len(systems), U.shape[0]))
+    for i, system in enumerate(systems):
+        x0 = None if X0 is None else X0[i]
+        yout[i] = lsim_uniform(system, U, dt, x0, interp)[0]
+    return yout
+
+
 def _default_response_times(A, n):
     """Compute a reasonable set of time samples for the response time.
 
@@ -1107,3 +1296,137 @@ def freqresp(system, w=None, n=10000):
     w, h = freqs(sys.num.ravel(), sys.den, worN=worN)
 
     return w, h
+
+
+# Powers (jw)^k of the frequency grids used by freqresp_batch, indexed by grid and maximum degree
+_grid_powers_cache = {}
+_GRID_POWERS_CACHE_SIZE = 32
+
+
+def _grid_powers(w, degree):
+    """Matrix of the powers (jw)^k, with one row per k = degree, ..., 1, 0
+    (same order as the polynomial coefficients) and one column per frequency."""
+    key = (w.tobytes(), degree)
+    P = _grid_powers_cache.get(key)
+    if P is None:
+        if len(_grid_powers_cache) >= _GRID_POWERS_CACHE_SIZE:
+            _grid_powers_cache.clear()
+        P = (1j * w)[numpy.newaxis, :] ** numpy.arange(degree, -1, -1)[:, numpy.newaxis]
+        _grid_powers_cache[key] = P
+    return P
+
+
+def _stack_polynomials(polys):
+    """Stack polynomials (highest power first) of different degrees in a 2-D
+    array, padding them with leading zeros."""
+    polys = [numpy.ravel(asarray(p, dtype=numpy.float64)) for p in polys]
+    n = max([len(p) for p in polys])
+    P = zeros((len(polys), n))
+    for i, p in enumerate(polys):
+        P[i, n - len(p):] = p
+    return P
+
+
+def freqresp_batch(systems, w=None, n=1000):
+    """Calculate the frequency responses of a set of SISO continuous-time
+    systems on the same frequencies.
+
+    The responses of all the systems are computed with one matrix product
+    (transfer functions) or one batched linear solve (state space), and the
+    powers of the frequency grid are cached, so evaluating many candidate
+    models on the same grid costs little more than evaluating one.
+
+    Parameters
+    ----------
+    systems : tuple or list
+        The systems can be given as a tuple of stacked arrays, interpreted
+        according to the number of elements:
+
+            * 2 (num, den): 2-D arrays, one polynomial per row (lists of
+              polynomials of different degrees are padded with zeros)
+            * 4 (A, B, C, D): arrays of shape (k, n, n), (k, n, 1), (k, 1, n)
+              and (k, 1, 1)
+
+        or as a list of instances of the LTI class.
+    w : array_like, optional
+        Array of frequencies (in rad/s). If not given a set including the
+        influence of the poles and zeros of all the systems is calculated.
+    n : int, optional
+        Number of frequency points to compute if `w` is not given.
+
+    Returns
+    -------
+    w : 1D ndarray
+        Frequency array [rad/s]
+    H : 2D ndarray
+        Complex magnitude values, one row per system
+
+    """
+    if isinstance(systems, tuple) and len(systems) == 4:
+        A, B, C, D = [asarray(M, dtype=numpy.float64) for M in systems]
+        k, ns = A.shape[0], A.shape[1]
+        B, C, D = B.reshape((k, ns, 1)), C.reshape((k, 1, ns)), D.reshape(k)
+        if w is None:
+            sys_list = [lti(A[i], B[i], C[i], D[i]) for i in range(A.shape[0])]
+            num = _stack_polynomials([s.num for s in sys_list])
+            den = _stack_polynomials([s.den for s in sys_list])
+            w = _default_frequencies(num, den, n)
+        w = asarray(w, dtype=numpy.float64)
+        # C (jwI - A)^-1 B + D for all systems and frequencies at once
+        jwI = 1j * w[numpy.newaxis, :, numpy.newaxis, numpy.newaxis] * eye(A.shape[1])
+        X = numpy.linalg.solve(jwI - A[:, numpy.newaxis], B[:, numpy.newaxis].astype(complex))
+        H = numpy.matmul(C[:, numpy.newaxis], X)[:, :, 0, 0] + D[:, numpy.newaxis]
+        return w, H
+
+    if isinstance(systems, tuple) and len(systems) == 2:
+        num, den = systems
+    else:
+        num, den = [], []
+        for s in systems:
+            if not isinstance(s, lti) and len(s) == 2:
+                num.append(s[0])    # avoid building an lti for transfer functions
+                den.append(s[1])
+            else:
+                s = s if isinstance(s, lti) else lti(*s)
+                num.append(s.num)
+                den.append(s.den)
+    num = _stack_polynomials(num)
+    den = _stack_polynomials(den)
+    if w is None:
+        w = _default_frequencies(num, den, n)
+    w = asarray(w, dtype=numpy.float64)
+    H = dot(num, _grid_powers(w, num.shape[1] - 1)) / dot(den, _grid_powers(w, den.shape[1] - 1))
+    return w, H
+
+
+def _default_frequencies(num, den, n):
+    """Logarithmically spaced frequencies covering the ranges chosen by
+    findfreqs for every system."""
+    lo, hi = numpy.inf, -numpy.inf
+    for i in range(num.shape[0]):
+        wi = findfreqs(numpy.trim_zeros(num[i], 'f'), numpy.trim_zeros(den[i], 'f'), 2)
+        lo, hi = min(lo, wi[0]), max(hi, wi[-1])
+    return numpy.logspace(numpy.log10(lo), numpy.log10(hi), n)
+
+
+def bode_batch(systems, w=None, n=1000):
+    """
+    Calculate Bode magnitude and phase data of a set of SISO continuous-time
+    systems on the same frequencies. See `freqresp_batch` for the parameters.
+
+    Returns
+    -------
+    w : 1D ndarray
+        Frequency array [rad/s]
+    mag : 2D ndarray
+        Magnitude array [dB], one row per system
+    phase : 2D ndarray
+        Phase array [deg], one row per system
+
+    """
+    w, y = freqresp_batch(systems, w=w, n=n)
+
+    mag = 20.0 * numpy.log10(abs(y))
+    phase = numpy.unwrap(numpy.arctan2(y.imag, y.real), axis=1) * 180.0 / numpy.pi
+
+    return w, mag, phase
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:20:45 2026
+
+Least-squares solvers for motor identification that scale to whole logs.
+The (m, n) data matrix is never used directly by the QP solver: its normal
+equations (n x n) are accumulated chunk by chunk, so that memory does not
+depend on the number of samples, and only the small accumulated problem is
+solved with qpOASES (when there are bounds).
+"""
+import numpy as np
+
+from qpoases import PyQProblemB as QProblemB # QP with simple bounds only
+from qpoases import PyOptions as Options
+from qpoases import PyPrintLevel as PrintLevel
+
+CHUNK_SIZE = 100000;    # number of samples processed at once when accumulating normal equations
+
+def accumulate_normal_equations(A, b, weights=None, chunk_size=CHUNK_SIZE):
+    ''' Compute H = A^T W A and g = A^T W b, reading A and b chunk by chunk
+        (A and b can be memory-mapped arrays).
+        @param weights Vector of weights of the samples (W=diag(weights)), None for W=I
+        @return (H, g)
+    '''
+    m = A.shape[0];
+    n = A.shape[1];
+    H = np.zeros((n,n));
+    g = np.zeros(n);
+    for i in range(0, m, chunk_size):
+        A_i = np.asarray(A[i:i+chunk_size], dtype=np.float64);
+        b_i = np.asarray(b[i:i+chunk_size], dtype=np.float64);
+        if(weights is None):
+            WA_i = A_i;
+        else:
+            WA_i = A_i * np.asarray(weights[i:i+chunk_size])[:,np.newaxis];
+        H += np.dot(A_i.T, WA_i);
+        g += np.dot(WA_i.T, b_i);
+    return (H, g);
+
+''' Solve the QP:
+    minimize    0.5*x^T*H*x - g^T*x
+    subject to  lb <= x <= ub
+'''
+def solve_normal_equations(H, g, lb=None, ub=None):
+    n = H.shape[0];
+    if(lb is None and ub is None):
+        return np.linalg.lstsq(H, g, rcond=-1)[0];
+    if(lb is None):
+        lb = np.array(n*[-1e99]);
+    if(ub is None):
+        ub = np.array(n*[1e99]);
+    maxActiveSetIter    = np.array([100+2*n]);
+    maxComputationTime  = np.array([60.0]);
+    options             = Options();
+    options.printLevel  = PrintLevel.NONE;
+    options.enableRegularisation = True;
+    qpOasesSolver       = QProblemB(n);
+    qpOasesSolver.setOptions(options);
+    imode = qpOasesSolver.init(H, -g, np.asarray(lb, dtype=np.float64), np.asarray(ub, dtype=np.float64),
+                               maxActiveSetIter, maxComputationTime);
+    if(imode!=0 and imode!=63):
+        print("ERROR Qp oases %d " % (imode));
+    x = np.zeros(n);
+    qpOasesSolver.getPrimalSolution(x);
+    return x;
+
+''' Solve the least square problem:
+    minimize   || A*x-b ||^2
+    subject to lb <= x <= ub
+    using all the samples with constant memory.
+'''
+def streaming_least_squares(A, b, lb=None, ub=None, weights=None, chunk_size=CHUNK_SIZE):
+    (H, g) = accumulate_normal_equations(A, b, weights, chunk_size);
+    return solve_normal_equations(H, g, lb, ub);
+
+def _residual_signs_changes(A, b, x_old, x_new, chunk_size):
+    changes = 0;
+    for i in range(0, A.shape[0], chunk_size):
+        A_i = np.asarray(A[i:i+chunk_size], dtype=np.float64);
+        b_i = np.asarray(b[i:i+chunk_size], dtype=np.float64);
+        changes += np.count_nonzero((np.dot(A_i, x_old)>b_i) != (np.dot(A_i, x_new)>b_i));
+    return changes;
+
+def _residual_weights(A, b, x, w_pos, w_neg, chunk_size):
+    weights = np.empty(A.shape[0]);
+    for i in range(0, A.shape[0], chunk_size):
+        r_i = np.dot(np.asarray(A[i:i+chunk_size], dtype=np.float64), x) - b[i:i+chunk_size];
+        weights[i:i+chunk_size] = np.where(r_i>0.0, w_pos, w_neg);
+    return weights;
+
+''' Solve the least square problem with asymmetric penalty:
+    minimize   sum_i  w_pos*max(r_i,0)^2 + w_neg*max(-r_i,0)^2,     with r = A*x-b
+    subject to lb <= x <= ub
+    The problem is solved iteratively: at each iteration the samples are weighted according
+    to the sign of their residual and the weighted normal equations are solved. When the signs
+    of the residuals do not change anymore the solution is optimal.
+    This is equivalent to the QP with one slack variable per sample (and per sign) used in
+    identify_motor, but it does not need to store any m x m matrix.
+'''
+def asymmetric_least_squares(A, b, w_pos, w_neg=1.0, lb=None, ub=None, max_iter=50, chunk_size=CHUNK_SIZE, verbose=False):
+    x = streaming_least_squares(A, b, lb, ub, None, chunk_size);
+    for it in range(max_iter):
+        weights = _residual_weights(A, b, x, w_pos, w_neg, chunk_size);
+        x_new = streaming_least_squares(A, b, lb, ub, weights, chunk_size);
+        changes = _residual_signs_changes(A, b, x, x_new, chunk_size);
+        if(verbose):
+            print("Asymmetric least squares iter %d: %d residuals changed sign" % (it, changes));
+        x = x_new;
+        if(changes==0):
+            break;
+    return x;
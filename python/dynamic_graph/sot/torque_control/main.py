@@ -15,33 +15,47 @@ from dynamic_graph.sot.torque_control.create_entities_utils import create_free_f
 from dynamic_graph.sot.torque_control.create_entities_utils import create_current_controller, connect_ctrl_manager
 from dynamic_graph.sot.torque_control.create_entities_utils import create_tracer, create_topic, create_admittance_ctrl
 from dynamic_graph.ros import RosPublish
-from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, go_to_position, Bunch
+from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, go_to_position, Bunch, LazyBunch
 from dynamic_graph.sot.torque_control.utils.filter_utils import create_chebi2_lp_filter_Wn_03_N_4
 
 from time import sleep
 
+HRP2_CONF_PACKAGE = 'dynamic_graph.sot.torque_control.hrp2.';
+
 def get_default_conf():
-    import dynamic_graph.sot.torque_control.hrp2.balance_ctrl_conf as balance_ctrl_conf
-    import dynamic_graph.sot.torque_control.hrp2.admittance_ctrl_conf as admittance_ctrl_conf
-    import dynamic_graph.sot.torque_control.hrp2.base_estimator_conf as base_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.control_manager_conf as control_manager_conf
-    import dynamic_graph.sot.torque_control.hrp2.current_controller_conf as current_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf as force_torque_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf as joint_torque_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains as pos_ctrl_gains
-    import dynamic_graph.sot.torque_control.hrp2.motors_parameters as motor_params
-    conf = Bunch();
-    conf.balance_ctrl              = balance_ctrl_conf;
-    conf.adm_ctrl                  = admittance_ctrl_conf;
-    conf.base_estimator            = base_estimator_conf;
-    conf.control_manager           = control_manager_conf;
-    conf.current_ctrl              = current_controller_conf;
-    conf.force_torque_estimator    = force_torque_estimator_conf;
-    conf.joint_torque_controller   = joint_torque_controller_conf;
-    conf.pos_ctrl_gains            = pos_ctrl_gains;
-    conf.motor_params              = motor_params;
+    ''' Configuration of the entities created by main_v3. The configuration modules
+        are imported only when their attribute is accessed for the first time. '''
+    conf = LazyBunch();
+    conf.register_module('balance_ctrl',            HRP2_CONF_PACKAGE+'balance_ctrl_conf');
+    conf.register_module('adm_ctrl',                HRP2_CONF_PACKAGE+'admittance_ctrl_conf');
+    conf.register_module('base_estimator',          HRP2_CONF_PACKAGE+'base_estimator_conf');
+    conf.register_module('control_manager',         HRP2_CONF_PACKAGE+'control_manager_conf');
+    conf.register_module('current_ctrl',            HRP2_CONF_PACKAGE+'current_controller_conf');
+    conf.register_module('force_torque_estimator',  HRP2_CONF_PACKAGE+'force_torque_estimator_conf');
+    conf.register_module('joint_torque_controller', HRP2_CONF_PACKAGE+'joint_torque_controller_conf');
+    conf.register_module('pos_ctrl_gains',          HRP2_CONF_PACKAGE+'joint_pos_ctrl_gains');
+    conf.register_module('motor_params',            HRP2_CONF_PACKAGE+'motors_parameters');
     return conf;
 
+def get_entities(robot, conf=None):
+    ''' Entities of main_v3 that do not depend on the rest of the graph, each one created
+        (with its configuration) only when it is accessed for the first time.
+        Usage example, for a script that only needs the joint trajectory generator:
+            ent = get_entities(robot);
+            ent.traj_gen.moveJoint('rk', 1.1, 4.0);
+    '''
+    if(conf is None):
+        conf = get_default_conf();
+    dt = robot.timeStep;
+    ent = LazyBunch();
+    ent.register('ctrl_manager',      lambda: create_ctrl_manager(conf.control_manager, conf.motor_params, dt));
+    ent.register('traj_gen',          lambda: create_trajectory_generator(robot.device, dt));
+    ent.register('com_traj_gen',      lambda: create_com_traj_gen(conf.balance_ctrl, dt));
+    ent.register('rf_force_traj_gen', lambda: create_force_traj_gen("rf_force_ref", conf.balance_ctrl.RF_FORCE_DES, dt));
+    ent.register('lf_force_traj_gen', lambda: create_force_traj_gen("lf_force_ref", conf.balance_ctrl.LF_FORCE_DES, dt));
+    ent.register('encoders',          lambda: create_encoders(robot));
+    return ent;
+
 ''' Main function to call before starting the graph. '''
 def main_v3(robot, startSoT=True, go_half_sitting=True, conf=None):
     if(conf is None):
@@ -11,29 +11,76 @@ from create_entities_utils import *
 from hrp2_motors_parameters_sim import *
 from dynamic_graph.sot.torque_control.hrp2_device_pos_ctrl import HRP2DevicePosCtrl
 import robotviewer  # start robotviewer from bash with 'robotviewer -sXML-RPC'.
-from time import sleep
+from time import sleep, time
 from plot_utils import create_empty_figure
 import plot_utils
 import matplotlib.pyplot as plt
 
 USE_ROBOT_VIEWER = False;
+REAL_TIME = True;       # if False the simulations that sleep after every step run as fast as possible
+PLOT_RESULTS = True;
 
 def randTuple(size):
     v = ();
     for i in range(0,size):
         v = v + (random.random(),);
     return v;
-    
-def simulate(device, duration, dt=0.001):
-    N = int(duration/dt);
+
+class ArrayRecorder:
+    ''' Record the values of some signals after every simulation step into preallocated arrays.
+        Usage:
+            rec = ArrayRecorder(N);
+            rec.add('q', device.robotState, 6+jid);
+            run(device, N, dt, rec);
+            plot(rec.data['q']);
+    '''
+    def __init__(self, N):
+        self.N = N;
+        self.signals = [];
+        self.data = {};
+
+    def add(self, name, signal, index=None):
+        ''' Record signal (or its element index) with the specified name '''
+        self.signals.append((name, signal, index));
+
+    def record(self, i):
+        for (name, signal, index) in self.signals:
+            if(index is None):
+                value = signal.value;
+                if(name not in self.data):    # the size of the signal is known after the first step
+                    self.data[name] = np.zeros((self.N, len(value)));
+                self.data[name][i] = value;
+            else:
+                if(name not in self.data):
+                    self.data[name] = np.zeros(self.N);
+                self.data[name][i] = signal.value[index];
+
+def run(device, N, dt=0.001, recorder=None, callback=None, real_time=None, viewer_period=30):
+    ''' Advance the device graph of N time steps.
+        @param recorder ArrayRecorder in which the signals are recorded after every step
+        @param callback Function called with the step index after every step (before recording)
+        @param real_time If True sleep dt after every step, if False run as fast as possible
+                         (default REAL_TIME)
+    '''
+    if(real_time is None):
+        real_time = REAL_TIME;
     if(USE_ROBOT_VIEWER):
         viewer=robotviewer.client('XML-RPC');
-    for i in range(1,N):
+    for i in range(N):
         device.increment (dt);
-        sleep(dt);
-        if(USE_ROBOT_VIEWER):            
+        if(callback is not None):
+            callback(i);
+        if(recorder is not None):
+            recorder.record(i);
+        if(real_time):
+            sleep(dt);
+        if(USE_ROBOT_VIEWER and i%viewer_period==0):
             viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
 
+def simulate(device, duration, dt=0.001, recorder=None, real_time=None):
+    N = int(duration/dt);
+    run(device, N-1, dt, recorder, None, real_time, 1);
+
 def create_device(kp=30*[1,]):
     # create an instance of the device
     device = HRP2DevicePosCtrl("device");
@@ -55,42 +102,25 @@ def test_vel_acc_estimator(device, estimator_ft, estimator_kin, dt=0.001, estima
     
     q        = device.state.value;
     rad2deg  = 180/3.14;
-    q_real   = rad2deg*q[j+6];
-    dq_real  = 0;
-    ddq_real = 0;
-    err_q    = 0;
-    err_dq   = 0;
-    err_ddq  = 0;
-    count    = 0;
     t        = estimator_ft.jointsTorques.time;
-    if(USE_ROBOT_VIEWER):
-        viewer=robotviewer.client('XML-RPC');
+    rec = ArrayRecorder(N);
+    rec.add('q',       device.robotState, j+6);
+    rec.add('dq',      device.jointsVelocities, j);
+    rec.add('ddq',     device.jointsAccelerations, j);
+    rec.add('q_est',   estimator_kin.x_filtered, j);
+    rec.add('dq_est',  estimator_kin.dx, j);
+    rec.add('ddq_est', estimator_kin.ddx, j);
     print "Start simulation..."
-    for i in range(1,N):
-        device.increment (dt);
-        if(USE_ROBOT_VIEWER):            
-            viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
-        estimator_ft.jointsTorques.recompute (t+i);
-        if(i%estimationDelay == 0):
-            q_real   = rad2deg*device.robotState.value[j+6];
-            dq_real  = rad2deg*device.jointsVelocities.value[j];
-            ddq_real = rad2deg*device.jointsAccelerations.value[j];
-            if(i>estimationDelay):
-                print "\nTime %.3f) q est VS real = (%.2f, %.2f), dq est VS real (%.2f, %.2f) ddq est VS real (%.2f, %.2f)" % (i*dt, \
-                    rad2deg*estimator_kin.x_filtered.value[j], q_real, \
-                    rad2deg*estimator_kin.dx.value[j], dq_real, \
-                    rad2deg*estimator_kin.ddx.value[j], ddq_real);
-                print "Torque %f" % (estimator_ft.jointsTorques.value[j]);
-                
-                if(abs(ddq_real)<1e-2):
-                    ddq_real = 1e-2;
-                if(q_real!=0.0):
-                    err_q   += abs((rad2deg*estimator_kin.x_filtered.value[j]     - q_real)/q_real);
-                if(dq_real!=0.0):
-                    err_dq  += abs((rad2deg*estimator_kin.dx.value[j]    - dq_real)/dq_real);
-                if(ddq_real!=0.0):
-                    err_ddq += abs((rad2deg*estimator_kin.ddx.value[j] - ddq_real)/ddq_real);
-                count   += 1;
+    run(device, N, dt, rec, lambda i: estimator_ft.jointsTorques.recompute(t+i+1), real_time=False);
+
+    # compare estimates and real values every estimationDelay steps (skipping the first one)
+    ind = np.arange(2*estimationDelay-1, N, estimationDelay);
+    d = dict([(k, rad2deg*v[ind]) for (k,v) in rec.data.items()]);
+    d['ddq'][np.abs(d['ddq'])<1e-2] = 1e-2;
+    err = {};
+    for k in ('q', 'dq', 'ddq'):
+        nz = d[k]!=0.0;
+        err[k] = np.sum(np.abs((d[k+'_est'][nz] - d[k][nz])/d[k][nz]))/ind.shape[0] if ind.shape[0]>0 else 0.0;
     
     print "*************************************************************************************************\n";
     print "Testing joint %d" % j;
@@ -99,9 +129,10 @@ def test_vel_acc_estimator(device, estimator_ft, estimator_kin, dt=0.001, estima
     print "Test duration: %.3f s" % (N*dt);
     print "Time step: %.3f s" % dt;
     print "Estimation delay: %.3f" % (estimationDelay*dt);
-    if(count>0):
+    if(ind.shape[0]>0):
         print "Average percentual errors:\n* position: %.2f %%\n* velocity: %.2f %%\n* acceleration: %.2f %%" % \
-            (100*err_q/count, 100*err_dq/count, 100*err_ddq/count);
+            (100*err['q'], 100*err['dq'], 100*err['ddq']);
+    return err;
 
 def test_force_estimator(device, estimator_ft, estimator_kin, dt=0.001, estimationDelay = 5):
     N               = 1000;     # test duration (in number of timesteps)
@@ -148,79 +179,58 @@ def test_force_estimator(device, estimator_ft, estimator_kin, dt=0.001, estimati
         print "Average percentual errors:";
         print (f_est/count);
 
-def test_chirp(device, traj_gen, estimator_ft):
+def test_chirp(device, traj_gen, estimator_ft, dt=0.001):
     device.after.addDownsampledSignal('estimator_ft.ftSensRightFootPrediction',1);
     print "Start linear chirp from %f to -1.0" % device.robotState.value[6+2];
     tt = 4;
     jid = 1;
     traj_gen.startLinChirp('rhr', -0.6, 0.2, 2.0, tt)
-    N = int(tt/dt);
-    qChirp = np.zeros(N+2);
-    dqChirp = np.zeros(N+2);
-    ddqChirp = np.zeros(N+2);
-    q = np.zeros(N+2);
-    dq = np.zeros(N+2);
-    if(USE_ROBOT_VIEWER):
-        viewer=robotviewer.client('XML-RPC');
-        viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
-        
-    for i in range(N+2):
-        device.increment (dt);
-        qChirp[i] = traj_gen.q.value[jid];
-        dqChirp[i] = traj_gen.dq.value[jid];
-        ddqChirp[i] = traj_gen.ddq.value[jid];
-        q[i] = device.robotState.value[6+jid];
-        dq[i] = device.jointsVelocities.value[jid];
-#            print "q(%.3f)  = %.3f,  \tqDes   = %.3f" % (device.robotState.time*dt,device.robotState.value[6+jid],traj_gen.q.value[jid]);
-#            print "dq(%.3f) = %.3f,  \tdqDes  = %.3f" % (device.robotState.time*dt,device.jointsVelocities.value[6+jid],traj_gen.dq.value[jid]);
-#            print "tauDes(%.3f)= %.3f" % (device.robotState.time*dt,inv_dyn.tauDes.value[jid]);
-#            sleep(0.1);
-        if(USE_ROBOT_VIEWER and i%30==0):
-            viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
-        if(i%100==0):
-            print ("FT sensor right foot prediction: ", estimator_ft.ftSensRightFootPrediction.value);
-#                print "q(%.3f) = %.3f, \tqDes = %.3f" % (device.robotState.time*dt,device.robotState.value[6+jid],traj_gen.q.value[jid]);
+    N = int(tt/dt)+2;
+    rec = ArrayRecorder(N);
+    rec.add('qChirp',   traj_gen.q, jid);
+    rec.add('dqChirp',  traj_gen.dq, jid);
+    rec.add('ddqChirp', traj_gen.ddq, jid);
+    rec.add('q',        device.robotState, 6+jid);
+    rec.add('dq',       device.jointsVelocities, jid);
+    rec.add('ftSensRightFootPrediction', estimator_ft.ftSensRightFootPrediction);
+    run(device, N, dt, rec, real_time=False);
+    d = rec.data;
     
-    dq_fd = np.diff(qChirp)/dt;
-    ddq_fd = np.diff(dqChirp)/dt;
-    (fig,ax) = create_empty_figure(3,1);
-    ax[0].plot(qChirp,'r');  ax[0].plot(q,'b');
-    ax[1].plot(dqChirp,'r'); ax[1].plot(dq,'b'); ax[1].plot(dq_fd,'g--');
-    ax[2].plot(ddqChirp,'r'); ax[2].plot(ddq_fd,'g--');
-    plt.show();
+    dq_fd = np.diff(d['qChirp'])/dt;
+    ddq_fd = np.diff(d['dqChirp'])/dt;
+    if(PLOT_RESULTS):
+        (fig,ax) = create_empty_figure(3,1);
+        ax[0].plot(d['qChirp'],'r');  ax[0].plot(d['q'],'b');
+        ax[1].plot(d['dqChirp'],'r'); ax[1].plot(d['dq'],'b'); ax[1].plot(dq_fd,'g--');
+        ax[2].plot(d['ddqChirp'],'r'); ax[2].plot(ddq_fd,'g--');
+        plt.show();
+    return {'q_err': np.mean(np.abs(d['qChirp']-d['q'])), 'dq_err': np.mean(np.abs(d['dqChirp']-d['dq']))};
     
 
-def test_min_jerk(device, traj_gen):
+def test_min_jerk(device, traj_gen, dt=0.001):
     print "\nGonna move joint to -1.5...";
     tt = 1.5;
     jid = 2;
     traj_gen.moveJoint('rhp', -1.5, tt);
-    N = int(tt/dt);
-    qMinJerk = np.zeros(N+2);
-    dqMinJerk = np.zeros(N+2);
-    ddqMinJerk = np.zeros(N+2);
-    q = np.zeros(N+2);
-    dq = np.zeros(N+2);
-    if(USE_ROBOT_VIEWER):
-        viewer=robotviewer.client('XML-RPC');
-    for i in range(N+2):
-        device.increment (dt);
-        qMinJerk[i] = traj_gen.q.value[jid];
-        dqMinJerk[i] = traj_gen.dq.value[jid];
-        ddqMinJerk[i] = traj_gen.ddq.value[jid];
-        q[i] = device.robotState.value[6+jid];
-        dq[i] = device.jointsVelocities.value[jid];
-        if(USE_ROBOT_VIEWER and i%30==0):
-            viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
-        if(i%100==0):
-            print "q(%.3f) = %.3f, \tqDes = %.3f" % (device.robotState.time*dt,device.robotState.value[6+jid],traj_gen.q.value[jid]);
-    dq_fd = np.diff(qMinJerk)/dt;
-    ddq_fd = np.diff(dqMinJerk)/dt;
-    (fig,ax) = create_empty_figure(3,1);
-    ax[0].plot(qMinJerk,'r');  ax[0].plot(q,'b');
-    ax[1].plot(dqMinJerk,'r'); ax[1].plot(dq,'b'); ax[1].plot(dq_fd,'g--');
-    ax[2].plot(ddqMinJerk,'r');  ax[2].plot(ddq_fd,'g--');
-    plt.show();
+    N = int(tt/dt)+2;
+    rec = ArrayRecorder(N);
+    rec.add('qMinJerk',   traj_gen.q, jid);
+    rec.add('dqMinJerk',  traj_gen.dq, jid);
+    rec.add('ddqMinJerk', traj_gen.ddq, jid);
+    rec.add('q',          device.robotState, 6+jid);
+    rec.add('dq',         device.jointsVelocities, jid);
+    run(device, N, dt, rec, real_time=False);
+    d = rec.data;
+    print "q(%.3f) = %.3f, \tqDes = %.3f" % (device.robotState.time*dt,device.robotState.value[6+jid],traj_gen.q.value[jid]);
+    dq_fd = np.diff(d['qMinJerk'])/dt;
+    ddq_fd = np.diff(d['dqMinJerk'])/dt;
+    if(PLOT_RESULTS):
+        (fig,ax) = create_empty_figure(3,1);
+        ax[0].plot(d['qMinJerk'],'r');  ax[0].plot(d['q'],'b');
+        ax[1].plot(d['dqMinJerk'],'r'); ax[1].plot(d['dq'],'b'); ax[1].plot(dq_fd,'g--');
+        ax[2].plot(d['ddqMinJerk'],'r');  ax[2].plot(ddq_fd,'g--');
+        plt.show();
+    return {'q_err': np.mean(np.abs(d['qMinJerk']-d['q'])), 'q_final_err': abs(d['q'][-1]+1.5)};
     
 def test_sinusoid(device, traj_gen):
     print "\nGonna start sinusoid to 0.2...";
@@ -262,36 +272,32 @@ def test_read_traj_file(device, traj_gen):
     simulate(device, 8.1);
     
 def test_admittance_ctrl(device, ctrl_manager, traj_gen, estimator_ft, adm_ctrl, dt=0.001):
-    if(USE_ROBOT_VIEWER):
-        viewer=robotviewer.client('XML-RPC');
     N = 10*1000;
     axis = 1;
-    fDes = np.zeros((N,6));
-    f = np.zeros((N,6));
     ctrl_manager.setCtrlMode('all', 'adm');
     traj_gen.startForceSinusoid('lf',axis, 100, 1.5); #name, axis, final force, time
     adm_ctrl.fLeftFoot.value = 6*(0,);
     adm_ctrl.fRightFoot.value = 6*(0,);
-    for i in range(N):
-        if(i==1500):
+    rec = ArrayRecorder(N);
+    rec.add('fDes',            traj_gen.fLeftFoot);
+    rec.add('f',               estimator_ft.contactWrenchLeftFoot);
+    rec.add('fLeftFootError',  adm_ctrl.fLeftFootError);
+    rec.add('fRightFootError', adm_ctrl.fRightFootError);
+    rec.add('dqDes',           adm_ctrl.dqDes);
+    def switch_force(i):
+        if(i==1499):
             traj_gen.stopForce('lf');
             traj_gen.startForceSinusoid('lf',axis, -100, 1.5); #name, axis, final force, time
-        device.increment (dt);
-        sleep(dt);
-        fDes[i,:] = traj_gen.fLeftFoot.value;
-        f[i,:] = estimator_ft.contactWrenchLeftFoot.value;        
-        if(USE_ROBOT_VIEWER and i%30==0):
-            viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
-        if(i%100==0):
-#            print "f(%.3f) = %.3f, \tfDes = %.3f" % (device.robotState.time*dt,f[i,axis],fDes[i,axis]);
-            print ("fLeftFootError", adm_ctrl.fLeftFootError.value);
-            print ("fRightFootError", adm_ctrl.fRightFootError.value);
-            print ("dqDes", adm_ctrl.dqDes.value);
-    (fig,ax) = create_empty_figure(3,1);
-    ax[0].plot(fDes[:,0],'r'); ax[0].plot(f[:,0],'b');
-    ax[1].plot(fDes[:,1],'r'); ax[1].plot(f[:,1],'b');
-    ax[2].plot(fDes[:,2],'r'); ax[2].plot(f[:,2],'b');
-    plt.show();
+    run(device, N, dt, rec, switch_force);
+    fDes = rec.data['fDes'];
+    f = rec.data['f'];
+    if(PLOT_RESULTS):
+        (fig,ax) = create_empty_figure(3,1);
+        ax[0].plot(fDes[:,0],'r'); ax[0].plot(f[:,0],'b');
+        ax[1].plot(fDes[:,1],'r'); ax[1].plot(f[:,1],'b');
+        ax[2].plot(fDes[:,2],'r'); ax[2].plot(f[:,2],'b');
+        plt.show();
+    return {'f_err': np.mean(np.abs(fDes-f), axis=0)};
     
 def test_force_jacobians(device,estimator_ft,torque_ctrl,traj_gen,ctrl_manager,inv_dyn, dt):
     if(USE_ROBOT_VIEWER):
@@ -316,7 +322,8 @@ def test_force_jacobians(device,estimator_ft,torque_ctrl,traj_gen,ctrl_manager,i
             traj_gen.stopForce('rf');
             traj_gen.startForceSinusoid('rf',axis, -FORCE_MAX, 1.5); #name, axis, final force, time
         device.increment (dt);
-        sleep(dt);
+        if(REAL_TIME):
+            sleep(dt);
         if(USE_ROBOT_VIEWER and i%100==0):
             viewer.updateElementConfig('hrp_device', list(device.state.value)+[0.0,]*10);
         inv_dyn.tauFB2.recompute(i);
@@ -333,6 +340,26 @@ def test_force_jacobians(device,estimator_ft,torque_ctrl,traj_gen,ctrl_manager,i
     ax[2].plot(tauFB1[:,5],'r'); ax[2].plot(tauFB2[:,5],'b--');
     plt.show();
 
+def run_regression_tests(device, estimator_ft, estimator_kin, traj_gen, ctrl_manager, adm_ctrl, dt=0.001, delay=0.01):
+    ''' Run the simulated tests one after the other, as fast as possible and without plots.
+        @return A dictionary with the errors measured by every test
+    '''
+    global REAL_TIME, PLOT_RESULTS;
+    (real_time, plot_results) = (REAL_TIME, PLOT_RESULTS);
+    (REAL_TIME, PLOT_RESULTS) = (False, False);
+    res = {};
+    try:
+        for (name, test) in (('vel_acc_estimator', lambda: test_vel_acc_estimator(device, estimator_ft, estimator_kin, dt, int(delay/dt))),
+                             ('min_jerk',          lambda: test_min_jerk(device, traj_gen, dt)),
+                             ('chirp',             lambda: test_chirp(device, traj_gen, estimator_ft, dt)),
+                             ('admittance_ctrl',   lambda: test_admittance_ctrl(device, ctrl_manager, traj_gen, estimator_ft, adm_ctrl, dt))):
+            start = time();
+            res[name] = test();
+            print "Test %s completed in %.1f s: %s" % (name, time()-start, res[name]);
+    finally:
+        (REAL_TIME, PLOT_RESULTS) = (real_time, plot_results);
+    return res;
+
 def main(task='', dt=0.001, delay=0.01):
     np.set_printoptions(precision=2, suppress=True);
     device          = create_device(list(1.0/k_tau));
@@ -362,6 +389,8 @@ def main(task='', dt=0.001, delay=0.01):
         test_read_traj_file(device, traj_gen);
     elif(task=='test_force_jacobians'):
         test_force_jacobians(device,estimator_ft,torque_ctrl,traj_gen,ctrl_manager,inv_dyn, dt);
+    elif(task=='regression'):
+        run_regression_tests(device, estimator_ft, filters.estimator_kin, traj_gen, ctrl_manager, adm_ctrl, dt, delay);
         
         
 #        q_des = randTuple(30);
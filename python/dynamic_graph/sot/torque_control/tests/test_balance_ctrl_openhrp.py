@@ -8,7 +8,7 @@ import numpy as np
 from dynamic_graph import plug
 from dynamic_graph.sot.core import Selec_of_vector
 from dynamic_graph.sot.torque_control.create_entities_utils import NJ
-from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, Bunch
+from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, Bunch, LazyBunch
 from dynamic_graph.ros import RosPublish
 from dynamic_graph.sot.torque_control.create_entities_utils import create_topic
 from dynamic_graph.sot.torque_control.main import main_v3
@@ -17,25 +17,16 @@ from time import sleep
 #from dynamic_graph.sot.torque_control.hrp2.sot_utils import config_sot_to_urdf, joints_sot_to_urdf
     
 def get_sim_conf():
-    import dynamic_graph.sot.torque_control.hrp2.balance_ctrl_sim_conf as balance_ctrl_conf
-    import dynamic_graph.sot.torque_control.hrp2.base_estimator_sim_conf as base_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.control_manager_sim_conf as control_manager_conf
-    import dynamic_graph.sot.torque_control.hrp2.current_controller_sim_conf as current_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf as force_torque_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf as joint_torque_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains_sim as pos_ctrl_gains
-    import dynamic_graph.sot.torque_control.hrp2.motors_parameters as motor_params
-    import dynamic_graph.sot.torque_control.hrp2.admittance_ctrl_conf as admittance_ctrl_conf
-    conf = Bunch();
-    conf.adm_ctrl                  = admittance_ctrl_conf;
-    conf.balance_ctrl              = balance_ctrl_conf;
-    conf.base_estimator            = base_estimator_conf;
-    conf.control_manager           = control_manager_conf;
-    conf.current_ctrl              = current_controller_conf;
-    conf.force_torque_estimator    = force_torque_estimator_conf;
-    conf.joint_torque_controller   = joint_torque_controller_conf;
-    conf.pos_ctrl_gains            = pos_ctrl_gains;
-    conf.motor_params              = motor_params;
+    conf = LazyBunch();
+    conf.register_module('adm_ctrl',                 'dynamic_graph.sot.torque_control.hrp2.admittance_ctrl_conf');
+    conf.register_module('balance_ctrl',             'dynamic_graph.sot.torque_control.hrp2.balance_ctrl_sim_conf');
+    conf.register_module('base_estimator',           'dynamic_graph.sot.torque_control.hrp2.base_estimator_sim_conf');
+    conf.register_module('control_manager',          'dynamic_graph.sot.torque_control.hrp2.control_manager_sim_conf');
+    conf.register_module('current_ctrl',             'dynamic_graph.sot.torque_control.hrp2.current_controller_sim_conf');
+    conf.register_module('force_torque_estimator',   'dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf');
+    conf.register_module('joint_torque_controller',  'dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf');
+    conf.register_module('pos_ctrl_gains',           'dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains_sim');
+    conf.register_module('motor_params',             'dynamic_graph.sot.torque_control.hrp2.motors_parameters');
     return conf;
     
 def test_balance_ctrl_openhrp(robot, use_real_vel=True, use_real_base_state=False, startSoT=True):
@@ -48,6 +48,22 @@ for t in range(N):
     for signalName in data:
         data[signalName][t,:] = player.signal(signalName).value;
         
+# JUMP TO A SAMPLE AND PLAY A RANGE WITHOUT STEPPING THROUGH THE PREVIOUS ONES
+# (before RESET_TIME data[t] contains the sample t+1)
+SEEK_SAMPLE = 5000;
+player.seek(SEEK_SAMPLE);
+for signalName in data:
+    assert np.allclose(player.signal(signalName).value, data[signalName][SEEK_SAMPLE-1,:]), "seek failed for "+signalName;
+
+RANGE = (2000, 2100);
+player.playRange(RANGE[0], RANGE[1]);
+for k in range(RANGE[0]+1, RANGE[1]):
+    player.playNext();
+    for signalName in data:
+        assert np.allclose(player.signal(signalName).value, data[signalName][k-1,:]), "playRange failed for "+signalName;
+player.playRange(0, -1);
+print "Seek and range play tests passed";
+
 # PLOT SOME DATA
 for signalName in data:
     size = data[signalName].shape[1];
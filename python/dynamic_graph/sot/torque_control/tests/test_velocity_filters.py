@@ -11,7 +11,7 @@ from dynamic_graph import plug
 from dynamic_graph.sot.core import Selec_of_vector
 from dynamic_graph.sot.torque_control.create_entities_utils import NJ
 from dynamic_graph.ros import RosPublish
-from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, go_to_position, Bunch
+from dynamic_graph.sot.torque_control.utils.sot_utils import start_sot, stop_sot, go_to_position, Bunch, LazyBunch
 from dynamic_graph.tracer_real_time import TracerRealTime
 from dynamic_graph.sot.torque_control.create_entities_utils import addTrace
 from dynamic_graph.sot.torque_control.position_controller import PositionController
@@ -28,40 +28,26 @@ from dynamic_graph.sot.torque_control.joint_torque_controller import JointTorque
 import os
 import sys
 def get_sim_conf():
-    import dynamic_graph.sot.torque_control.hrp2.inverse_dynamics_controller_gains as inv_dyn_gains
-    import dynamic_graph.sot.torque_control.hrp2.base_estimator_sim_conf as base_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.control_manager_sim_conf as control_manager_conf
-    import dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf as force_torque_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf as joint_torque_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains_sim as pos_ctrl_gains
-    import dynamic_graph.sot.torque_control.hrp2.motors_parameters as motor_params
-    conf = Bunch();
-    conf.inv_dyn_gains             = inv_dyn_gains;
-    conf.base_estimator            = base_estimator_conf;
-    conf.control_manager           = control_manager_conf;
-    conf.force_torque_estimator    = force_torque_estimator_conf;
-    conf.joint_torque_controller   = joint_torque_controller_conf;
-    conf.pos_ctrl_gains            = pos_ctrl_gains;
-    conf.motor_params              = motor_params;
+    conf = LazyBunch();
+    conf.register_module('inv_dyn_gains',            'dynamic_graph.sot.torque_control.hrp2.inverse_dynamics_controller_gains');
+    conf.register_module('base_estimator',           'dynamic_graph.sot.torque_control.hrp2.base_estimator_sim_conf');
+    conf.register_module('control_manager',          'dynamic_graph.sot.torque_control.hrp2.control_manager_sim_conf');
+    conf.register_module('force_torque_estimator',   'dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf');
+    conf.register_module('joint_torque_controller',  'dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf');
+    conf.register_module('pos_ctrl_gains',           'dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains_sim');
+    conf.register_module('motor_params',             'dynamic_graph.sot.torque_control.hrp2.motors_parameters');
     return conf;
 
 
 def get_default_conf():
-    import dynamic_graph.sot.torque_control.hrp2.inverse_dynamics_controller_gains as inv_dyn_gains
-    import dynamic_graph.sot.torque_control.hrp2.base_estimator_conf as base_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.control_manager_conf as control_manager_conf
-    import dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf as force_torque_estimator_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf as joint_torque_controller_conf
-    import dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains as pos_ctrl_gains
-    import dynamic_graph.sot.torque_control.hrp2.motors_parameters as motor_params
-    conf = Bunch();
-    conf.inv_dyn_gains             = inv_dyn_gains;
-    conf.base_estimator            = base_estimator_conf;
-    conf.control_manager           = control_manager_conf;
-    conf.force_torque_estimator    = force_torque_estimator_conf;
-    conf.joint_torque_controller   = joint_torque_controller_conf;
-    conf.pos_ctrl_gains            = pos_ctrl_gains;
-    conf.motor_params              = motor_params;
+    conf = LazyBunch();
+    conf.register_module('inv_dyn_gains',            'dynamic_graph.sot.torque_control.hrp2.inverse_dynamics_controller_gains');
+    conf.register_module('base_estimator',           'dynamic_graph.sot.torque_control.hrp2.base_estimator_conf');
+    conf.register_module('control_manager',          'dynamic_graph.sot.torque_control.hrp2.control_manager_conf');
+    conf.register_module('force_torque_estimator',   'dynamic_graph.sot.torque_control.hrp2.force_torque_estimator_conf');
+    conf.register_module('joint_torque_controller',  'dynamic_graph.sot.torque_control.hrp2.joint_torque_controller_conf');
+    conf.register_module('pos_ctrl_gains',           'dynamic_graph.sot.torque_control.hrp2.joint_pos_ctrl_gains');
+    conf.register_module('motor_params',             'dynamic_graph.sot.torque_control.hrp2.motors_parameters');
     return conf;
 
 def create_base_encoders(robot):
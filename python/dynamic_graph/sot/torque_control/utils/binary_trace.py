@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:26:48 2026
+
+Binary format for the signals captured on the robot, one file per signal (.dgb).
+The file starts with a header (magic, version, flags, signal dimension, dt and signal
+name) padded to a multiple of 64 bytes, followed by fixed-width little-endian records
+of 1+dim float64: the time index (as in the tracer text files) and the signal value.
+Uncompressed files are memory-mapped by the reader. Compressed files contain a sequence
+of blocks, each one made of a small header (number of records, number of bytes) and of
+the records compressed with zlib, after grouping the bytes of the same rank of all the
+values (byte shuffle), which makes float data much more compressible.
+
+The records can be written from the arrays drained from a SignalRecorder (see
+BinaryCapture) or converted from the text files of TracerRealTime (see
+convert_tracer_folder_to_binary). In both cases the signals are named as the tracer
+files, i.e. <entity>-<signal> (e.g. HRP2LAAS-robotState), so that a folder of .dgb files
+can be opened with tracer_log_store.open_tracer_log and used like a folder of tracer files.
+
+Usage example:
+    capture = create_binary_capture(robot.device, [(robot.device, 'robotState'), (robot.device, 'currents')],
+                                    '/tmp/exp/', dt=0.001, buffer_size=5000, compress=True);
+    while(running):
+        sleep(1.0);
+        capture.flush();
+    capture.close();
+    log = open_tracer_log('/tmp/exp/');
+"""
+import os
+import struct
+import zlib
+import numpy as np
+from dynamic_graph.sot.torque_control.utils.tracer_log_store import TracerLogStore, read_tracer_file
+
+MAGIC = b'DGBT';
+FORMAT_VERSION = 1;
+BINARY_SUFFIX = '.dgb';
+HEADER_ALIGNMENT = 64;
+FLAG_COMPRESSED = 1;
+FLAG_SHUFFLED = 2;
+DEFAULT_BLOCK_SIZE = 4096;      # records per compressed block
+COMPRESSION_LEVEL = 1;          # fast zlib compression
+
+_HEADER_STRUCT = struct.Struct('<4sHHIdH');
+_BLOCK_STRUCT = struct.Struct('<II');
+_VALUE_BYTES = 8;
+
+def trace_name(entity, signal_name):
+    ''' Name given by TracerRealTime to the file of a signal (without prefix and suffix) '''
+    return '{0}-{1}'.format(entity.name, signal_name);
+
+def _header_size(name_bytes):
+    n = _HEADER_STRUCT.size + len(name_bytes);
+    return HEADER_ALIGNMENT*((n + HEADER_ALIGNMENT - 1) // HEADER_ALIGNMENT);
+
+def _shuffle(block):
+    ''' Group the i-th bytes of all the values of the block '''
+    return np.ascontiguousarray(block, dtype='<f8').view(np.uint8).reshape(-1, _VALUE_BYTES).T.tobytes();
+
+def _unshuffle(data, n_rows, n_cols):
+    b = np.frombuffer(data, dtype=np.uint8).reshape(_VALUE_BYTES, -1);
+    return np.ascontiguousarray(b.T).view('<f8').reshape(n_rows, n_cols);
+
+def read_header(f):
+    ''' Read the header of a binary trace from the open file f
+        @return Dictionary with name, dim, dt, flags and header_size
+    '''
+    fixed = f.read(_HEADER_STRUCT.size);
+    if(len(fixed)<_HEADER_STRUCT.size):
+        raise IOError("File too short to be a binary trace");
+    (magic, version, flags, dim, dt, name_len) = _HEADER_STRUCT.unpack(fixed);
+    if(magic!=MAGIC):
+        raise IOError("Not a binary trace file (wrong magic number)");
+    if(version!=FORMAT_VERSION):
+        raise IOError("Unsupported binary trace version "+str(version));
+    name_bytes = f.read(name_len);
+    return {'name': name_bytes.decode('utf-8'), 'dim': dim, 'dt': dt, 'flags': flags,
+            'header_size': _header_size(name_bytes)};
+
+
+class BinaryTraceWriter:
+    ''' Write the samples of a signal in a binary trace file '''
+    def __init__(self, filename, name, dim, dt, compress=False, block_size=DEFAULT_BLOCK_SIZE):
+        self.filename = filename;
+        self.dim = dim;
+        self.compress = compress;
+        self.block_size = block_size;
+        self._pending = [];         # records not written yet (compressed files only)
+        self._n_pending = 0;
+        self.n_samples = 0;
+        name_bytes = name.encode('utf-8');
+        flags = (FLAG_COMPRESSED | FLAG_SHUFFLED) if compress else 0;
+        header = _HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, flags, dim, dt, len(name_bytes)) + name_bytes;
+        self._file = open(filename, 'wb');
+        self._file.write(header + b'\0'*(_header_size(name_bytes)-len(header)));
+
+    def write(self, data):
+        ''' Append the samples data, array (N, 1+dim) with the time index in the first column '''
+        data = np.asarray(data, dtype='<f8').reshape((-1, 1+self.dim));
+        self.n_samples += data.shape[0];
+        if(not self.compress):
+            self._file.write(np.ascontiguousarray(data).tobytes());
+            return;
+        self._pending.append(data);
+        self._n_pending += data.shape[0];
+        if(self._n_pending>=self.block_size):
+            pending = np.vstack(self._pending);
+            n_full = self.block_size*(pending.shape[0] // self.block_size);
+            for i in range(0, n_full, self.block_size):
+                self._write_block(pending[i:i+self.block_size]);
+            self._pending = [pending[n_full:]];
+            self._n_pending = pending.shape[0]-n_full;
+
+    def _write_block(self, block):
+        data = zlib.compress(_shuffle(block), COMPRESSION_LEVEL);
+        self._file.write(_BLOCK_STRUCT.pack(block.shape[0], len(data)));
+        self._file.write(data);
+
+    def flush(self):
+        ''' Write the pending records (as a possibly incomplete block) and flush the file '''
+        if(self._n_pending>0):
+            self._write_block(np.vstack(self._pending));
+            self._pending = [];
+            self._n_pending = 0;
+        self._file.flush();
+
+    def close(self):
+        self.flush();
+        self._file.close();
+
+
+class BinaryTrace:
+    ''' Read-only access to a binary trace file. The records of uncompressed files are
+        memory-mapped, those of compressed files are decompressed on demand (block by block
+        in read, all of them the first time raw is called).
+    '''
+    def __init__(self, filename):
+        self.filename = filename;
+        with open(filename, 'rb') as f:
+            h = read_header(f);
+        self.name = h['name'];
+        self.dim = h['dim'];
+        self.dt = h['dt'];
+        self.compressed = (h['flags'] & FLAG_COMPRESSED)!=0;
+        self._header_size = h['header_size'];
+        self._raw = None;
+        record_bytes = (1+self.dim)*_VALUE_BYTES;
+        if(self.compressed):
+            self._blocks = self._scan_blocks();
+            self.n_samples = sum([b[1] for b in self._blocks]);
+        else:
+            # an incomplete last record (interrupted capture) is ignored
+            self.n_samples = (os.path.getsize(filename)-self._header_size) // record_bytes;
+
+    def _scan_blocks(self):
+        ''' List of the blocks of a compressed file: (offset of the data, number of records, number of bytes) '''
+        blocks = [];
+        size = os.path.getsize(self.filename);
+        with open(self.filename, 'rb') as f:
+            offset = self._header_size;
+            while(offset+_BLOCK_STRUCT.size<=size):
+                f.seek(offset);
+                (n_rows, n_bytes) = _BLOCK_STRUCT.unpack(f.read(_BLOCK_STRUCT.size));
+                offset += _BLOCK_STRUCT.size;
+                if(offset+n_bytes>size):
+                    break;  # incomplete last block
+                blocks.append((offset, n_rows, n_bytes));
+                offset += n_bytes;
+        return blocks;
+
+    def _read_blocks(self, blocks):
+        res = [np.zeros((0, 1+self.dim))];
+        with open(self.filename, 'rb') as f:
+            for (offset, n_rows, n_bytes) in blocks:
+                f.seek(offset);
+                res.append(_unshuffle(zlib.decompress(f.read(n_bytes)), n_rows, 1+self.dim));
+        return np.vstack(res);
+
+    def __len__(self):
+        return self.n_samples;
+
+    def raw(self):
+        ''' All the records as a (N, 1+dim) array, whose first column is the time index '''
+        if(self._raw is None):
+            if(self.compressed):
+                self._raw = self._read_blocks(self._blocks);
+            elif(self.n_samples==0):
+                self._raw = np.zeros((0, 1+self.dim));
+            else:
+                self._raw = np.memmap(self.filename, dtype='<f8', mode='r', offset=self._header_size,
+                                      shape=(self.n_samples, 1+self.dim));
+        return self._raw;
+
+    def read(self, start=0, stop=None):
+        ''' Records with index in [start, stop), decompressing only the blocks containing them '''
+        if(stop is None or stop>self.n_samples):
+            stop = self.n_samples;
+        if(self._raw is not None or not self.compressed):
+            return self.raw()[start:stop];
+        first = np.cumsum([0]+[b[1] for b in self._blocks]);
+        i0 = max(np.searchsorted(first, start, 'right')-1, 0);
+        i1 = np.searchsorted(first, stop, 'left');
+        data = self._read_blocks(self._blocks[i0:i1]);
+        return data[start-first[i0]:stop-first[i0]];
+
+
+def convert_tracer_file(src, dst, name, dt, compress=False):
+    ''' Convert a text file written by TracerRealTime into a binary trace '''
+    data = read_tracer_file(src);
+    writer = BinaryTraceWriter(dst, name, max(data.shape[1]-1, 0), dt, compress);
+    writer.write(data);
+    writer.close();
+    return writer.n_samples;
+
+def convert_tracer_folder_to_binary(data_folder, out_folder, dt, compress=False, prefix='dg_', suffix='.dat', verbose=True):
+    ''' Convert all the tracer files of data_folder into binary traces in out_folder '''
+    if(not os.path.isdir(out_folder)):
+        os.makedirs(out_folder);
+    for filename in sorted(os.listdir(data_folder)):
+        if(not (filename.startswith(prefix) and filename.endswith(suffix))):
+            continue;
+        name = filename[len(prefix):len(filename)-len(suffix)];
+        if(verbose):
+            print("Converting tracer file "+filename);
+        convert_tracer_file(os.path.join(data_folder, filename), os.path.join(out_folder, name+BINARY_SUFFIX),
+                            name, dt, compress);
+
+def is_binary_trace_folder(folder):
+    return os.path.isdir(folder) and any([f.endswith(BINARY_SUFFIX) for f in os.listdir(folder)]);
+
+
+class BinaryTraceLog(TracerLogStore):
+    ''' Same interface as TracerLogStore for a folder of binary traces '''
+    def __init__(self, folder):
+        self.folder = folder;
+        self.traces = {};
+        for filename in sorted(os.listdir(folder)):
+            if(filename.endswith(BINARY_SUFFIX)):
+                trace = BinaryTrace(os.path.join(folder, filename));
+                self.traces[trace.name] = trace;
+
+    def signals(self):
+        return sorted(self.traces.keys());
+
+    def has(self, name):
+        return name in self.traces;
+
+    def n_samples(self, name):
+        return self.traces[name].n_samples;
+
+    def size(self, name):
+        return self.traces[name].dim;
+
+    def dt(self, name):
+        return self.traces[name].dt;
+
+    def source(self, name):
+        return self.traces[name].filename;
+
+    def raw(self, name):
+        return self.traces[name].raw();
+
+
+class BinaryCapture:
+    ''' Write the samples recorded by a SignalRecorder entity in binary traces (one per signal) '''
+    def __init__(self, recorder, signals, folder, dt, compress=False):
+        ''' @param signals List of tuples (entity, signal_name) recorded by recorder, whose input
+                           signals must be named as the tracer files (see trace_name and
+                           create_binary_capture)
+        '''
+        if(not os.path.isdir(folder)):
+            os.makedirs(folder);
+        self.recorder = recorder;
+        self.writers = dict([(trace_name(entity, sig_name), None) for (entity, sig_name) in signals]);   # created at the first samples
+        self.folder = folder;
+        self.dt = dt;
+        self.compress = compress;
+
+    def flush(self):
+        ''' Drain the recorder and append the samples to the files
+            @return The number of samples written for each signal
+        '''
+        res = {};
+        for name in self.writers.keys():
+            data = np.array(self.recorder.getData(name));
+            if(data.ndim!=2 or data.shape[0]==0):
+                res[name] = 0;
+                continue;
+            if(self.writers[name] is None):
+                self.writers[name] = BinaryTraceWriter(os.path.join(self.folder, name+BINARY_SUFFIX), name,
+                                                       data.shape[1]-1, self.dt, self.compress);
+            self.writers[name].write(data);
+            res[name] = data.shape[0];
+        return res;
+
+    def close(self):
+        self.flush();
+        for w in self.writers.values():
+            if(w is not None):
+                w.close();
+
+def create_binary_capture(device, signals, folder, dt, buffer_size, compress=False, name='binary_capture'):
+    ''' Create a SignalRecorder recording the specified signals at every iteration of the device
+        and the BinaryCapture writing them in folder.
+        @param signals List of tuples (entity, signal_name)
+        @param buffer_size Number of samples stored by the recorder between two calls to flush
+    '''
+    from dynamic_graph.sot.torque_control.utils.sot_utils import create_signal_recorder
+    rec_signals = [(entity.signal(sig_name), len(entity.signal(sig_name).value), trace_name(entity, sig_name))
+                   for (entity, sig_name) in signals];
+    recorder = create_signal_recorder(device, rec_signals, buffer_size, name);
+    return BinaryCapture(recorder, signals, folder, dt, compress);
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:40 2026
+
+Simulation of the current control loop of the HRP-2 motor drivers (proportional
+control with a dead zone) for many motors and many parameter sets at once.
+This is the vectorized version of the simulator in tests/test_current_ctrl.py:
+the current is integrated exactly (piecewise exponential) and the integration is
+interrupted at the instants when the current error enters or exits the dead zone,
+independently for each simulated motor.
+All the parameters can be scalars or arrays (broadcast together), so that sweeping
+the parameters of the dead-zone compensation over thousands of configurations
+only takes one simulation.
+
+Usage example:
+    motor = MotorArray(R=3.3, L=2e-3, Kb=0.19, Kt=0.19, J=1000.0, b=0.5);
+    ctrl = Hrp2CurrentControlArray(motor, K=300, i_dz=np.linspace(0.1, 1.0, 1000));
+    (u, i, i_mes, dq) = simulate_dead_zone_compensation(ctrl, i_des, dt, i_stdev=0.02, i_trans=0.06);
+"""
+import numpy as np
+
+EPS = 1e-6;
+
+def integrate_1_order_lde_batch(x_0, a, b, t, x_lb, x_ub):
+    ''' Integrate x' + ax = b (element-wise) until either:
+         - you reach the specified time t
+         - you reach the specified lower/upper bound (use -inf/inf for no bound)
+        @return (t_stop, x, hit) where hit tells whether the integration stopped on a bound
+    '''
+    c = b/a;
+    e = np.exp(-a*t);
+    x_t = c*(1-e) + x_0*e;  # if a>0 => x tends towards c
+    below = x_t < x_lb;
+    above = x_t > x_ub;
+    t_stop = np.array(t*np.ones_like(x_t));
+    x = np.array(x_t);
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if(np.any(below)):
+            t_stop[below] = (-np.log((x_lb-c)/(x_0-c)) / a)[below];
+            x[below] = x_lb[below];
+        if(np.any(above)):
+            t_stop[above] = (-np.log((x_ub-c)/(x_0-c)) / a)[above];
+            x[above] = x_ub[above];
+    # initial state outside the bounds: stop immediately on the bound
+    out_lb = x_0 < x_lb;
+    out_ub = x_0 > x_ub;
+    t_stop[out_lb | out_ub] = 0.0;
+    x[out_lb] = x_lb[out_lb];
+    x[out_ub] = x_ub[out_ub];
+    return (t_stop, x, below | above | out_lb | out_ub);
+
+class MotorArray:
+    ''' Set of DC motors with electrical dynamics L*di/dt = V - R*i - Kb*dq
+        and mechanical dynamics J*ddq = Kt*i - b*dq. '''
+    def __init__(self, R, L, Kb, Kt, J, b):
+        self.R = R;
+        self.L = L;
+        self.Kb = Kb;
+        self.Kt = Kt;
+        self.J = J;
+        self.b = b;
+        self.resize(np.broadcast(R, L, Kb, Kt, J, b, np.empty(1)).shape[0]);
+
+    def resize(self, size):
+        ''' Set the number of motors, broadcasting the parameters, and reset their state '''
+        (self.R, self.L, self.Kb, self.Kt, self.J, self.b) = [np.array(np.broadcast_to(np.asarray(x, dtype=np.float64), (size,)))
+                                                             for x in (self.R, self.L, self.Kb, self.Kt, self.J, self.b)];
+        self.i = np.zeros(size);
+        self.dq = np.zeros(size);
+
+    @property
+    def size(self):
+        return self.i.shape[0];
+
+class Hrp2CurrentControlArray:
+    ''' Proportional current control with dead zone of a MotorArray:
+            V = K*(e-i_dz) if e>i_dz,   K*(e+i_dz) if e<-i_dz,   0 otherwise
+        where e=u-i is the current error.
+    '''
+    def __init__(self, motor, K, i_dz):
+        shape = np.broadcast(K, i_dz, motor.i).shape;
+        if(shape!=motor.i.shape):
+            motor.resize(shape[0]);
+        self.motor = motor;
+        self.K = np.array(np.broadcast_to(np.asarray(K, dtype=np.float64), shape));         # current-control feedback gain
+        self.i_dz = np.array(np.broadcast_to(np.asarray(i_dz, dtype=np.float64), shape));   # dead-zone threshold
+        self.t = 0.0;
+        self.errors = 0;    # number of integrations that stopped without changing dead-zone state
+
+    @property
+    def size(self):
+        return self.motor.size;
+
+    @staticmethod
+    def get_deadzone_state(e, i_dz):
+        return np.where(e>i_dz, 1, np.where(e<-i_dz, -1, 0));
+
+    def simulate(self, u, t, max_iter=10):
+        ''' Simulate the current loop of all the motors for the time t with the (constant)
+            desired currents u. The integration of each motor is split at the changes of its
+            dead-zone state.
+            @return The number of motors that did not reach the final time in max_iter iterations
+        '''
+        m = self.motor;
+        u = np.broadcast_to(np.asarray(u, dtype=np.float64), m.i.shape);
+        time_left = np.full(m.i.shape, float(t));
+        active = np.arange(m.size);
+        for n in range(max_iter):
+            if(active.shape[0]==0):
+                break;
+            i_0 = m.i[active];
+            dq = m.dq[active];
+            u_a = u[active];
+            K = self.K[active];
+            i_dz = self.i_dz[active];
+            dz_state = self.get_deadzone_state(u_a-i_0, i_dz);
+            pos = (dz_state==1);
+            neg = (dz_state==-1);
+            A = np.where(dz_state!=0, K, 0.0);
+            d = np.where(pos, K*(u_a-i_dz), np.where(neg, K*(u_a+i_dz), 0.0));
+            lb = np.where(pos, -np.inf, np.where(neg, u_a+i_dz-EPS, u_a-i_dz-EPS));
+            ub = np.where(pos, u_a-i_dz+EPS, np.where(neg, np.inf, u_a+i_dz+EPS));
+
+            a = (m.R[active]+A)/m.L[active];
+            b = (d - m.Kb[active]*dq)/m.L[active];
+            (dt, i, hit) = integrate_1_order_lde_batch(i_0, a, b, time_left[active], lb, ub);
+            ddq = (m.Kt[active]*i - m.b[active]*dq)/m.J[active];
+            m.i[active] = i;
+            m.dq[active] = dq + ddq*dt;
+            time_left[active] -= dt;
+
+            new_dz_state = self.get_deadzone_state(u_a-i, i_dz);
+            stuck = hit & (new_dz_state==dz_state);
+            self.errors += np.count_nonzero(stuck);
+            active = active[hit & np.logical_not(stuck)];
+        self.t += t;
+        return active.shape[0];
+
+def simulate_dead_zone_compensation(ctrl, i_des, dt, i_off=0.0, i_stdev=0.0, i_trans=0.0, dz_comp_perc=1.0,
+                                    ki=0.0, i_noise=None, seed=None):
+    ''' Simulate the tracking of the desired currents i_des with the dead-zone compensation
+        used in tests/test_current_ctrl.py, for all the motors of ctrl.
+        Compensation parameters (i_off, i_stdev, i_trans, dz_comp_perc, ki) can be scalars
+        or arrays with one value per motor.
+        @param i_des Desired currents, array (N,) or (N, ctrl.size)
+        @param i_noise Noise of the current sensor (N, ctrl.size), if None it is drawn from a
+                       normal distribution with std dev i_stdev, saturated at 3*i_stdev
+        @return (u, i, i_mes, dq), arrays (N, ctrl.size) of commanded, real and measured currents
+                and motor velocities
+    '''
+    M = ctrl.size;
+    i_des = np.asarray(i_des, dtype=np.float64);
+    N = i_des.shape[0];
+    i_des = np.broadcast_to(i_des.reshape((N, -1)), (N, M));
+    if(i_noise is None):
+        i_stdev = np.broadcast_to(np.asarray(i_stdev, dtype=np.float64), (M,));
+        rng = np.random.RandomState(seed);
+        i_noise = np.clip(rng.normal(size=(N, M))*i_stdev, -3*i_stdev, 3*i_stdev);
+    dz_comp = dz_comp_perc*ctrl.i_dz;
+
+    u = np.zeros((N, M));
+    i = np.zeros((N, M));
+    i_mes = np.zeros((N, M));
+    dq = np.zeros((N, M));
+    err_int = np.zeros(M);
+    for n in range(N):
+        i[n,:] = ctrl.motor.i;
+        dq[n,:] = ctrl.motor.dq;
+        i_mes[n,:] = i[n,:] + i_off + i_noise[n,:];
+        # compute control law
+        err_int += ki*(i_des[n,:]-i_mes[n,:]);
+        u_n = i_des[n,:] + err_int;
+        e = u_n - i_mes[n,:];
+        u[n,:] = np.where(e > i_trans, u_n + dz_comp,
+                 np.where(e < -i_trans, u_n - dz_comp,
+                 np.where(u_n > 0, u_n + dz_comp + e - i_trans,
+                                   u_n - dz_comp + e + i_trans)));
+        ctrl.simulate(u[n,:], dt);
+    return (u, i, i_mes, dq);
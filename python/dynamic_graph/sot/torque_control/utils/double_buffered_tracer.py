@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:05:32 2026
+
+Gapless recording of experiments made of several segments with two TracerRealTime.
+The two tracers trace the same signals: while one records the current segment the other
+one dumps the previous segment to disk in a background thread, so switching segment
+does not stop the recording (the tracer of the new segment is started before the old
+one is stopped, so consecutive segments can share a sample, with the same time index).
+Every segment is written in its own folder, with the usual tracer file names, so that
+each one can be loaded with tracer_log_store.open_tracer_log.
+
+Usage example:
+    tracer = DoubleBufferedTracer(robot.device, [(robot.device, 'robotState'), (robot.device, 'currents')],
+                                  '/tmp/identification/', segment_duration=60.0, dt=robot.timeStep);
+    tracer.start('rhy');
+    identify_rhy_dynamic(robot.traj_gen);
+    tracer.next_segment('rhr');
+    identify_rhr_dynamic(robot.traj_gen);
+    tracer.stop();
+"""
+import os
+from threading import Thread
+
+TRACER_PREFIX = 'dg_';
+TRACER_SUFFIX = '.dat';
+BYTES_PER_VALUE = 20;           # upper bound of the length of a value written as text by the tracer
+BUFFER_SIZE_MARGIN = 1.2;
+
+def get_tracer_buffer_size(signal_size, duration, dt, margin=BUFFER_SIZE_MARGIN):
+    ''' Size of the buffer (in bytes) that a TracerRealTime needs to store the specified duration
+        of a signal with signal_size elements (the time index is added to every line) '''
+    return int(margin*(duration/dt)*(signal_size+1)*BYTES_PER_VALUE);
+
+class DoubleBufferedTracer:
+    ''' Two TracerRealTime recording the same signals in turns, see the module documentation '''
+    def __init__(self, device, signals, folder, segment_duration, dt, name='db_tracer', buffer_size=None):
+        ''' @param signals List of tuples (entity, signal_name) to trace
+            @param segment_duration Maximum duration of a segment [s], used to size the buffers
+            @param buffer_size Size of the buffer of each signal [bytes], by default it is computed
+                               from the size of the largest signal and segment_duration
+        '''
+        from dynamic_graph.tracer_real_time import TracerRealTime
+        if(buffer_size is None):
+            max_size = max([len(entity.signal(sig_name).value) for (entity, sig_name) in signals]);
+            buffer_size = get_tracer_buffer_size(max_size, segment_duration, dt);
+        self.folder = folder;
+        self.tracers = [TracerRealTime(name+'_a'), TracerRealTime(name+'_b')];
+        for tracer in self.tracers:
+            tracer.setBufferSize(buffer_size);
+            for (entity, sig_name) in signals:
+                tracer.add('{0}.{1}'.format(entity.name, sig_name), '{0}-{1}'.format(entity.name, sig_name));
+            device.after.addSignal('{0}.triger'.format(tracer.name));
+        self.active = 0;
+        self.segment = 0;
+        self.recording = False;
+        self.flush_threads = [None, None];
+
+    def _segment_folder(self, segment_name):
+        if(segment_name is None):
+            segment_name = 'segment_%03d' % self.segment;
+        folder = os.path.join(self.folder, segment_name)+os.sep;
+        if(not os.path.exists(folder)):
+            os.makedirs(folder);
+        return folder;
+
+    def _open_and_start(self, i, segment_name):
+        self.wait_flush(i);
+        self.tracers[i].open(self._segment_folder(segment_name), TRACER_PREFIX, TRACER_SUFFIX);
+        self.tracers[i].start();
+        self.segment += 1;
+
+    def _flush(self, i):
+        tracer = self.tracers[i];
+        tracer.dump();
+        tracer.close();
+
+    def _stop_and_flush(self, i):
+        self.tracers[i].stop();
+        self.flush_threads[i] = Thread(target=self._flush, args=(i,));
+        self.flush_threads[i].start();
+
+    def start(self, segment_name=None):
+        ''' Start recording the first segment in the folder segment_name (default segment_000) '''
+        if(self.recording):
+            print "Tracer is already recording, call next_segment to start a new segment";
+            return;
+        self._open_and_start(self.active, segment_name);
+        self.recording = True;
+
+    def next_segment(self, segment_name=None):
+        ''' Start recording a new segment with the idle tracer, then stop the current one and dump
+            it in the background. If the idle tracer is still dumping its previous segment
+            (i.e. the segments are shorter than the time to write them) this waits for it. '''
+        if(not self.recording):
+            return self.start(segment_name);
+        previous = self.active;
+        self.active = 1-self.active;
+        self._open_and_start(self.active, segment_name);
+        self._stop_and_flush(previous);
+
+    def stop(self, wait=True):
+        ''' Stop recording and dump the last segment, waiting for all the files to be written if wait '''
+        if(self.recording):
+            self._stop_and_flush(self.active);
+            self.recording = False;
+        if(wait):
+            self.wait_flush();
+
+    def wait_flush(self, i=None):
+        ''' Wait until the tracer i (both if None) has written its segment to disk '''
+        for j in ([0, 1] if i is None else [i]):
+            if(self.flush_threads[j] is not None):
+                self.flush_threads[j].join();
+                self.flush_threads[j] = None;
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:03:17 2026
+
+Vectorized versions of the simulators in tests/test_elastic_contact.py (body mass on
+an elastic contact, moved by a force-controlled actuator) and tests/test_elastic_LIPM.py
+(linear inverted pendulum standing on two elastic feet). Every parameter can be a scalar
+or an array with one value per robot, and all the robots are integrated at once, so
+that studies of contact stiffness or control gains cover a whole grid of parameters
+with a single simulation (see parameter_grid).
+
+Integration methods:
+    'taylor'        x += dt*dx + 0.5*dt^2*ddx; dx += dt*ddx (the scheme of the test scripts),
+                    unstable for lightly damped stiff contacts: simulate raises a ValueError
+                    if dt is outside its stability region
+    'semi_implicit' dx += dt*ddx; x += dt*dx (stable for stiffer contacts than 'taylor',
+                    default of the LIPM simulator)
+    'expm'          exact integration of the linear dynamics with the matrix exponential,
+                    taking a single step per call of simulate (elastic contact only)
+"""
+import numpy as np
+from math import pi
+from scipy.linalg import expm
+
+METHODS = ('taylor', 'semi_implicit', 'expm');
+STABILITY_TOLERANCE = 1e-9;     # tolerance on the spectral radius of the step matrix of 'taylor'
+
+def parameter_grid(**params):
+    ''' Cartesian product of the specified parameter values.
+        @return A dictionary mapping each parameter name to a flat array, with one
+                element per combination of the values
+        Example: parameter_grid(K2=np.logspace(4,6,50), kp=[5., 10., 20.]) -> 150 configurations
+    '''
+    keys = sorted(params.keys());
+    grids = np.meshgrid(*[np.atleast_1d(params[k]) for k in keys], indexing='ij');
+    return dict([(k, g.ravel()) for (k, g) in zip(keys, grids)]);
+
+def _broadcast(values):
+    ''' Broadcast the specified scalars/arrays to a common 1d shape, returning float copies '''
+    shape = np.broadcast(*(list(values)+[np.empty(1)])).shape;
+    return [np.array(np.broadcast_to(np.asarray(v, dtype=np.float64), shape)) for v in values];
+
+def taylor_spectral_radius(Kd, Bd, dt):
+    ''' Spectral radius of the step matrix of the 'taylor' scheme applied to the linear systems
+        ddq = -Kd*q - Bd*dq, where Kd and Bd are arrays (M, n, n), i.e. one system per robot
+        (the scheme diverges if it is larger than 1 and the system itself is stable).
+        @return Array of M spectral radii
+    '''
+    (M, n) = Kd.shape[:2];
+    I = np.broadcast_to(np.eye(n), Kd.shape);
+    S = np.zeros((M, 2*n, 2*n));
+    S[:,:n,:n] = I - 0.5*dt*dt*Kd;
+    S[:,:n,n:] = dt*I - 0.5*dt*dt*Bd;
+    S[:,n:,:n] = -dt*Kd;
+    S[:,n:,n:] = I - dt*Bd;
+    return np.max(np.abs(np.linalg.eigvals(S)), axis=1);
+
+def _check_taylor_stability(Kd, Bd, dt, name):
+    rho = taylor_spectral_radius(Kd, Bd, dt);
+    unstable = np.nonzero(rho>1.0+STABILITY_TOLERANCE)[0];
+    if(unstable.shape[0]>0):
+        raise ValueError("The 'taylor' integration of the %s diverges with dt=%g for %d robots (e.g. robot %d, "
+                         "spectral radius %.8f): use method 'semi_implicit' or a smaller dt" %
+                         (name, dt, unstable.shape[0], unstable[0], rho[unstable[0]]));
+
+def _integrate(x, dx, ddx, dt, method):
+    if(method=='taylor'):
+        x += dt*dx + 0.5*dt*dt*ddx;
+        dx += dt*ddx;
+    else:
+        dx += dt*ddx;
+        x += dt*dx;
+
+class ElasticContactRobotArray:
+    ''' Set of two-mass systems:
+            m1*(ddx1-g) = f1
+            m2*(ddx2-g) = f2 - f1
+            f2 = -K2*x2 - B2*dx2
+            f1 = f1d + noise - B1*(dx1-dx2) - C1*sign(dx1-dx2)
+    '''
+    def __init__(self, m1, m2, B1, C1, K2, B2, g, f1_stdev, x1=0, dx1=0, x2=0, dx2=0, seed=None):
+        (self.m1, self.m2, self.B1, self.C1, self.K2, self.B2, self.g, self.f1_stdev,
+         self.x1, self.dx1, self.x2, self.dx2) = _broadcast((m1, m2, B1, C1, K2, B2, g, f1_stdev, x1, dx1, x2, dx2));
+        self.rng = np.random.RandomState(seed);
+        self._expm_cache = {};
+        self._stable_dt = set();     # time steps for which the stability of 'taylor' has been checked
+        self.f1 = np.zeros(self.size);
+        self.f2 = -self.K2*self.x2 - self.B2*self.dx2;
+        self.ddx1 = np.zeros(self.size);
+        self.ddx2 = np.zeros(self.size);
+
+    @property
+    def size(self):
+        return self.x1.shape[0];
+
+    def _accelerations(self, f1):
+        self.f2 = -self.K2*self.x2 - self.B2*self.dx2;
+        dx12 = self.dx1-self.dx2;
+        self.f1 = f1 - self.B1*dx12 - self.C1*np.sign(dx12);
+        self.ddx1 = self.g + self.f1/self.m1;
+        self.ddx2 = self.g + (-self.f1 + self.f2)/self.m2;
+
+    def _step_matrices(self, T):
+        ''' For each robot the matrix P such that [s(T); int_0^T s] = P*[s(0); 1; u], where
+            s=(x1, dx1, x2, dx2) and u is the constant part of f1 over the step. '''
+        P = self._expm_cache.get(T);
+        if(P is not None):
+            return P;
+        P = np.zeros((self.size, 8, 6));
+        for i in range(self.size):
+            (m1, m2, B1, K2, B2) = (self.m1[i], self.m2[i], self.B1[i], self.K2[i], self.B2[i]);
+            M = np.zeros((10,10));
+            M[0,1] = 1.0;
+            M[1,1] = -B1/m1;            M[1,3] = B1/m1;
+            M[2,3] = 1.0;
+            M[3,1] = B1/m2;             M[3,2] = -K2/m2;        M[3,3] = -(B1+B2)/m2;
+            M[1,4] = self.g[i];         M[1,5] = 1.0/m1;
+            M[3,4] = self.g[i];         M[3,5] = -1.0/m2;
+            M[6:,:4] = np.eye(4);       # integral of the state
+            E = expm(M*T);
+            P[i,:4,:] = E[:4,:6];
+            P[i,4:,:] = E[6:,:6];
+        self._expm_cache[T] = P;
+        return P;
+
+    def simulate(self, f1, T, dt=0.0001, method='taylor'):
+        ''' Simulate all the robots for the time T with constant desired actuator forces f1.
+            After the call f1 and f2 contain the mean forces over T.
+            With method 'expm' the Coulomb friction is kept constant during the step.
+        '''
+        if(method not in METHODS):
+            raise ValueError("Unknown integration method "+str(method)+", expected one of "+str(METHODS));
+        f1 = np.asarray(f1, dtype=np.float64) + self.rng.normal(size=self.size)*self.f1_stdev;
+        if(method=='expm'):
+            u = f1 - self.C1*np.sign(self.dx1-self.dx2);
+            z = np.vstack((self.x1, self.dx1, self.x2, self.dx2, np.ones(self.size), u)).T;
+            s = np.einsum('mij,mj->mi', self._step_matrices(T), z);
+            (self.x1, self.dx1, self.x2, self.dx2) = [np.array(s[:,k]) for k in range(4)];
+            mean_dx1, mean_x2, mean_dx2 = s[:,5]/T, s[:,6]/T, s[:,7]/T;
+            self._accelerations(f1);
+            self.f1 = u - self.B1*(mean_dx1-mean_dx2);
+            self.f2 = -self.K2*mean_x2 - self.B2*mean_dx2;
+            return;
+        if(method=='taylor'):
+            self.check_taylor_stability(dt);
+        N = int(round(T/dt));
+        assert(N>0)
+        f1_sum = np.zeros(self.size);
+        f2_sum = np.zeros(self.size);
+        for i in range(N):
+            self._accelerations(f1);
+            f1_sum += self.f1;
+            f2_sum += self.f2;
+            _integrate(self.x1, self.dx1, self.ddx1, dt, method);
+            _integrate(self.x2, self.dx2, self.ddx2, dt, method);
+        self.f1 = f1_sum/N;
+        self.f2 = f2_sum/N;
+
+    def check_taylor_stability(self, dt):
+        ''' Raise a ValueError if the 'taylor' scheme diverges with the step dt (neglecting the
+            Coulomb friction, the two-mass system is stable) '''
+        if(dt in self._stable_dt):
+            return;
+        Kd = np.zeros((self.size, 2, 2));
+        Bd = np.zeros((self.size, 2, 2));
+        Kd[:,1,1] = self.K2/self.m2;
+        Bd[:,0,0] = self.B1/self.m1;            Bd[:,0,1] = -self.B1/self.m1;
+        Bd[:,1,0] = -self.B1/self.m2;           Bd[:,1,1] = (self.B1+self.B2)/self.m2;
+        _check_taylor_stability(Kd, Bd, dt, 'elastic contact');
+        self._stable_dt.add(dt);
+
+def simulate_force_tracking(robot, T, dt, f=0.5, A=0.05, kp=10.0, kd=None, kf=0.0, ki=5.0, B1_ctrl=None,
+                            sim_dt=0.0001, method='taylor'):
+    ''' Track the sinusoidal trajectory x1_ref = A*sin(2*pi*f*t) with the force control loop
+        of tests/test_elastic_contact.py (gains can be arrays with one value per robot).
+        @param kd Derivative gain (default 2*sqrt(kp))
+        @param B1_ctrl Viscous friction compensated by the controller (default 0.9*robot.B1)
+        @return Dictionary of (N, robot.size) arrays: x1, dx1, x2, dx2, x1_ref, dx1_ref, f1, f1_ref, f1_est, f2
+    '''
+    if(kd is None):
+        kd = 2.0*np.sqrt(kp);
+    if(B1_ctrl is None):
+        B1_ctrl = 0.9*robot.B1;
+    N = int(T/dt);
+    M = robot.size;
+    res = dict([(k, np.zeros((N, M))) for k in ('x1', 'dx1', 'x2', 'dx2', 'f1', 'f1_ref', 'f1_est', 'f2')]);
+    t = np.arange(N)*dt;
+    two_pi_f = 2*pi*f;
+    x1_ref   = A*np.sin(two_pi_f*t);
+    dx1_ref  = two_pi_f*A*np.cos(two_pi_f*t);
+    ddx1_ref = -two_pi_f*two_pi_f*A*np.sin(two_pi_f*t);
+    res['x1_ref'] = np.tile(x1_ref[:,np.newaxis], (1, M));
+    res['dx1_ref'] = np.tile(dx1_ref[:,np.newaxis], (1, M));
+    f1_err_int = np.zeros(M);
+    f2_prev = -robot.K2*robot.x2 - robot.B2*robot.dx2;
+    for n in range(N):
+        res['x1'][n,:] = robot.x1;
+        res['x2'][n,:] = robot.x2;
+        res['dx1'][n,:] = robot.dx1;
+        res['dx2'][n,:] = robot.dx2;
+        ddx1_des = ddx1_ref[n] + kd*(dx1_ref[n]-robot.dx1) + kp*(x1_ref[n]-robot.x1);
+
+        # compute actuator force
+        f1_ref = robot.m1*(ddx1_des-robot.g);
+        f1_est = f2_prev + robot.m2*robot.g;
+        f1_err = f1_ref - f1_est;
+        f1_err_int += ki*dt*f1_err;
+        f1_des = f1_ref + kf*f1_err + f1_err_int + B1_ctrl*(robot.dx1-robot.dx2);
+
+        robot.simulate(f1_des, dt, sim_dt, method);
+        res['f1_ref'][n,:] = f1_ref;
+        res['f1_est'][n,:] = f1_est;
+        res['f1'][n,:] = robot.f1;
+        res['f2'][n,:] = robot.f2;
+        f2_prev = robot.f2;
+    return res;
+
+class LipmRobotArray:
+    ''' Set of linear inverted pendulums standing on two feet with elastic contacts:
+            ddx1 = omega^2*(x1-CoP),    CoP = (fL*xL + fR*xR)/(fL+fR)
+            mL*(ddzL-g) = fL - f1,      fL = -K*zL - B*dzL
+            mR*(ddzR-g) = fR - f2,      fR = -K*zR - B*dzR
+        where x1 is the horizontal position of the center of mass, zL/zR are the vertical
+        positions of the feet (placed at xL/xR) and f1/f2 are the (upward) forces applied
+        by the legs on the body.
+    '''
+    def __init__(self, omega, m1, mL, mR, K, B, g, f_stdev, xL, xR, x1=0, dx1=0, zL=0, dzL=0, zR=0, dzR=0, seed=None):
+        (self.omega, self.m1, self.mL, self.mR, self.K, self.B, self.g, self.f_stdev, self.xL, self.xR,
+         self.x1, self.dx1, self.zL, self.dzL, self.zR, self.dzR) = _broadcast((omega, m1, mL, mR, K, B, g, f_stdev,
+                                                                               xL, xR, x1, dx1, zL, dzL, zR, dzR));
+        self.rng = np.random.RandomState(seed);
+        self._stable_dt = set();     # time steps for which the stability of 'taylor' has been checked
+        self._accelerations(np.zeros(self.size), np.zeros(self.size));
+
+    @property
+    def size(self):
+        return self.x1.shape[0];
+
+    def _accelerations(self, f1, f2):
+        self.fL = -self.K*self.zL - self.B*self.dzL;
+        self.fR = -self.K*self.zR - self.B*self.dzR;
+        fz = self.fL + self.fR;
+        self.cop = np.where(fz>0.0, (self.fL*self.xL + self.fR*self.xR)/np.where(fz>0.0, fz, 1.0), 0.5*(self.xL+self.xR));
+        self.ddx1 = self.omega*self.omega*(self.x1 - self.cop);
+        self.ddzL = self.g + (self.fL - f1)/self.mL;
+        self.ddzR = self.g + (self.fR - f2)/self.mR;
+
+    def check_taylor_stability(self, dt):
+        ''' Raise a ValueError if the 'taylor' scheme diverges on the elastic contacts of the
+            feet with the step dt '''
+        if(dt in self._stable_dt):
+            return;
+        for m in (self.mL, self.mR):
+            _check_taylor_stability((self.K/m)[:,np.newaxis,np.newaxis], (self.B/m)[:,np.newaxis,np.newaxis],
+                                    dt, 'foot contacts');
+        self._stable_dt.add(dt);
+
+    def simulate(self, f1, f2, T, dt=0.0001, method='semi_implicit'):
+        ''' Simulate all the robots for the time T with constant leg forces f1, f2.
+            After the call fL and fR contain the mean contact forces over T.
+            The CoP makes the dynamics nonlinear, so method 'expm' is not available.
+        '''
+        if(method not in METHODS[:2]):
+            raise ValueError("Unknown integration method "+str(method)+", expected one of "+str(METHODS[:2]));
+        if(method=='taylor'):
+            self.check_taylor_stability(dt);
+        f1 = np.asarray(f1, dtype=np.float64) + self.rng.normal(size=self.size)*self.f_stdev;
+        f2 = np.asarray(f2, dtype=np.float64) + self.rng.normal(size=self.size)*self.f_stdev;
+        N = int(round(T/dt));
+        assert(N>0)
+        fL_sum = np.zeros(self.size);
+        fR_sum = np.zeros(self.size);
+        for i in range(N):
+            self._accelerations(f1, f2);
+            fL_sum += self.fL;
+            fR_sum += self.fR;
+            _integrate(self.x1, self.dx1, self.ddx1, dt, method);
+            _integrate(self.zL, self.dzL, self.ddzL, dt, method);
+            _integrate(self.zR, self.dzR, self.ddzR, dt, method);
+        self.fL = fL_sum/N;
+        self.fR = fR_sum/N;
+
+def simulate_lipm_balance(robot, T, dt, f=0.5, A=0.05, kp=10.0, kd=None, sim_dt=0.0001, method='semi_implicit'):
+    ''' Track the sinusoidal CoM trajectory x1_ref = A*sin(2*pi*f*t) by distributing the body
+        weight between the two feet so as to obtain the reference CoP of the LIPM
+        (the control scheme of tests/test_elastic_LIPM.py).
+        @return Dictionary of (N, robot.size) arrays: x1, dx1, x1_ref, dx1_ref, cop, cop_ref, fL, fR
+    '''
+    if(kd is None):
+        kd = 2.0*np.sqrt(kp);
+    N = int(T/dt);
+    M = robot.size;
+    res = dict([(k, np.zeros((N, M))) for k in ('x1', 'dx1', 'cop', 'cop_ref', 'fL', 'fR')]);
+    t = np.arange(N)*dt;
+    two_pi_f = 2*pi*f;
+    x1_ref   = A*np.sin(two_pi_f*t);
+    dx1_ref  = two_pi_f*A*np.cos(two_pi_f*t);
+    ddx1_ref = -two_pi_f*two_pi_f*A*np.sin(two_pi_f*t);
+    res['x1_ref'] = np.tile(x1_ref[:,np.newaxis], (1, M));
+    res['dx1_ref'] = np.tile(dx1_ref[:,np.newaxis], (1, M));
+    weight = -(robot.m1+robot.mL+robot.mR)*robot.g;
+    for n in range(N):
+        res['x1'][n,:] = robot.x1;
+        res['dx1'][n,:] = robot.dx1;
+        res['cop'][n,:] = robot.cop;
+        ddx1_des = ddx1_ref[n] + kd*(dx1_ref[n]-robot.dx1) + kp*(x1_ref[n]-robot.x1);
+        cop_ref = np.clip(robot.x1 - ddx1_des/(robot.omega*robot.omega), robot.xL, robot.xR);
+        f2 = weight*(cop_ref-robot.xL)/(robot.xR-robot.xL);
+        f1 = weight - f2;
+        robot.simulate(f1, f2, dt, sim_dt, method);
+        res['cop_ref'][n,:] = cop_ref;
+        res['fL'][n,:] = robot.fL;
+        res['fR'][n,:] = robot.fR;
+    return res;
+
+def tracking_errors(res):
+    ''' Mean absolute position and velocity tracking errors of every robot '''
+    return (np.mean(np.abs(res['x1_ref']-res['x1']), axis=0), np.mean(np.abs(res['dx1_ref']-res['dx1']), axis=0));
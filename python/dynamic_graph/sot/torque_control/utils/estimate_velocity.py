@@ -6,9 +6,13 @@ Created on Mon Mar 23 13:47:33 2015
 """
 import numpy as np
 from numpy.linalg import lstsq
+from scipy.signal import lfilter
 import matplotlib.pyplot as plt
 from math import floor
 
+UNIFORM_SAMPLING_RTOL = 1e-6;   # relative tolerance used to detect a constant sampling time
+RUNNING_SUM_BLOCK = 2048;       # number of windows sharing the same time reference in the running sums
+
 def estimate(t, x):
     ws = x.shape[0];
     A = np.zeros((ws,2));
@@ -17,34 +21,84 @@ def estimate(t, x):
     (v, residual, rank, sv) = lstsq(A, x);
     return v;
 
+def linear_fit_slope_kernel(L, dt):
+    ''' Coefficients k such that k.dot(x) is the slope of the least-squares line fitting
+        L samples of x taken with constant sampling time dt (Savitzky-Golay derivative
+        filter of order 1).
+    '''
+    m = np.arange(L) - 0.5*(L-1);
+    return m / (dt*np.sum(m*m));
+
+def windowed_slope(time, x, start, end, block=RUNNING_SUM_BLOCK):
+    ''' Slope of the least-squares line fitting x[start[i]:end[i]] versus time[start[i]:end[i]]
+        for every i, computed with running sums over the windows. start and end must be
+        nondecreasing. The sums are restarted every block windows with a new time reference,
+        to avoid losing precision on long signals.
+    '''
+    n_w = len(start);
+    dx = np.zeros((n_w, x.shape[1]));
+    for b in range(0, n_w, block):
+        s = start[b:b+block];
+        e = end[b:b+block];
+        lo = s[0];
+        t  = time[lo:e[-1]] - time[lo];
+        xb = x[lo:e[-1],:];
+        c_t   = np.concatenate(([0.0], np.cumsum(t)));
+        c_tt  = np.concatenate(([0.0], np.cumsum(t*t)));
+        c_x   = np.vstack((np.zeros((1,x.shape[1])), np.cumsum(xb, 0)));
+        c_tx  = np.vstack((np.zeros((1,x.shape[1])), np.cumsum(t[:,np.newaxis]*xb, 0)));
+        s = s-lo;
+        e = e-lo;
+        n    = (e-s).astype(np.float64);
+        S_t  = c_t[e]  - c_t[s];
+        S_tt = c_tt[e] - c_tt[s];
+        S_x  = c_x[e]  - c_x[s];
+        S_tx = c_tx[e] - c_tx[s];
+        den = n*S_tt - S_t*S_t;
+        valid = den>0.0;   # windows with less than 2 distinct time stamps have zero slope
+        dx[b:b+block][valid] = ((n[:,np.newaxis]*S_tx - S_t[:,np.newaxis]*S_x)[valid] /
+                                den[valid,np.newaxis]);
+    return dx;
+
 def estimateVelocity(time, x, ws=61, doPlot=False):
+    ''' Estimate the derivative of every column of x by fitting a line on a window of ws
+        samples around each sample (the window is shrunk at the beginning and at the end).
+        If the sampling time is constant the fit is computed as a convolution with a
+        precomputed kernel, otherwise with running sums. All the columns are processed
+        at once.
+    '''
+    time = np.asarray(time, dtype=np.float64);
+    x = np.asarray(x, dtype=np.float64);
+    squeeze = (x.ndim==1);
+    if(squeeze):
+        x = x.reshape(x.shape[0], 1);
     n = x.shape[0];
     ws2 = int(floor(0.5*(ws-1))); # half-window length
-    dx = np.zeros(x.shape);
-    
-    for i in range(ws2):
-        x_w = x[:i+ws2,:];
-        t_w = time[:i+ws2];
-        v = estimate(t_w, x_w);
-        dx[i,:] = v[0,:];
-        
-    for i in range(ws2, n-ws2):
-        x_w = x[i-ws2:i+ws2,:];
-        t_w = time[i-ws2:i+ws2];
-        v = estimate(t_w, x_w);
-        dx[i,:] = v[0,:];
-        
-    for i in range(n-ws2,n):
-        x_w = x[i-ws2:,:];
-        t_w = time[i-ws2:];
-        v = estimate(t_w, x_w);
-        dx[i,:] = v[0,:];
-        
+    i = np.arange(n);
+    start = np.maximum(i-ws2, 0);
+    end   = np.minimum(i+ws2, n);
+
+    dt = np.diff(time);
+    uniform = (n>2*ws2 and ws2>0 and np.allclose(dt, dt[0], rtol=UNIFORM_SAMPLING_RTOL, atol=0.0));
+    if(uniform):
+        dx = np.zeros(x.shape);
+        # inner samples: window x[i-ws2:i+ws2], i.e. a FIR filter whose output at i+ws2-1 is dx[i]
+        k = linear_fit_slope_kernel(2*ws2, (time[-1]-time[0])/(n-1));
+        y = lfilter(k[::-1], [1.0], x, axis=0);
+        dx[ws2:n-ws2,:] = y[2*ws2-1:n-1,:];
+        # first and last ws2 samples have shorter windows
+        dx[:ws2,:]  = windowed_slope(time, x, start[:ws2], end[:ws2]);
+        dx[n-ws2:,:] = windowed_slope(time, x, start[n-ws2:], end[n-ws2:]);
+    else:
+        dx = windowed_slope(time, x, start, end);
+
     if(doPlot):
         for j in range(x.shape[1]):
             fig = plt.figure();
             ax = fig.add_subplot(211); ax.plot(x[:,j]);   ax.set_title('pos');
             ax = fig.add_subplot(212); ax.plot(dx[:,j]);  ax.set_title('vel');
         plt.show();
-    
-    return dx;
\ No newline at end of file
+
+    if(squeeze):
+        return dx[:,0];
+    return dx;
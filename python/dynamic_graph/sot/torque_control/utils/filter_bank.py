@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:31:55 2026
+
+Offline evaluation of the IIR filters used by the FilterDifferentiator entity.
+causal_filter reproduces CausalFilter (same initialization with the first sample and
+same finite differences for the derivatives) on a whole (N, k) signal at once, and
+evaluate_filters runs a list of candidate filters on a recorded log and measures
+for each of them the delay, the noise attenuation and the error on the derivative,
+with respect to a zero-phase (non causal) Savitzky-Golay estimate.
+frequency_responses evaluates magnitude, phase and group delay of a list of filters on
+a shared frequency grid, and rank_filters_by_delay sorts them by delay at a cutoff frequency.
+
+Usage as a script (compare the filters of tests/test_velocity_filters on the encoders):
+    python filter_bank.py data_folder --signal HRP2LAAS-robotState --first-col 6
+"""
+import numpy as np
+from scipy.signal import lfilter, lfilter_zi, tf2sos, sosfilt, sosfilt_zi, savgol_filter
+
+REF_WINDOW_LENGTH = 51;     # window of the Savitzky-Golay filter used as reference (samples)
+REF_POLY_ORDER = 3;         # polynomial order of the Savitzky-Golay filter used as reference
+METHODS = ('tf', 'sos');
+
+def dc_group_delay(b, a):
+    ''' Group delay of the filter (b, a) at zero frequency, in samples '''
+    b = np.asarray(b, dtype=np.float64);
+    a = np.asarray(a, dtype=np.float64);
+    return np.dot(np.arange(len(b)), b)/np.sum(b) - np.dot(np.arange(len(a)), a)/np.sum(a);
+
+def _stack_coefficients(c_list):
+    ''' Stack coefficient vectors of different lengths in a matrix, padding with zeros '''
+    n = max([len(c) for c in c_list]);
+    C = np.zeros((len(c_list), n));
+    for (i, c) in enumerate(c_list):
+        C[i,:len(c)] = c;
+    return C;
+
+def frequency_responses(b_list, a_list, fs, freqs=512):
+    ''' Compute the frequency response of all the filters (b_list[i], a_list[i]) on the same grid.
+        @param fs Sampling frequency [Hz]
+        @param freqs Vector of frequencies [Hz], or number of frequencies equally spaced in [0, fs/2)
+        @return (f, mag, phase, delay) where f is the vector of frequencies and mag (absolute value),
+                phase (unwrapped, rad) and delay (group delay, s) are (n_filters, n_freqs) arrays.
+                The group delay is nan at the zeros of the filters on the unit circle.
+    '''
+    if(np.isscalar(freqs)):
+        f = np.arange(int(freqs))*0.5*fs/int(freqs);
+    else:
+        f = np.asarray(freqs, dtype=np.float64);
+    B = _stack_coefficients(b_list);
+    A = _stack_coefficients(a_list);
+    z = np.exp(-2j*np.pi*f/fs);                     # z^-1 on the unit circle
+    Zb = z[np.newaxis,:]**np.arange(B.shape[1])[:,np.newaxis];
+    Za = z[np.newaxis,:]**np.arange(A.shape[1])[:,np.newaxis];
+    num  = np.dot(B, Zb);
+    den  = np.dot(A, Za);
+    dnum = np.dot(B*np.arange(B.shape[1]), Zb);     # sum_k k*b_k*z^-k
+    dden = np.dot(A*np.arange(A.shape[1]), Za);
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = num/den;
+        delay = (np.real(dnum/num) - np.real(dden/den))/fs;
+    delay[np.abs(num) < 1e-12*np.max(np.abs(num), axis=1, keepdims=True)] = np.nan;
+    return (f, np.abs(h), np.unwrap(np.angle(h), axis=1), delay);
+
+def rank_filters_by_delay(b_list, a_list, fs, f_cut):
+    ''' Sort the filters by their group delay at the frequency f_cut [Hz].
+        @return A list of tuples (index, delay [s], magnitude at f_cut), sorted by increasing delay
+    '''
+    (f, mag, phase, delay) = frequency_responses(b_list, a_list, fs, [f_cut]);
+    return sorted([(i, delay[i,0], mag[i,0]) for i in range(len(b_list))], key=lambda r: r[1]);
+
+def causal_filter(b, a, x, dt, method='tf'):
+    ''' Filter the (N, k) signal x with the filter (b, a) and compute the first two derivatives
+        of the filtered signal by finite differences, as done by CausalFilter::get_x_dx_ddx:
+        the filter starts at steady state with the first sample of x.
+        @param method 'tf' to use the direct form as CausalFilter (same numerical results),
+                      'sos' to use second-order sections (numerically more robust for high orders)
+        @return (x_filtered, dx, ddx), three (N, k) arrays
+    '''
+    if(method not in METHODS):
+        raise ValueError("Unknown filtering method "+str(method)+", expected one of "+str(METHODS));
+    b = np.asarray(b, dtype=np.float64);
+    a = np.asarray(a, dtype=np.float64);
+    if(len(a)<2):
+        raise ValueError("The filter denominator must have at least 2 coefficients");
+    x = np.asarray(x, dtype=np.float64);
+    squeeze = (x.ndim==1);
+    if(squeeze):
+        x = x.reshape(x.shape[0], 1);
+    x0 = x[0,:];
+    if(method=='tf'):
+        zi = lfilter_zi(b, a)[:,np.newaxis] * x0[np.newaxis,:];
+        y = lfilter(b, a, x, axis=0, zi=zi)[0];
+    else:
+        sos = tf2sos(b, a);
+        zi = sosfilt_zi(sos)[:,:,np.newaxis] * x0[np.newaxis,np.newaxis,:];
+        y = sosfilt(sos, x, axis=0, zi=zi)[0];
+
+    y_init = x0*np.sum(b)/np.sum(a);
+    y_prev = np.vstack((y_init, y[:-1,:]));
+    if(len(a)>2):
+        y_prev2 = np.vstack((y_init, y_init, y[:-2,:]))[:y.shape[0],:];
+    else:
+        y_prev2 = y_prev;   # CausalFilter stores only one past output for first-order filters
+    dx  = (y - y_prev)/dt;
+    ddx = (y - 2*y_prev + y_prev2)/(dt*dt);
+    if(squeeze):
+        return (y[:,0], dx[:,0], ddx[:,0]);
+    return (y, dx, ddx);
+
+def reference_estimate(x, dt, window_length=REF_WINDOW_LENGTH, poly_order=REF_POLY_ORDER):
+    ''' Zero-phase estimate of the (N, k) signal x and of its derivative '''
+    x_ref  = savgol_filter(x, window_length, poly_order, axis=0);
+    dx_ref = savgol_filter(x, window_length, poly_order, deriv=1, delta=dt, axis=0);
+    return (x_ref, dx_ref);
+
+def _rms(x):
+    return np.sqrt(np.mean(np.square(x)));
+
+def evaluate_filters(b_list, a_list, x, dt, method='tf', x_ref=None, dx_ref=None):
+    ''' Apply all the filters to all the channels of the (N, k) signal x and compare them
+        with a zero-phase reference estimate. Since the filters are linear, the noise
+        (x-x_ref) is filtered separately to measure how much of it goes through.
+        @param x_ref, dx_ref Reference signal and derivative (default: reference_estimate(x, dt))
+        @return A list containing for each filter a dictionary with:
+                delay       group delay at zero frequency [s]
+                noise_atten attenuation of the noise (x-x_ref) [dB]
+                dx_error    RMS error of the derivative with respect to dx_ref [unit/s]
+                dx_noise    RMS of the derivative of the filtered noise [unit/s]
+    '''
+    x = np.asarray(x, dtype=np.float64);
+    if(x.ndim==1):
+        x = x.reshape(x.shape[0], 1);
+    if(x_ref is None or dx_ref is None):
+        (x_ref, dx_ref) = reference_estimate(x, dt);
+    noise = x - x_ref;
+    noise_in = _rms(noise);
+    res = [];
+    for (i, (b, a)) in enumerate(zip(b_list, a_list)):
+        dx = causal_filter(b, a, x, dt, method)[1];
+        (noise_f, dnoise_f) = causal_filter(b, a, noise, dt, method)[:2];
+        noise_out = _rms(noise_f);
+        res.append({'index':        i,
+                    'order':        len(a)-1,
+                    'delay':        dc_group_delay(b, a)*dt,
+                    'noise_atten':  20*np.log10(noise_in/noise_out) if noise_out>0.0 else np.inf,
+                    'dx_error':     _rms(dx - dx_ref),
+                    'dx_noise':     _rms(dnoise_f)});
+    return res;
+
+def print_filter_report(results, sort_key='delay'):
+    print("%5s %5s %10s %12s %12s %12s" % ('index', 'order', 'delay [ms]', 'atten [dB]', 'dx error', 'dx noise'));
+    for r in sorted(results, key=lambda r: r[sort_key]):
+        print("%5d %5d %10.1f %12.2f %12.5f %12.5f" % (r['index'], r['order'], 1e3*r['delay'], r['noise_atten'],
+                                                        r['dx_error'], r['dx_noise']));
+
+def main():
+    import argparse
+    from dynamic_graph.sot.torque_control.utils.tracer_log_store import open_tracer_log
+    from dynamic_graph.sot.torque_control.tests.test_velocity_filters import conf_filter_list
+    parser = argparse.ArgumentParser(description='Compare the candidate velocity filters on a recorded log');
+    parser.add_argument('data_folder', help='folder containing the tracer files');
+    parser.add_argument('--signal', default='HRP2LAAS-robotState', help='name of the signal to filter');
+    parser.add_argument('--first-col', type=int, default=6, help='first column of the signal to use');
+    parser.add_argument('--dt', type=float, default=0.001, help='sampling period');
+    parser.add_argument('--method', choices=METHODS, default='tf', help='filter implementation');
+    parser.add_argument('--sort', choices=('delay', 'noise_atten', 'dx_error', 'dx_noise'), default='delay');
+    parser.add_argument('--cutoff', type=float, help='also rank the filters by group delay at this frequency [Hz]');
+    args = parser.parse_args();
+
+    log = open_tracer_log(args.data_folder);
+    x = np.array(log.get(args.signal, slice(args.first_col, None)));
+    conf = conf_filter_list();
+    results = evaluate_filters(conf.b_list, conf.a_list, x, args.dt, args.method);
+    print_filter_report(results, args.sort);
+    if(args.cutoff is not None):
+        print("\nGroup delay at %.1f Hz:" % args.cutoff);
+        for (i, delay, mag) in rank_filters_by_delay(conf.b_list, conf.a_list, 1.0/args.dt, args.cutoff):
+            print("%5d %10.1f ms  gain %.3f" % (i, 1e3*delay, mag));
+
+if __name__=='__main__':
+    main();
@@ -95,3 +95,32 @@ def compare_with_savgol(fs, b, a):
     mfreqz(fs,b_sg,1, False)
     mfreqz(fs,b,a)
     
+
+
+def compare_filters(fs, b_list, a_list, names=None, f_max=None, show_plot=True):
+    ''' Plot magnitude and group delay of a list of filters, computed on the same grid '''
+    from pylab import subplot, plot, ylim, ylabel, xlabel, title, subplots_adjust, show, grid, legend, xlim
+    from dynamic_graph.sot.torque_control.utils.filter_bank import frequency_responses
+    (f, mag, phase, delay) = frequency_responses(b_list, a_list, fs, 2048)
+    if(names is None):
+        names = [str(i) for i in range(len(b_list))]
+    ax1 = subplot(211)
+    for i in range(len(b_list)):
+        plot(f, mag[i,:], label=names[i])
+    ylim(0, 1.1)
+    ylabel('Magnitude')
+    title(r'Frequency response')
+    grid(True)
+    legend()
+    subplot(212, sharex=ax1)
+    for i in range(len(b_list)):
+        plot(f, delay[i,:], label=names[i])
+    ylabel('Delay (s)')
+    xlabel(r'Frequency (Hz)')
+    title(r'Group delay')
+    grid(True)
+    if(f_max is not None):
+        xlim(0, f_max)
+    subplots_adjust(hspace=0.5)
+    if(show_plot):
+      show()
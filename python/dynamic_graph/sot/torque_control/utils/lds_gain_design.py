@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:20:08 2026
+
+Design of the gains of the 4-th order joint-space tracking controller studied in
+tests/test_4th_order_lds.py:
+    d^4 e/dt^4 = -kp*e - kd*de - ka*dde - kj*ddde
+The closed-loop dynamics of many candidate gain vectors (or pole sets) are evaluated
+at once: stability with the Routh-Hurwitz conditions, and the response to an initial
+error (i.e. to a step of the reference) in closed form, using the eigendecomposition
+of every closed-loop matrix (or powers of its transition matrix when it is defective).
+
+Usage example:
+    poles = -pole_grid([1.0, 2.0, 4.0], [1.0, 1.1, 1.2, 1.5]);
+    res = design_gains(poles, dt=0.01, T=10.0);
+    print_gain_table(res);
+"""
+import numpy as np
+from scipy.linalg import expm
+
+MAX_EIGENVECTORS_COND = 1e8;    # above this condition number the eigendecomposition is not used
+SETTLING_TOLERANCE = 0.02;      # relative error used to compute the settling time
+
+def pole_grid(omegas, ratios):
+    ''' Candidate real pole sets: every omega in omegas multiplied by every combination
+        of 4 of the specified ratios (combinations with repetition).
+        @return Array (n_candidates, 4) of (positive) pole magnitudes
+    '''
+    ratios = np.sort(np.atleast_1d(ratios));
+    n = ratios.shape[0];
+    idx = np.array([(a,b,c,d) for a in range(n) for b in range(a,n) for c in range(b,n) for d in range(c,n)]);
+    return (np.asarray(omegas, dtype=np.float64)[:,np.newaxis,np.newaxis]*ratios[idx][np.newaxis,:,:]).reshape(-1, 4);
+
+def gains_from_poles(poles):
+    ''' Gains (kp, kd, ka, kj) placing the closed-loop poles, for every row of poles.
+        The characteristic polynomial is s^4 + kj*s^3 + ka*s^2 + kd*s + kp.
+        @param poles Array (n, 4) of poles (complex poles must come in conjugate pairs)
+        @return Array (n, 4) of gains (kp, kd, ka, kj)
+    '''
+    poles = np.atleast_2d(poles);
+    c = np.zeros((poles.shape[0], 5), dtype=np.complex128);   # coefficients, highest power first
+    c[:,0] = 1.0;
+    for i in range(poles.shape[1]):
+        c[:,1:] = c[:,1:] - poles[:,i:i+1]*c[:,:-1];
+    return np.real(c[:,:0:-1]);
+
+def closed_loop_matrices(K):
+    ''' Closed-loop matrices A-B*K of the state (e, de, dde, ddde) for every gain vector (row of K) '''
+    K = np.atleast_2d(np.asarray(K, dtype=np.float64));
+    G = np.zeros((K.shape[0], 4, 4));
+    G[:,0,1] = G[:,1,2] = G[:,2,3] = 1.0;
+    G[:,3,:] = -K;
+    return G;
+
+def routh_hurwitz(K):
+    ''' Check the Routh-Hurwitz stability conditions for every gain vector (kp, kd, ka, kj):
+            kp, kd, ka, kj > 0,   kj*ka > kd,   kj*ka*kd > kd^2 + kj^2*kp
+        @return (stable, margin) where margin is the minimum slack of the conditions
+    '''
+    K = np.atleast_2d(np.asarray(K, dtype=np.float64));
+    (kp, kd, ka, kj) = (K[:,0], K[:,1], K[:,2], K[:,3]);
+    slack = np.vstack((kp, kd, ka, kj, kj*ka-kd, kj*ka*kd - kd*kd - kj*kj*kp));
+    margin = np.min(slack, axis=0);
+    return (margin>0.0, margin);
+
+def simulate_lds(K, dt, T, x_0=(1.0, 0.0, 0.0, 0.0)):
+    ''' Free response of the closed loop from the initial state x_0 for every gain vector.
+        @return Array (n, 4, N) with the states at times 0, dt, ..., (N-1)*dt, N=int(T/dt)
+    '''
+    G = closed_loop_matrices(K);
+    M = G.shape[0];
+    N = int(T/dt);
+    x_0 = np.asarray(x_0, dtype=np.float64);
+    t = np.arange(N)*dt;
+    x = np.zeros((M, 4, N));
+    (lam, V) = np.linalg.eig(G);
+    cond = np.linalg.cond(V);
+    ok = np.isfinite(cond) & (cond < MAX_EIGENVECTORS_COND);
+    if(np.any(ok)):
+        # x(t) = V * exp(lam*t) * V^-1 * x_0
+        c = np.linalg.solve(V[ok], np.broadcast_to(x_0, (np.count_nonzero(ok), 4))[:,:,np.newaxis])[:,:,0];
+        with np.errstate(over='ignore', invalid='ignore'):
+            e = np.exp(lam[ok][:,:,np.newaxis]*t[np.newaxis,np.newaxis,:]);
+            x[ok] = np.real(np.einsum('mik,mk,mkn->min', V[ok], c, e));
+    bad = np.where(np.logical_not(ok))[0];
+    if(bad.shape[0]>0):
+        # (nearly) defective matrices (e.g. repeated poles): x_n = e^(G*dt)^n * x_0
+        Phi = np.array([expm(G[m]*dt) for m in bad]);
+        x[bad,:,0] = x_0;
+        with np.errstate(over='ignore', invalid='ignore'):
+            for n in range(1, N):
+                x[bad,:,n] = np.einsum('mij,mj->mi', Phi, x[bad,:,n-1]);
+    return x;
+
+def step_response_metrics(e, dt, tolerance=SETTLING_TOLERANCE):
+    ''' Settling time and overshoot of the error trajectories e (n, N), each starting from e[:,0]!=0.
+        The error is normalized by its initial value: the overshoot is the maximum value of
+        -e/e_0 (in %, crossing the reference), the settling time is the first time after which
+        |e/e_0| stays below tolerance (inf if it never does).
+        @return (settling_time, overshoot)
+    '''
+    y = e/e[:,:1];
+    with np.errstate(invalid='ignore'):
+        outside = np.logical_not(np.abs(y) <= tolerance);
+    last = outside.shape[1]-1-np.argmax(outside[:,::-1], axis=1);     # last sample outside the band
+    settling_time = np.where(outside[:,-1], np.inf, (last+1)*dt);
+    settling_time[np.logical_not(np.any(outside, axis=1))] = 0.0;
+    with np.errstate(invalid='ignore'):
+        overshoot = 100*np.maximum(np.nanmax(-y, axis=1), 0.0);
+    return (settling_time, overshoot);
+
+def evaluate_gains(K, dt, T, x_0=(1.0, 0.0, 0.0, 0.0), tolerance=SETTLING_TOLERANCE):
+    ''' Evaluate stability and step response of every gain vector (row of K).
+        @return Dictionary of arrays with one element per candidate:
+                K, stable, margin (Routh-Hurwitz), max_real_eig, settling_time [s], overshoot [%]
+    '''
+    K = np.atleast_2d(np.asarray(K, dtype=np.float64));
+    (stable, margin) = routh_hurwitz(K);
+    max_real_eig = np.max(np.real(np.linalg.eigvals(closed_loop_matrices(K))), axis=1);
+    x = simulate_lds(K, dt, T, x_0);
+    (settling_time, overshoot) = step_response_metrics(x[:,0,:], dt, tolerance);
+    settling_time[np.logical_not(stable)] = np.inf;
+    return {'K': K, 'stable': stable, 'margin': margin, 'max_real_eig': max_real_eig,
+            'settling_time': settling_time, 'overshoot': overshoot};
+
+def design_gains(poles, dt, T, x_0=(1.0, 0.0, 0.0, 0.0), tolerance=SETTLING_TOLERANCE):
+    ''' Compute the gains placing every set of poles (row of poles) and evaluate them (see evaluate_gains) '''
+    res = evaluate_gains(gains_from_poles(poles), dt, T, x_0, tolerance);
+    res['poles'] = np.atleast_2d(poles);
+    return res;
+
+def print_gain_table(res, n=20, sort_key='settling_time', max_overshoot=None):
+    ''' Print the n best candidates according to sort_key, optionally discarding those
+        whose overshoot is larger than max_overshoot [%] '''
+    ind = np.where(res['stable'])[0];
+    if(max_overshoot is not None):
+        ind = ind[res['overshoot'][ind] <= max_overshoot];
+    ind = ind[np.argsort(res[sort_key][ind], kind='mergesort')][:n];
+    print("%10s %10s %10s %10s %12s %12s %10s" % ('kp', 'kd', 'ka', 'kj', 'settling [s]', 'overshoot %', 'max eig'));
+    for i in ind:
+        K = res['K'][i];
+        print("%10.3f %10.3f %10.3f %10.3f %12.3f %12.2f %10.3f" % (K[0], K[1], K[2], K[3], res['settling_time'][i],
+                                                                   res['overshoot'][i], res['max_real_eig'][i]));
@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 from mpl_toolkits.mplot3d import Axes3D
 import numpy as np
+import os
+import multiprocessing
 
 DEFAULT_FONT_SIZE = 25;
 DEFAULT_AXIS_FONT_SIZE = DEFAULT_FONT_SIZE;
@@ -32,6 +34,9 @@ FIGURE_PATH = './';
 LINE_WIDTH_RED = 0; # reduction of line width when plotting multiple lines on same plot
 LINE_WIDTH_MIN = 1;
 BOUNDS_COLOR = 'silver';
+RENDER_MODE = 'show';       # how DeferredFigures are rendered by default: 'show', 'file' or 'none'
+DECIMATION_BINS = 2000;     # max number of bins used to decimate line plots (2 points kept per bin)
+DECIMATION_RESOLUTION = (1000, 1000); # grid used to decimate point clouds (1 point kept per cell)
 
 #legend.framealpha    : 1.0    # opacity of of legend frame
 #axes.hold           : True    # whether to clear the axes by default on
@@ -255,3 +260,251 @@ def plotQuantityVsQuantityPerSolver(quantity, quantityPerSolver, legend, solver_
     if(SHOW_LEGENDS):
         leg = ax[0,0].legend(legend, loc='best');
         leg.get_frame().set_alpha(LEGEND_ALPHA)
+
+
+''' Deferred plotting.
+    Plots are recorded as lightweight specifications (DeferredFigures) while the numerical
+    work is done, with point clouds and long lines decimated to screen resolution, and they
+    are rendered only at the end: shown, saved to file (in parallel) or discarded.
+'''
+
+def decimate_minmax(x, y, n_bins=DECIMATION_BINS):
+    ''' Split the samples in n_bins groups of consecutive samples and keep only the minimum
+        and the maximum of y in each group, so that a line plot looks the same at screen
+        resolution. NaNs are kept (as gaps) only if a whole group is NaN.
+        @return (x_dec, y_dec)
+    '''
+    n = y.shape[0];
+    if(n<=2*n_bins):
+        return (x, y);
+    size = int(np.ceil(n/float(n_bins)));
+    nb = int(np.ceil(n/float(size)));
+    pad = nb*size - n;
+    y_min = np.concatenate((np.where(np.isnan(y), np.inf, y), np.inf*np.ones(pad))).reshape(nb, size);
+    y_max = np.concatenate((np.where(np.isnan(y), -np.inf, y), -np.inf*np.ones(pad))).reshape(nb, size);
+    offset = size*np.arange(nb);
+    i = np.unique(np.concatenate((offset+np.argmin(y_min, 1), offset+np.argmax(y_max, 1))));
+    return (x[i], y[i]);
+
+def decimate_point_cloud(x, y, resolution=DECIMATION_RESOLUTION):
+    ''' Keep only one point for each occupied cell of a regular grid of the specified
+        resolution covering the bounding box of the points. Non-finite points are removed.
+        @return (x_dec, y_dec)
+    '''
+    finite = np.logical_and(np.isfinite(x), np.isfinite(y));
+    x = x[finite];
+    y = y[finite];
+    if(x.shape[0]<=resolution[0]):
+        return (x, y);
+    ix = _grid_index(x, resolution[0]);
+    iy = _grid_index(y, resolution[1]);
+    i = np.sort(np.unique(ix*resolution[1]+iy, return_index=True)[1]);
+    return (x[i], y[i]);
+
+def _grid_index(x, n):
+    x_min = np.min(x);
+    x_range = np.max(x) - x_min;
+    if(x_range<=0.0):
+        return np.zeros(x.shape[0], np.int64);
+    return np.minimum((n*(x-x_min)/x_range).astype(np.int64), n-1);
+
+def _is_point_cloud(fmt, kwargs):
+    ''' True if the format string and the keyword arguments of a plot call draw markers only '''
+    if(kwargs.get('linestyle', kwargs.get('ls')) not in (None, '', ' ', 'None', 'none')):
+        return False;
+    if(fmt is None):
+        return 'marker' in kwargs;
+    for c in ('-', ':'):
+        if(c in fmt):
+            return False;
+    return len(fmt.strip(' bgrcmykw'))>0;
+
+class _Ref:
+    ''' Placeholder for the object returned by a recorded call, resolved when rendering '''
+    def __init__(self, index):
+        self.index = index;
+
+class AxesSpec:
+    ''' Record the calls made on a matplotlib Axes. Every method of Axes can be called,
+        it is recorded and returns a placeholder that can be passed to later calls.
+        The data of plot calls with many points are decimated.
+    '''
+    def __init__(self, figure, ref):
+        self._figure = figure;
+        self._ref = ref;
+
+    def call(self, name, *args, **kwargs):
+        ''' Record a call; name can be a dotted path, e.g. 'zaxis.set_major_locator' '''
+        return self._figure._record(self._ref, name, args, kwargs);
+
+    def plot(self, *args, **kwargs):
+        if(len(args) in (1,2) and not isinstance(args[-1], str) or
+           len(args) in (2,3) and isinstance(args[-1], str)):
+            fmt = args[-1] if isinstance(args[-1], str) else None;
+            data = args[:-1] if fmt is not None else args;
+            if(len(data)==1):
+                y = np.asarray(data[0]);
+                x = np.arange(y.shape[0]);
+            else:
+                (x, y) = (np.asarray(data[0]), np.asarray(data[1]));
+            if(x.ndim==1 and y.ndim==1 and x.shape==y.shape and y.shape[0]>2*DECIMATION_BINS):
+                if(_is_point_cloud(fmt, kwargs)):
+                    (x, y) = decimate_point_cloud(x, y);
+                else:
+                    (x, y) = decimate_minmax(x, y);
+                args = (x, y) if fmt is None else (x, y, fmt);
+        return self.call('plot', *args, **kwargs);
+
+    def __getattr__(self, name):
+        if(name.startswith('_')):
+            raise AttributeError(name);
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs);
+
+class FigureSpec:
+    ''' Record the calls made on a matplotlib Figure (and on its axes) '''
+    def __init__(self, name=None):
+        self.name = name;
+        self.calls = [];
+        self._axes = {};
+        self._current_axes = None;
+
+    def _record(self, target, name, args, kwargs):
+        self.calls.append((target, name, args, kwargs));
+        return _Ref(len(self.calls)-1);
+
+    def add_subplot(self, *args, **kwargs):
+        ''' Return the AxesSpec of the subplot (the same object if called twice with the same arguments) '''
+        key = repr((args, sorted(kwargs.items())));
+        if(key not in self._axes):
+            self._axes[key] = AxesSpec(self, self._record(None, 'add_subplot', args, kwargs));
+        self._current_axes = self._axes[key];
+        return self._current_axes;
+
+    def gca(self):
+        if(self._current_axes is None):
+            return self.add_subplot(111);
+        return self._current_axes;
+
+    def __getattr__(self, name):
+        if(name.startswith('_')):
+            raise AttributeError(name);
+        return lambda *args, **kwargs: self._record(None, name, args, kwargs);
+
+    def draw(self, fig):
+        ''' Replay all the recorded calls on the matplotlib figure fig '''
+        results = [];
+        resolve = lambda v: results[v.index] if isinstance(v, _Ref) else v;
+        for (target, name, args, kwargs) in self.calls:
+            obj = fig if target is None else results[target.index];
+            for attr in name.split('.'):
+                obj = getattr(obj, attr);
+            results.append(obj(*[resolve(a) for a in args],
+                               **dict([(k, resolve(v)) for (k,v) in kwargs.items()])));
+        return fig;
+
+def _render_figure_to_file(args):
+    (spec, filenames) = args;
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure();
+    FigureCanvasAgg(fig);
+    spec.draw(fig);
+    for f in filenames:
+        fig.savefig(f, dpi=FIGURES_DPI, bbox_inches='tight');
+    return filenames;
+
+class DeferredFigures:
+    ''' Collect figures with an interface similar to matplotlib.pyplot (figure, subplot, plot,
+        xlabel, ylabel, title, legend, ...) and render them only when render is called.
+        show() does not block: it only closes the current figure, so that the next plot
+        creates a new one as pyplot would.
+    '''
+    def __init__(self):
+        self.figures = [];
+        self._current = None;
+
+    def figure(self, name=None):
+        self._current = FigureSpec(name);
+        self.figures.append(self._current);
+        return self._current;
+
+    def gcf(self):
+        if(self._current is None):
+            return self.figure();
+        return self._current;
+
+    def gca(self, **kwargs):
+        if(len(kwargs)>0):
+            return self.gcf().add_subplot(111, **kwargs);
+        return self.gcf().gca();
+
+    def subplot(self, *args, **kwargs):
+        return self.gcf().add_subplot(*args, **kwargs);
+
+    def plot(self, *args, **kwargs):
+        return self.gca().plot(*args, **kwargs);
+
+    def xlabel(self, *args, **kwargs):
+        return self.gca().set_xlabel(*args, **kwargs);
+
+    def ylabel(self, *args, **kwargs):
+        return self.gca().set_ylabel(*args, **kwargs);
+
+    def title(self, *args, **kwargs):
+        return self.gca().set_title(*args, **kwargs);
+
+    def show(self):
+        self._current = None;
+
+    def __getattr__(self, name):
+        if(name.startswith('_')):
+            raise AttributeError(name);
+        return getattr(self.gca(), name);
+
+    def render(self, mode=None, path=None, prefix='', extensions=None, processes=None, clear=True):
+        ''' Render all the recorded figures.
+            @param mode 'show' to draw them with pyplot and show them, 'file' to save them,
+                        'none' to discard them (default: RENDER_MODE)
+            @param path Folder where to save the figures (default: FIGURE_PATH)
+            @param prefix Prefix of the file names, followed by the figure name (or its index)
+            @param extensions List of file extensions (default: FILE_EXTENSIONS)
+            @param processes Number of processes used to save the figures (default: number of cores)
+            @param clear If True forget the figures after rendering them
+            @return The list of the names of the saved files
+        '''
+        figures = self.figures;
+        if(clear):
+            self.figures = [];
+            self._current = None;
+        if(mode is None):
+            mode = RENDER_MODE;
+        if(mode=='none' or len(figures)==0):
+            return [];
+        if(mode=='show'):
+            for spec in figures:
+                spec.draw(plt.figure());
+            plt.show();
+            return [];
+        if(mode!='file'):
+            raise ValueError("Unknown render mode "+str(mode));
+        if(path is None):
+            path = FIGURE_PATH;
+        if(extensions is None):
+            extensions = FILE_EXTENSIONS;
+        jobs = [];
+        for (i, spec) in enumerate(figures):
+            name = (prefix + (spec.name if spec.name is not None else str(i))).replace(' ', '_');
+            jobs.append((spec, [os.path.join(path, name+'.'+ext) for ext in extensions]));
+        if(processes is None):
+            processes = multiprocessing.cpu_count();
+        processes = min(processes, len(jobs));
+        if(processes<=1):
+            res = map(_render_figure_to_file, jobs);
+        else:
+            pool = multiprocessing.Pool(processes);
+            try:
+                res = pool.map(_render_figure_to_file, jobs);
+            finally:
+                pool.close();
+                pool.join();
+        return sum(res, []);
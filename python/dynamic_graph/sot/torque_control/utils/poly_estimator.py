@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:05:11 2026
+
+Vectorized NumPy counterpart of the C++ LinEstimator/QuadEstimator used by the
+NumericalDifference entity. Instead of feeding one sample at a time into an
+entity, the whole (N, k) signal is processed at once: the least-squares fit over
+the sliding window is a fixed FIR filter (row of the pseudo-inverse of the time
+matrix), so it is applied to all the channels with a single call to lfilter.
+The results are the same as those of the entity, including the first N-1
+samples, for which the entity returns the input signal and zero derivatives.
+"""
+import numpy as np
+from scipy.signal import lfilter
+
+def poly_estimator_window_length(dt, delay):
+    ''' Window length used by NumericalDifference for the specified estimation delay '''
+    return int(2*delay/dt);
+
+def poly_estimator_kernels(N, dt, order):
+    ''' Compute the pseudo-inverse of the time matrix used by LinEstimator (order 1)
+        and QuadEstimator (order 2) for a window of N samples with sampling time dt.
+        @return (pinvT, tmed) where pinvT is a (order+1, N) matrix and tmed is the
+                time at which the polynomial is evaluated
+    '''
+    if(order not in (1,2)):
+        raise ValueError("Only polynomial orders 1 and 2 are allowed");
+    t = dt*np.arange(N);
+    T = np.ones((N, order+1));
+    T[:,1] = t;
+    if(order==2):
+        T[:,2] = 0.5*t*t;
+    return (np.linalg.pinv(T), 0.5*N*dt);
+
+def numerical_difference(x, dt, delay, order=2):
+    ''' Filter the (N, k) signal x and compute its first two derivatives as done
+        by the NumericalDifference entity initialized with init(dt, k, delay, order).
+        @return (x_filtered, dx, ddx), three (N, k) arrays
+    '''
+    x = np.asarray(x, dtype=np.float64);
+    squeeze = (x.ndim==1);
+    if(squeeze):
+        x = x.reshape(x.shape[0], 1);
+    N = poly_estimator_window_length(dt, delay);
+    if(N<3):
+        raise ValueError("Estimation-window's length should be >= 3");
+    (pinvT, tmed) = poly_estimator_kernels(N, dt, order);
+
+    # c_j[i] = sum_m pinvT[j,m] * x[i-N+1+m], i.e. a FIR filter with reversed coefficients
+    c = [lfilter(pinvT[j,::-1], [1.0], x, axis=0) for j in range(order+1)];
+    if(order==1):
+        x_f = c[0] + c[1]*tmed;
+        dx  = c[1];
+        ddx = np.zeros_like(x);
+    else:
+        x_f = c[0] + c[1]*tmed + 0.5*c[2]*tmed*tmed;
+        dx  = c[1] + c[2]*tmed;
+        ddx = c[2];
+
+    # until the window is full the estimator returns the input and zero derivatives
+    n0 = min(N-1, x.shape[0]);
+    x_f[:n0,:] = x[:n0,:];
+    dx[:n0,:]  = 0.0;
+    ddx[:n0,:] = 0.0;
+    if(squeeze):
+        return (x_f[:,0], dx[:,0], ddx[:,0]);
+    return (x_f, dx, ddx);
@@ -3,7 +3,8 @@
 Created on Mon Mar 23 11:19:17 2015
 
 Take a joint-trajectory file with a certain sampling time, interpolate it
-to make at at 1 ms, compute first 2 derivatives, write a new trajectory file.
+to make it at DT_DES (which does not need to divide the original sampling
+time), compute first 2 derivatives, write a new trajectory file.
 @author: adelpret
 """
 
@@ -12,6 +13,7 @@ import plot_utils
 import matplotlib.pyplot as plt
 #import robotviewer
 from estimate_velocity import estimateVelocity
+from resample_trajectory import resample_trajectory, write_trajectory_file, DEFAULT_CHUNK_SIZE
 from time import sleep
 
 USE_ROBOT_VIEWER = False;
@@ -23,6 +25,7 @@ FILE_PATH = '../../../../../share/';
 NJ = 30;
 WS = 21;
 DT_DES = 0.00125;
+INTERPOLATION_METHOD = 'linear'; # 'linear' or 'hermite'
 VIEWER_PERIOD = 50;
 MAX_LENGTH = 8.0; #15.5;
 
@@ -63,34 +66,19 @@ ddq  = estimateVelocity(time, dq, WS);
 #    plt.show();
 
 print 'Interpolate'
-r       = int(dt/DT_DES)
-T_int   = 1+(T-1)*r;
-time_int = np.arange(0, T_int*DT_DES, DT_DES);
-q_int   = np.zeros((T_int,NJ));
-dq_int  = np.zeros((T_int,NJ));
-ddq_int = np.zeros((T_int,NJ));
-for t in range(T-1):
-#    print '%d'% (t*r+r-1);
-    for t_int in range(r):
-        q_int[  t*r+t_int,:] = ((r-t_int)*q[t,:] + t_int*q[t+1,:])/r;
-        dq_int[ t*r+t_int,:] = ((r-t_int)*dq[t,:] + t_int*dq[t+1,:])/r;
-        ddq_int[t*r+t_int,:] = ((r-t_int)*ddq[t,:] + t_int*ddq[t+1,:])/r;
-q_int[  -1,:] = q[-1,:];
-dq_int[ -1,:] = dq[-1,:];
-ddq_int[-1,:] = ddq[-1,:];
-
+(time_int, q_int, dq_int, ddq_int) = resample_trajectory(time, q, dq, ddq, DT_DES, INTERPOLATION_METHOD);
+T_int = time_int.shape[0];
 
 print 'Save interpolated data as text file';
 if(T_int>MAX_LENGTH/DT_DES):
     print 'Gonna remove final part of file'
     T_int = int(MAX_LENGTH/DT_DES);
-    
+
 if(SAVE_FILE):
-    data_int = np.zeros((T_int, NJ*3));
-    data_int[:,:NJ]     = q_int[:T_int,:];
-    data_int[:,NJ:2*NJ] = dq_int[:T_int,:];
-    data_int[:,2*NJ:]   = ddq_int[:T_int,:];
-    np.savetxt(FILE_PATH+NEW_FILE_NAME,data_int, '%.8f');
+    # write in row slices so that the whole (T_int, 3*NJ) matrix is never built
+    c = DEFAULT_CHUNK_SIZE;
+    write_trajectory_file(FILE_PATH+NEW_FILE_NAME, [(q_int[i:min(i+c,T_int),:], dq_int[i:min(i+c,T_int),:], ddq_int[i:min(i+c,T_int),:])
+                                                    for i in range(0, T_int, c)]);
     
 for j in range(NJ):
     print "Max velocity of joint %d as a percentage of its velocity limit: %f" % (j, 100*np.max(dq[:,j])/DQ_MAX[j]);
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:32:08 2026
+
+Resample joint trajectories to an arbitrary sampling period (the ratio between the
+original and the new period does not need to be an integer) and write them in the
+text format read by NdTrajectoryGenerator.playTrajectoryFile, i.e. one row per
+time step containing q, dq and ddq.
+
+Usage as a script:
+    python resample_trajectory.py climbing32.pos climbing32_1.25ms.pos --dt 0.00125 --nj 30
+where the input file contains the time in the first column followed by the joint angles.
+"""
+import numpy as np
+
+TIME_EPS = 1e-9;            # tolerance used when computing the number of resampled points
+DEFAULT_CHUNK_SIZE = 10000; # number of rows interpolated and written at once
+METHODS = ('linear', 'hermite');
+
+def resampling_times(time, dt_new, max_length=None):
+    ''' Time stamps of the resampled trajectory, starting at time[0] and not exceeding time[-1].
+        @param max_length If specified, maximum duration of the resampled trajectory in seconds
+    '''
+    T_int = int(np.floor((time[-1]-time[0])/dt_new + TIME_EPS)) + 1;
+    if(max_length is not None and T_int>int(max_length/dt_new)):
+        T_int = int(max_length/dt_new);
+    return time[0] + dt_new*np.arange(T_int);
+
+def _locate(time, t_new):
+    ''' For each t_new return the index i of the interval [time[i], time[i+1]] containing it,
+        the length of the interval and the normalized position inside it. '''
+    i = np.searchsorted(time, t_new, side='right') - 1;
+    i = np.clip(i, 0, time.shape[0]-2);
+    h = time[i+1] - time[i];
+    s = np.clip((t_new - time[i]) / h, 0.0, 1.0);
+    return (i, h, s);
+
+def resample_linear(time, x, t_new):
+    ''' Linear interpolation of all the columns of the (T, n) array x at the times t_new '''
+    (i, h, s) = _locate(time, t_new);
+    s = s[:,np.newaxis];
+    return (1.0-s)*x[i,:] + s*x[i+1,:];
+
+def resample_cubic_hermite(time, x, dx, t_new):
+    ''' Cubic Hermite interpolation of all the columns of the (T, n) array x at the times t_new,
+        using dx as derivatives at the knots. '''
+    (i, h, s) = _locate(time, t_new);
+    s  = s[:,np.newaxis];
+    h  = h[:,np.newaxis];
+    s2 = s*s;
+    s3 = s2*s;
+    h00 = 2*s3 - 3*s2 + 1;
+    h10 = s3 - 2*s2 + s;
+    h01 = -2*s3 + 3*s2;
+    h11 = s3 - s2;
+    return h00*x[i,:] + h10*h*dx[i,:] + h01*x[i+1,:] + h11*h*dx[i+1,:];
+
+class TrajectoryResampler:
+    ''' Interpolate a trajectory (q, dq, ddq) sampled at the times time.
+        With the 'hermite' method dq is used as derivative of q, ddq as derivative of dq and
+        a finite-difference estimate as derivative of ddq.
+    '''
+    def __init__(self, time, q, dq, ddq, method='linear'):
+        if(method not in METHODS):
+            raise ValueError("Unknown resampling method "+str(method)+", expected one of "+str(METHODS));
+        self.time   = np.asarray(time, dtype=np.float64);
+        self.q      = np.asarray(q, dtype=np.float64);
+        self.dq     = np.asarray(dq, dtype=np.float64);
+        self.ddq    = np.asarray(ddq, dtype=np.float64);
+        self.method = method;
+        if(method=='hermite'):
+            self.dddq = np.gradient(self.ddq, axis=0) / np.gradient(self.time)[:,np.newaxis];
+
+    def __call__(self, t_new):
+        if(self.method=='linear'):
+            return (resample_linear(self.time, self.q, t_new),
+                    resample_linear(self.time, self.dq, t_new),
+                    resample_linear(self.time, self.ddq, t_new));
+        return (resample_cubic_hermite(self.time, self.q, self.dq, t_new),
+                resample_cubic_hermite(self.time, self.dq, self.ddq, t_new),
+                resample_cubic_hermite(self.time, self.ddq, self.dddq, t_new));
+
+def resample_trajectory(time, q, dq, ddq, dt_new, method='linear', max_length=None):
+    ''' Resample the trajectory (q, dq, ddq) with the sampling period dt_new.
+        @return (time_int, q_int, dq_int, ddq_int)
+    '''
+    t_new = resampling_times(np.asarray(time), dt_new, max_length);
+    (q_int, dq_int, ddq_int) = TrajectoryResampler(time, q, dq, ddq, method)(t_new);
+    return (t_new, q_int, dq_int, ddq_int);
+
+def resample_chunks(time, q, dq, ddq, dt_new, method='linear', max_length=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    ''' Generator of the resampled trajectory (q_int, dq_int, ddq_int) in chunks of chunk_size
+        rows, so that the whole resampled matrix is never stored in memory. '''
+    t_new = resampling_times(np.asarray(time), dt_new, max_length);
+    resampler = TrajectoryResampler(time, q, dq, ddq, method);
+    for i in range(0, t_new.shape[0], chunk_size):
+        yield resampler(t_new[i:i+chunk_size]);
+
+def write_trajectory_file(filename, chunks, fmt='%.8f'):
+    ''' Write a trajectory to a text file readable by NdTrajectoryGenerator.playTrajectoryFile.
+        @param chunks Iterable of tuples (q, dq, ddq) of consecutive parts of the trajectory,
+                      e.g. [(q_int, dq_int, ddq_int)] or the generator returned by resample_chunks
+        @return The number of rows written
+    '''
+    n = 0;
+    with open(filename, 'w') as f:
+        for chunk in chunks:
+            np.savetxt(f, np.hstack(chunk), fmt);
+            n += chunk[0].shape[0];
+    return n;
+
+def write_pos_file(filename, time, q, dq, ddq, dt_new, method='linear', max_length=None,
+                   fmt='%.8f', chunk_size=DEFAULT_CHUNK_SIZE):
+    ''' Resample the trajectory (q, dq, ddq) with the sampling period dt_new and write it
+        to a text file readable by NdTrajectoryGenerator.playTrajectoryFile.
+        The resampled trajectory is computed and written chunk by chunk (see resample_chunks).
+        @return The number of rows written
+    '''
+    return write_trajectory_file(filename, resample_chunks(time, q, dq, ddq, dt_new, method, max_length, chunk_size), fmt);
+
+def main():
+    import argparse
+    from estimate_velocity import estimateVelocity
+    parser = argparse.ArgumentParser(description='Resample a joint trajectory and write it as a .pos file '
+                                                 'readable by NdTrajectoryGenerator.playTrajectoryFile');
+    parser.add_argument('input', help='text file with time in the first column followed by the joint angles');
+    parser.add_argument('output', help='name of the .pos file to write');
+    parser.add_argument('--dt', type=float, default=0.001, help='sampling period of the output file');
+    parser.add_argument('--nj', type=int, default=30, help='number of joints');
+    parser.add_argument('--ws', type=int, default=21, help='window size used to estimate velocities and accelerations');
+    parser.add_argument('--method', choices=METHODS, default='linear', help='interpolation method');
+    parser.add_argument('--max-length', type=float, default=None, help='maximum duration of the output trajectory');
+    args = parser.parse_args();
+
+    data = np.loadtxt(args.input);
+    time = data[:,0];
+    q    = data[:,1:args.nj+1];
+    dq   = estimateVelocity(time, q, args.ws);
+    ddq  = estimateVelocity(time, dq, args.ws);
+    n = write_pos_file(args.output, time, q, dq, ddq, args.dt, args.method, args.max_length);
+    print("Written %d samples to %s" % (n, args.output));
+
+if __name__=='__main__':
+    main();
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:14:02 2026
+
+Content-addressed cache for the intermediate results of data processing pipelines.
+Every stage of a pipeline is identified by a key computed as a hash of its name and
+of all its inputs: the content of the input files, the parameters and the keys of
+the stages it depends on. The results of a stage (a dictionary of arrays) are stored
+in a .npz file named after the key, so changing a parameter only recomputes the
+stages that depend on it, and going back to a previous value finds the old results.
+When the size of the cache exceeds a maximum, the least recently used results are removed.
+
+Typical usage:
+    cache = ResultCache();
+    raw_key = cache.key('raw', cache.digest(filename));
+    (key, res) = cache.memoize('derivatives', (raw_key, delay), lambda: {'dq': ..., 'ddq': ...});
+"""
+import os
+import json
+import hashlib
+import numpy as np
+
+DEFAULT_CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'sot-torque-control');
+DEFAULT_MAX_SIZE = 4*1024**3;     # maximum size of the cache in bytes
+DIGESTS_FILE_NAME = 'digests.json';
+READ_BLOCK_SIZE = 1024**2;        # number of bytes read at once when hashing a file
+
+def hash_inputs(*values):
+    ''' Hash (hexadecimal string) of the specified values, which can be strings, numbers,
+        None, numpy arrays, or lists, tuples and dictionaries of these types. '''
+    h = hashlib.sha1();
+    _update_hash(h, values);
+    return h.hexdigest();
+
+def _update_hash(h, v):
+    if(isinstance(v, np.ndarray)):
+        v = np.ascontiguousarray(v);
+        h.update(('array%s%s;' % (v.dtype.str, v.shape)).encode('utf-8'));
+        h.update(v.tobytes() if hasattr(v, 'tobytes') else v.tostring());
+    elif(isinstance(v, (list, tuple))):
+        h.update(('seq%d;' % len(v)).encode('utf-8'));
+        for x in v:
+            _update_hash(h, x);
+    elif(isinstance(v, dict)):
+        h.update(('dict%d;' % len(v)).encode('utf-8'));
+        for k in sorted(v.keys()):
+            _update_hash(h, k);
+            _update_hash(h, v[k]);
+    else:
+        h.update(('%s:%r;' % (type(v).__name__, v)).encode('utf-8'));
+
+def file_digest(filename):
+    ''' Hash of the content of a file '''
+    h = hashlib.sha1();
+    with open(filename, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE);
+            if(len(block)==0):
+                break;
+            h.update(block);
+    return h.hexdigest();
+
+
+class ResultCache:
+    ''' Folder containing the results of the stages of a pipeline, indexed by content hash. '''
+    def __init__(self, folder=DEFAULT_CACHE_FOLDER, max_size=DEFAULT_MAX_SIZE, verbose=True):
+        self.folder = folder;
+        self.max_size = max_size;
+        self.verbose = verbose;
+        if(not os.path.isdir(folder)):
+            os.makedirs(folder);
+        self._digests = None;
+
+    def digest(self, filename):
+        ''' Hash of the content of a file. Digests are stored together with the size and
+            modification time of the file, so that unchanged files are not read again.
+        '''
+        if(self._digests is None):
+            try:
+                with open(os.path.join(self.folder, DIGESTS_FILE_NAME), 'r') as f:
+                    self._digests = json.load(f);
+            except (IOError, OSError, ValueError):
+                self._digests = {};
+        path = os.path.abspath(filename);
+        st = os.stat(path);
+        stamp = [st.st_size, st.st_mtime];
+        entry = self._digests.get(path);
+        if(entry is not None and entry[:2]==stamp):
+            return entry[2];
+        d = file_digest(path);
+        self._digests[path] = stamp + [d];
+        tmp = os.path.join(self.folder, DIGESTS_FILE_NAME+'.tmp'+str(os.getpid()));
+        with open(tmp, 'w') as f:
+            json.dump(self._digests, f);
+        os.rename(tmp, os.path.join(self.folder, DIGESTS_FILE_NAME));
+        return d;
+
+    def key(self, stage, *inputs):
+        ''' Key of the results of the specified stage computed from the specified inputs '''
+        return stage+'-'+hash_inputs(stage, inputs);
+
+    def _filename(self, key):
+        return os.path.join(self.folder, key+'.npz');
+
+    def has(self, key):
+        return os.path.exists(self._filename(key));
+
+    def load(self, key):
+        ''' Load the results associated to key as a dictionary of arrays (None if not in the cache) '''
+        filename = self._filename(key);
+        try:
+            with np.load(filename) as data:
+                res = dict([(k, data[k]) for k in data.files]);
+        except (IOError, OSError, ValueError):
+            return None;
+        os.utime(filename, None);   # mark as recently used
+        return res;
+
+    def save(self, key, results):
+        ''' Store the dictionary of arrays results with the specified key '''
+        filename = self._filename(key);
+        tmp = filename+'.tmp'+str(os.getpid())+'.npz';
+        np.savez(tmp, **results);
+        os.rename(tmp, filename);
+        self.evict();
+
+    def memoize(self, stage, inputs, compute, force=False):
+        ''' Return the results of a stage, computing them only if they are not in the cache.
+            @param inputs Tuple of the inputs of the stage (see hash_inputs), including the keys
+                          of the stages whose results are used
+            @param compute Function with no argument returning the results as a dictionary of arrays
+            @param force If True compute the results even if they are in the cache
+            @return (key, results)
+        '''
+        key = self.key(stage, *inputs);
+        res = None if force else self.load(key);
+        if(res is None):
+            if(self.verbose):
+                print("Computing stage "+stage);
+            res = compute();
+            self.save(key, res);
+        elif(self.verbose):
+            print("Stage "+stage+" loaded from cache");
+        return (key, res);
+
+    def size(self):
+        return sum([os.path.getsize(os.path.join(self.folder, f)) for f in os.listdir(self.folder) if f.endswith('.npz')]);
+
+    def evict(self, max_size=None):
+        ''' Remove the least recently used results until the size of the cache is below max_size '''
+        if(max_size is None):
+            max_size = self.max_size;
+        entries = [];
+        for f in os.listdir(self.folder):
+            if(f.endswith('.npz') and '.tmp' not in f):
+                st = os.stat(os.path.join(self.folder, f));
+                entries.append((st.st_mtime, st.st_size, f));
+        total = sum([e[1] for e in entries]);
+        for (mtime, size, f) in sorted(entries):
+            if(total<=max_size):
+                break;
+            try:
+                os.remove(os.path.join(self.folder, f));
+            except OSError:
+                pass;
+            total -= size;
+            if(self.verbose):
+                print("Removed "+f+" from cache");
+
+    def clear(self):
+        self.evict(0);
@@ -5,6 +5,7 @@
 """
 import numpy as np
 from time import sleep
+import importlib
 import os
     
 class Bunch:
@@ -22,6 +23,59 @@ class Bunch:
                 res += prefix+" - " + key + ": " + str(value) + "\n";
         return res[:-1];
 
+class LazyBunch(Bunch):
+    ''' Bunch whose attributes can be registered as factories (functions without arguments)
+        or as names of modules to import. Each factory is called only the first time its
+        attribute is accessed, and the result is stored as a normal attribute, so that the
+        following accesses cost as much as with a Bunch.
+    '''
+    def __init__(self, **kwds):
+        self.__dict__['_factories'] = {};
+        Bunch.__init__(self, **kwds);
+
+    def register(self, name, factory):
+        ''' Register the function (without arguments) computing the attribute name '''
+        self._factories[name] = factory;
+        self.__dict__.pop(name, None);
+
+    def register_module(self, name, module_name):
+        ''' Register the attribute name as the module module_name, imported on first access '''
+        self.register(name, lambda: importlib.import_module(module_name));
+
+    def is_loaded(self, name):
+        return name in self.__dict__;
+
+    def load_all(self):
+        ''' Resolve all the registered attributes '''
+        for name in self._factories.keys():
+            getattr(self, name);
+        return self;
+
+    def __getattr__(self, name):
+        # called only for the attributes that are not in __dict__
+        factories = self.__dict__.get('_factories', {});
+        if(name not in factories):
+            raise AttributeError(name);
+        value = factories[name]();
+        self.__dict__[name] = value;
+        return value;
+
+    def __str__(self, prefix=""):
+        res = "";
+        for (key,value) in self.__dict__.iteritems():
+            if(key[0]=='_'):
+                continue;
+            if (isinstance(value, np.ndarray) and len(value.shape)==2 and value.shape[0]>value.shape[1]):
+                res += prefix+" - " + key + ": " + str(value.T) + "\n";
+            elif (isinstance(value, Bunch)):
+                res += prefix+" - " + key + ":\n" + value.__str__(prefix+"    ") + "\n";
+            else:
+                res += prefix+" - " + key + ": " + str(value) + "\n";
+        for key in self._factories.keys():
+            if(key not in self.__dict__):
+                res += prefix+" - " + key + ": (not loaded)\n";
+        return res[:-1];
+
 def start_sot():
     os.system('rosservice call /start_dynamic_graph');
 
@@ -112,17 +166,137 @@ def smoothly_set_signal(sig, final_value, duration=5.0, steps=500, prints = 10):
     print 'Signal set';
     sig.value = tuple(final_value);
     
-def monitor_tracking_error(sig, sigRef, dt, time):
+def create_signal_recorder(device, signals, buffer_size, name='signal_recorder'):
+    ''' Create a SignalRecorder entity that copies the values of the specified signals in
+        a ring buffer at every iteration of the device.
+        @param signals List of tuples (signal, size, signal_name)
+        @param buffer_size Number of samples stored for each signal (get them with recorder.getData
+                           before they are overwritten)
+    '''
+    from dynamic_graph import plug
+    from dynamic_graph.sot.torque_control.signal_recorder import SignalRecorder
+    recorder = SignalRecorder(name);
+    recorder.init(buffer_size);
+    for (sig, size, sig_name) in signals:
+        recorder.addInputSignal(sig_name, size);
+        plug(sig, recorder.signal(sig_name));
+    device.after.addSignal(name+'.trigger');
+    return recorder;
+
+def get_recorded_data(recorder, sig_name):
+    ''' Get the samples recorded since the last call as an array (N, 1+size), with the
+        iteration number in the first column '''
+    data = np.array(recorder.getData(sig_name));
+    lost = recorder.getLostSamples(sig_name);
+    if(lost>0):
+        print 'WARNING: %d samples of signal %s have been lost, increase the buffer size' % (lost, sig_name);
+    return data;
+
+def align_recorded_data(x, x_ref):
+    ''' Match the rows of two arrays of recorded samples (sorted by iteration number, in the
+        first column) that have the same iteration number.
+        @return (x_matched, x_ref_matched, x_left, x_ref_left) where x_left and x_ref_left are the
+                rows that may still be matched by samples recorded later (i.e. more recent than
+                the last sample of the other array), to prepend to the next drained arrays
+    '''
+    (it, ind, ind_ref) = np.intersect1d(x[:,0], x_ref[:,0], assume_unique=True, return_indices=True);
+    if(x.shape[0]==0 or x_ref.shape[0]==0):
+        last = -np.inf;
+    else:
+        last = min(x[-1,0], x_ref[-1,0]);
+    return (x[ind,:], x_ref[ind_ref,:], x[x[:,0]>last,:], x_ref[x_ref[:,0]>last,:]);
+
+_recorders = {};    # recorders created by start_recording, reused for the same signals
+
+def start_recording(device, signals, buffer_size):
+    ''' Start recording the specified signals (list of tuples (signal, size)) at every iteration
+        of the device, in the input signals sig0, sig1, ... of a SignalRecorder.
+        Since entities cannot be destroyed, the recorder is created only the first time these
+        signals are recorded, and reused afterwards. Stop recording with stop_recording.
+        @return The recorder
+    '''
+    key = (device.name, tuple([(s.name, n) for (s,n) in signals]));
+    if(key not in _recorders):
+        name = 'signal_recorder_%d' % len(_recorders);
+        recorder = create_signal_recorder(device, [(s, n, 'sig%d'%i) for (i,(s,n)) in enumerate(signals)],
+                                          buffer_size, name);
+        _recorders[key] = [recorder, buffer_size];
+        return recorder;
+    (recorder, size) = _recorders[key];
+    if(size<buffer_size):
+        recorder.init(buffer_size);
+        _recorders[key][1] = buffer_size;
+    recorder.reset();
+    device.after.addSignal(recorder.name+'.trigger');
+    return recorder;
+
+def stop_recording(device, recorder):
+    device.after.rmSignal(recorder.name+'.trigger');
+
+def record_signals(device, signals, T, dt):
+    ''' Record the specified signals (list of tuples (signal, size)) at every control cycle
+        for the time T, and return the list of arrays (N, 1+size) of recorded samples '''
+    N = int(T/dt);
+    recorder = start_recording(device, signals, N+100);
+    sleep(T);
+    stop_recording(device, recorder);
+    return [get_recorded_data(recorder, 'sig%d'%i)[:N,:] for i in range(len(signals))];
+
+def monitor_tracking_error(sig, sigRef, dt, time, device=None, print_period=None, hist_range=1.0):
+    ''' Print statistics of the tracking error sig-sigRef during the specified time, computed online
+        (in constant memory). If the device is specified, the signals are recorded at every
+        control cycle, otherwise they are polled every dt.
+        @param print_period If specified, the statistics are also printed with this period [s]
+        @return The StreamingStatistics of the tracking error
+    '''
+    from dynamic_graph.sot.torque_control.utils.streaming_stats import StreamingStatistics
+    n = len(sig.value);
     N = int(time/dt);
-    err = np.zeros((N,6));
-    for i in range(N):
-        err[i,:] = np.array(sig.value) - np.array(sigRef.value);
-        sleep(dt);
-    for i in range(6):
-        print 'Max tracking error for axis %d:         %.2f' % (i, np.max(np.abs(err[:,i])));
-        print 'Mean square tracking error for axis %d: %.2f' % (i, np.linalg.norm(err[:,i])/N);
+    if(print_period is None):
+        print_period = time;
+    N_print = max(1, int(print_period/dt));
+    stats = StreamingStatistics(n, window_size=N_print, hist_range=hist_range);
+    if(device is not None):
+        recorder = start_recording(device, [(sig, n), (sigRef, n)], 2*N_print+100);
+        t = 0.0;
+        n_samples = 0;
+        (x_left, x_ref_left) = (np.zeros((0, n+1)), np.zeros((0, n+1)));
+        while(n_samples<N):
+            sleep(max(min(print_period, time-t), dt));
+            t += print_period;
+            # the two signals are drained one after the other, so align them on the iteration number
+            x = np.vstack((x_left, get_recorded_data(recorder, 'sig0')));
+            x_ref = np.vstack((x_ref_left, get_recorded_data(recorder, 'sig1')));
+            (x, x_ref, x_left, x_ref_left) = align_recorded_data(x, x_ref);
+            k = min(x.shape[0], N-n_samples);
+            stats.update(x[:k,1:] - x_ref[:k,1:]);
+            n_samples += k;
+            if(n_samples<N):
+                stats.print_summary();
+            if(k==0):
+                break;
+        stop_recording(device, recorder);
+    else:
+        for i in range(N):
+            stats.update(np.array(sig.value) - np.array(sigRef.value));
+            if((i+1)%N_print==0 and i+1<N):
+                stats.print_summary();
+            sleep(dt);
+    stats.print_summary();
+    return stats;
     
-def dump_signal_to_file(sig_list, index, filename, T, dt):
+def dump_signal_to_file(sig_list, index, filename, T, dt, device=None):
+    ''' Write the element index of the signals in sig_list to /tmp/filename (one line per sample).
+        If the device is specified, the signals are recorded at every control cycle and the
+        file is written at the end, otherwise they are polled.
+    '''
+    if(device is not None):
+        sizes = [len(s.value) for s in sig_list];
+        data = record_signals(device, zip(sig_list, sizes), T, dt);
+        N = min([d.shape[0] for d in data]);
+        with open('/tmp/'+filename, 'a') as f:
+            np.savetxt(f, np.array([d[:N,1+index] for d in data]).T, fmt='%s', delimiter='\t');
+        return;
     N = int(T/dt);
     m = len(sig_list);
     f= open('/tmp/'+filename, 'a', 1);
@@ -131,5 +305,4 @@ def dump_signal_to_file(sig_list, index, filename, T, dt):
             f.write('{0}\t'.format(s.value[index]))
         f.write('\n');
         sleep(dt);
-    f.close();
-
+    f.close();
\ No newline at end of file
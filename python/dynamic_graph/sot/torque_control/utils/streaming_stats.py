@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:41:17 2026
+
+Online statistics of multidimensional signals (e.g. tracking errors) in constant memory.
+StreamingStatistics is updated with one sample or with a block of samples at a time and
+keeps, for every dimension: number of samples, mean and variance (Welford's algorithm,
+merged block by block), minimum, maximum, RMS over the last window_size samples and a
+histogram of the absolute values with fixed bins, used to estimate the quantiles.
+The samples containing NaN or infinite values are discarded (and counted in n_invalid).
+
+Usage example:
+    stats = StreamingStatistics(6, window_size=1000, hist_range=0.1);
+    for i in range(N):
+        stats.update(np.array(sig.value) - np.array(sig_ref.value));
+    stats.print_summary();
+"""
+import numpy as np
+
+DEFAULT_N_BINS = 1000;
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99);
+
+class StreamingStatistics:
+    ''' Mean, variance, min, max, RMS, windowed RMS and quantiles of a signal of size n '''
+    def __init__(self, n, window_size=1000, hist_range=1.0, n_bins=DEFAULT_N_BINS):
+        ''' @param window_size Number of samples used to compute the windowed RMS
+            @param hist_range Upper bound of the histogram of the absolute values (larger values
+                              are counted in the last bin), scalar or array of size n
+        '''
+        self.n = n;
+        self.window_size = window_size;
+        self.hist_range = np.broadcast_to(np.asarray(hist_range, dtype=np.float64), (n,)).copy();
+        self.n_bins = n_bins;
+        self.reset();
+
+    def reset(self):
+        n = self.n;
+        self.count = 0;
+        self.n_invalid = 0;                 # number of discarded samples (NaN or inf)
+        self.mean = np.zeros(n);
+        self.m2 = np.zeros(n);              # sum of squared deviations from the mean
+        self.sum_sq = np.zeros(n);
+        self.min = np.full(n, np.inf);
+        self.max = np.full(n, -np.inf);
+        self.hist = np.zeros((n, self.n_bins), dtype=np.int64);
+        self._window = np.zeros((self.window_size, n));  # ring buffer of the last squared values
+        self._window_sum = np.zeros(n);
+        self._window_index = 0;
+
+    def update(self, x):
+        ''' Add a sample (n,) or a block of samples (k, n), discarding the samples that are not finite '''
+        x = np.asarray(x, dtype=np.float64).reshape((-1, self.n));
+        valid = np.all(np.isfinite(x), axis=1);
+        if(not np.all(valid)):
+            self.n_invalid += x.shape[0] - np.count_nonzero(valid);
+            x = x[valid,:];
+        k = x.shape[0];
+        if(k==0):
+            return;
+        # merge the mean and variance of the block with the current ones (Chan et al.)
+        mean_x = np.mean(x, axis=0);
+        m2_x = np.sum(np.square(x-mean_x), axis=0);
+        count = self.count + k;
+        delta = mean_x - self.mean;
+        self.mean += delta*k/count;
+        self.m2 += m2_x + np.square(delta)*self.count*k/count;
+        self.count = count;
+
+        sq = np.square(x);
+        self.sum_sq += np.sum(sq, axis=0);
+        self.min = np.minimum(self.min, np.min(x, axis=0));
+        self.max = np.maximum(self.max, np.max(x, axis=0));
+
+        bins = np.minimum((np.abs(x)*(self.n_bins/self.hist_range)).astype(np.int64), self.n_bins-1);
+        self.hist += np.array([np.bincount(bins[:,j], minlength=self.n_bins) for j in range(self.n)]);
+        self._update_window(sq);
+
+    def _update_window(self, sq):
+        W = self.window_size;
+        if(sq.shape[0]>W):
+            sq = sq[-W:,:];
+        ind = (self._window_index + np.arange(sq.shape[0])) % W;
+        self._window_sum += np.sum(sq, axis=0) - np.sum(self._window[ind,:], axis=0);
+        self._window[ind,:] = sq;
+        self._window_index = (self._window_index + sq.shape[0]) % W;
+
+    @property
+    def var(self):
+        return self.m2/self.count if self.count>0 else np.full(self.n, np.nan);
+
+    @property
+    def std(self):
+        return np.sqrt(self.var);
+
+    @property
+    def rms(self):
+        return np.sqrt(self.sum_sq/self.count) if self.count>0 else np.full(self.n, np.nan);
+
+    @property
+    def window_rms(self):
+        ''' RMS of the last window_size samples (or of all of them if they are fewer) '''
+        k = min(self.count, self.window_size);
+        if(k==0):
+            return np.full(self.n, np.nan);
+        # recompute the sum from time to time to get rid of the accumulated round-off
+        if(self._window_index==0):
+            self._window_sum = np.sum(self._window, axis=0);
+        return np.sqrt(np.maximum(self._window_sum, 0.0)/k);
+
+    @property
+    def max_abs(self):
+        return np.maximum(np.abs(self.min), np.abs(self.max));
+
+    def quantiles(self, q=DEFAULT_QUANTILES):
+        ''' Estimate the quantiles q of the absolute values from the histogram (the resolution is
+            hist_range/n_bins, values above hist_range are reported as hist_range).
+            @return Array (len(q), n)
+        '''
+        q = np.atleast_1d(q);
+        cdf = np.cumsum(self.hist, axis=1);
+        res = np.zeros((q.shape[0], self.n));
+        for j in range(self.n):
+            ind = np.searchsorted(cdf[j,:], q*self.count);    # first bin where the cdf reaches q
+            res[:,j] = np.minimum(ind+1, self.n_bins)*self.hist_range[j]/self.n_bins;
+        return res;
+
+    def print_summary(self, names=None, q=DEFAULT_QUANTILES):
+        if(names is None):
+            names = [str(i) for i in range(self.n)];
+        quant = self.quantiles(q);
+        print("%8s %10s %10s %10s %10s %10s " % ('axis', 'mean', 'std', 'max abs', 'rms', 'win rms') +
+              ' '.join(["%10s" % ('q%g' % (100*qi)) for qi in q]) + " (%d samples)" % self.count +
+              (" (%d invalid samples discarded)" % self.n_invalid if self.n_invalid>0 else ""));
+        (mean, std, max_abs, rms, window_rms) = (self.mean, self.std, self.max_abs, self.rms, self.window_rms);
+        for j in range(self.n):
+            print("%8s %10.4f %10.4f %10.4f %10.4f %10.4f " % (names[j], mean[j], std[j], max_abs[j], rms[j], window_rms[j]) +
+                  ' '.join(["%10.4f" % v for v in quant[:,j]]));
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+Columnar binary store for the text files dumped by TracerRealTime
+(e.g. dg_HRP2LAAS-robotState.dat). A tracer folder is converted once into
+one Fortran-ordered .npy file per signal (first column is the time index),
+plus an index.json describing the content. Afterwards the store can be opened
+in a few milliseconds: every signal is memory-mapped, so only the columns
+that are actually accessed are read from disk.
+
+Typical usage:
+    log  = open_tracer_log(data_folder);
+    time = log.time('HRP2LAAS-robotState');
+    enc  = log.get('HRP2LAAS-robotState', slice(6,None));
+"""
+import os
+import json
+import numpy as np
+
+STORE_FOLDER_NAME = 'store';
+INDEX_FILE_NAME = 'index.json';
+TRACER_PREFIX = 'dg_';
+TRACER_SUFFIX = '.dat';
+STORE_VERSION = 1;
+
+def read_tracer_file(filename):
+    ''' Parse a text file written by TracerRealTime and return it as a (N, 1+k) matrix.
+        The whole file is parsed in C by numpy.fromfile, which is much faster than np.loadtxt.
+        An incomplete last line (e.g. if the dump was interrupted) is discarded.
+    '''
+    with open(filename, 'r') as f:
+        first_line = f.readline();
+    n_cols = len(first_line.split());
+    if(n_cols==0):
+        return np.zeros((0,0));
+    data = np.fromfile(filename, dtype=np.float64, sep=' ');
+    n = data.shape[0] // n_cols;
+    return data[:n*n_cols].reshape(n, n_cols);
+
+def _source_stamp(filename):
+    st = os.stat(filename);
+    return [st.st_size, st.st_mtime];
+
+def _signal_name(filename, prefix, suffix):
+    name = os.path.basename(filename);
+    if(prefix and name.startswith(prefix)):
+        name = name[len(prefix):];
+    if(suffix and name.endswith(suffix)):
+        name = name[:-len(suffix)];
+    return name;
+
+def convert_tracer_folder(data_folder, store_folder=None, prefix=TRACER_PREFIX, suffix=TRACER_SUFFIX, force=False, verbose=True):
+    ''' Convert all the tracer files contained in data_folder into a columnar binary store.
+        Signals whose source file did not change since the last conversion are not parsed again.
+        @param data_folder Folder containing the files dumped by the tracer
+        @param store_folder Folder where to write the store (default: data_folder/store)
+        @param force If True convert all the files even if they are up to date
+        @return The TracerLogStore
+    '''
+    if(store_folder is None):
+        store_folder = os.path.join(data_folder, STORE_FOLDER_NAME);
+    if(not os.path.isdir(store_folder)):
+        os.makedirs(store_folder);
+
+    index = _load_index(store_folder);
+    if(index is None or force):
+        index = {'version': STORE_VERSION, 'signals': {}};
+
+    for filename in sorted(os.listdir(data_folder)):
+        if(not (filename.startswith(prefix) and filename.endswith(suffix))):
+            continue;
+        src = os.path.join(data_folder, filename);
+        name = _signal_name(filename, prefix, suffix);
+        stamp = _source_stamp(src);
+        entry = index['signals'].get(name);
+        if(entry is not None and entry['source_stamp']==stamp and
+           os.path.exists(os.path.join(store_folder, entry['file']))):
+            continue;
+        if(verbose):
+            print("Converting tracer file "+filename);
+        data = read_tracer_file(src);
+        out_file = name+'.npy';
+        out = np.lib.format.open_memmap(os.path.join(store_folder, out_file), mode='w+',
+                                        dtype=np.float64, shape=data.shape, fortran_order=True);
+        out[:] = data;
+        out.flush();
+        del out;
+        index['signals'][name] = {'file': out_file,
+                                  'source': filename,
+                                  'source_stamp': stamp,
+                                  'n_samples': data.shape[0],
+                                  'n_columns': data.shape[1]};
+    _save_index(store_folder, index);
+    return TracerLogStore(store_folder, data_folder);
+
+def open_tracer_log(data_folder, store_folder=None, prefix=TRACER_PREFIX, suffix=TRACER_SUFFIX, verbose=True):
+    ''' Open the binary store associated to the specified tracer folder, creating it
+        (or updating it) if needed. Folders of binary traces (see binary_trace) are
+        opened directly.
+    '''
+    from dynamic_graph.sot.torque_control.utils.binary_trace import is_binary_trace_folder, BinaryTraceLog
+    if(is_binary_trace_folder(data_folder)):
+        return BinaryTraceLog(data_folder);
+    return convert_tracer_folder(data_folder, store_folder, prefix, suffix, False, verbose);
+
+def _load_index(store_folder):
+    try:
+        with open(os.path.join(store_folder, INDEX_FILE_NAME), 'r') as f:
+            index = json.load(f);
+    except (IOError, OSError, ValueError):
+        return None;
+    if(index.get('version')!=STORE_VERSION):
+        return None;
+    return index;
+
+def _save_index(store_folder, index):
+    tmp = os.path.join(store_folder, INDEX_FILE_NAME+'.tmp');
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1, sort_keys=True);
+    os.rename(tmp, os.path.join(store_folder, INDEX_FILE_NAME));
+
+
+class TracerLogStore:
+    ''' Read-only access to a folder created by convert_tracer_folder.
+        Every signal is a memory-mapped (N, 1+k) matrix stored column by column,
+        whose first column is the time index written by the tracer.
+    '''
+    def __init__(self, store_folder, data_folder=None):
+        ''' @param data_folder Folder containing the tracer files (default: parent of store_folder) '''
+        self.folder = store_folder;
+        if(data_folder is None):
+            data_folder = os.path.dirname(os.path.normpath(store_folder));
+        self.data_folder = data_folder;
+        self.index = _load_index(store_folder);
+        if(self.index is None):
+            raise IOError("No valid tracer log store in "+store_folder);
+        self._maps = {};
+
+    def signals(self):
+        return sorted(self.index['signals'].keys());
+
+    def has(self, name):
+        return name in self.index['signals'];
+
+    def n_samples(self, name):
+        return self.index['signals'][name]['n_samples'];
+
+    def size(self, name):
+        ''' Dimension of the signal (time column excluded) '''
+        return self.index['signals'][name]['n_columns']-1;
+
+    def source(self, name):
+        ''' Path of the file the signal has been read from (e.g. to compute its digest) '''
+        return os.path.join(self.data_folder, self.index['signals'][name]['source']);
+
+    def min_samples(self, names=None):
+        ''' Number of samples of the shortest among the specified signals '''
+        if(names is None):
+            names = self.signals();
+        return min([self.n_samples(n) for n in names]);
+
+    def raw(self, name):
+        ''' Memory map of the whole signal, including the time column '''
+        if(name not in self._maps):
+            entry = self.index['signals'][name];
+            self._maps[name] = np.load(os.path.join(self.folder, entry['file']), mmap_mode='r');
+        return self._maps[name];
+
+    def time(self, name):
+        return self.raw(name)[:,0];
+
+    def get(self, name, cols=None, n=None):
+        ''' Get the values of a signal (time column excluded) as a memory-mapped view.
+            @param cols Index, slice or list of indexes of the columns to read (None for all)
+            @param n Number of samples to read (None for all)
+        '''
+        data = self.raw(name)[:n,1:];
+        if(cols is None):
+            return data;
+        return data[:,cols];
+
+    def time_to_index(self, name, t):
+        ''' Index of the first sample whose time stamp is greater or equal to t '''
+        return int(np.searchsorted(self.time(name), t));
+
+    def window(self, name, t_start, t_end, cols=None):
+        ''' Get the samples of a signal whose time stamp is in [t_start, t_end) '''
+        i0 = self.time_to_index(name, t_start);
+        i1 = self.time_to_index(name, t_end);
+        return self.get(name, cols)[i0:i1];
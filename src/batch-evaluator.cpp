@@ -0,0 +1,181 @@
+/*
+ * Copyright 2017, Andrea Del Prete, LAAS-CNRS
+ *
+ * This file is part of sot-torque-control.
+ * sot-torque-control is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ * sot-torque-control is distributed in the hope that it will be
+ * useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+ * of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.  You should
+ * have received a copy of the GNU Lesser General Public License along
+ * with sot-torque-control.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#include <sot/torque_control/batch-evaluator.hh>
+#include <sot/core/debug.hh>
+#include <dynamic-graph/factory.h>
+#include <dynamic-graph/command.h>
+#include <boost/assign/list_of.hpp>
+#include <algorithm>
+
+#include <sot/torque_control/commands-helper.hh>
+
+namespace dynamicgraph
+{
+  namespace sot
+  {
+    namespace torque_control
+    {
+      namespace dynamicgraph = ::dynamicgraph;
+      using namespace dynamicgraph;
+      using namespace dynamicgraph::command;
+      using namespace std;
+      using namespace dynamicgraph::sot::torque_control;
+
+      /// Define EntityClassName here rather than in the header file
+      /// so that it can be used by the macros DEFINE_SIGNAL_**_FUNCTION.
+      typedef BatchEvaluator EntityClassName;
+
+      /* --- COMMANDS WITH RETURN VALUE ------------------------------------ */
+      class CommandCompute : public Command
+      {
+      public:
+        CommandCompute(BatchEvaluator& entity, const std::string& docstring) :
+          Command(entity, boost::assign::list_of(Value::STRING), docstring)
+        {}
+        virtual Value doExecute()
+        {
+          BatchEvaluator& evaluator = static_cast<BatchEvaluator&>(owner());
+          const std::vector<Value>& values = getParameterValues();
+          std::string signalName = values[0].value();
+          return Value(evaluator.compute(signalName));
+        }
+      }; // class CommandCompute
+
+      /* --- DG FACTORY ---------------------------------------------------- */
+      DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN(BatchEvaluator,
+                                         "BatchEvaluator");
+
+      /* ------------------------------------------------------------------- */
+      /* --- CONSTRUCTION -------------------------------------------------- */
+      /* ------------------------------------------------------------------- */
+      BatchEvaluator::
+      BatchEvaluator(const std::string& name)
+        : Entity(name)
+        ,m_iter(0)
+      {
+        /* Commands. */
+        addCommand("addOutputSignal",
+                   makeCommandVoid2(*this, &BatchEvaluator::addOutputSignal,
+                                    docCommandVoid2("Add a new output signal taking the rows of a matrix",
+                                                    "Name of the output signal (string)",
+                                                    "Samples of the signal, one per row (matrix)")));
+
+        addCommand("addInputSignal",
+                   makeCommandVoid1(*this, &BatchEvaluator::addInputSignal,
+                                    docCommandVoid1("Add a new input signal",
+                                                    "Name of the input signal (string)")));
+
+        addCommand("compute",
+                   new CommandCompute(*this,
+                                      "Set the output signals to each of their samples in turn, evaluating the "
+                                      "specified input signal at every iteration, and return its values as a matrix "
+                                      "with one sample per row.\n"
+                                      "Input:\n - Name of the input signal (string)\n"));
+      }
+
+
+      /* --- COMMANDS ---------------------------------------------------------- */
+
+      void BatchEvaluator::addOutputSignal(const string& signalName, const Matrix& data)
+      {
+        if(m_outputSignals.find(signalName) != m_outputSignals.end() ||
+           m_inputSignals.find(signalName) != m_inputSignals.end())
+          return SEND_MSG("It already exists a signal with name "+signalName, MSG_TYPE_ERROR);
+        if(data.rows()==0)
+          return SEND_MSG("No samples given for signal "+signalName, MSG_TYPE_ERROR);
+
+        m_data[signalName] = data;
+        OutputSignalType* sig = new OutputSignalType(getClassName()+"("+getName()+
+                                                     ")::output(dynamicgraph::Vector)::"+signalName);
+        // the first sample is available as soon as the signal is created (e.g. to initialize other entities)
+        sig->setConstant(data.row(0).transpose());
+        m_outputSignals[signalName] = sig;
+        Entity::signalRegistration(*sig);
+      }
+
+      void BatchEvaluator::addInputSignal(const string& signalName)
+      {
+        if(m_outputSignals.find(signalName) != m_outputSignals.end() ||
+           m_inputSignals.find(signalName) != m_inputSignals.end())
+          return SEND_MSG("It already exists a signal with name "+signalName, MSG_TYPE_ERROR);
+
+        m_inputSignals[signalName] = new InputSignalType(NULL, getClassName()+"("+getName()+
+                                                         ")::input(dynamicgraph::Vector)::"+signalName);
+        Entity::signalRegistration(*m_inputSignals[signalName]);
+      }
+
+      Matrix BatchEvaluator::compute(const string& signalName)
+      {
+        std::map<std::string, InputSignalType*>::iterator in = m_inputSignals.find(signalName);
+        if(in == m_inputSignals.end())
+        {
+          SEND_MSG("There is no input signal with name "+signalName, MSG_TYPE_ERROR);
+          return Matrix(0, 0);
+        }
+        if(!in->second->isPlugged())
+        {
+          SEND_MSG("Input signal "+signalName+" is not plugged", MSG_TYPE_ERROR);
+          return Matrix(0, 0);
+        }
+        if(m_data.empty())
+        {
+          SEND_MSG("There are no output signals", MSG_TYPE_ERROR);
+          return Matrix(0, 0);
+        }
+
+        // all the output signals are played together, so stop at the end of the shortest one
+        typedef std::map<std::string, Matrix>::const_iterator it_type;
+        long int n = m_data.begin()->second.rows();
+        for(it_type it=m_data.begin(); it!=m_data.end(); it++)
+          n = std::min(n, (long int) it->second.rows());
+
+        Matrix res;
+        for(long int i=0; i<n; i++, m_iter++)
+        {
+          for(it_type it=m_data.begin(); it!=m_data.end(); it++)
+          {
+            OutputSignalType & sig = *m_outputSignals[it->first];
+            sig.setConstant(it->second.row(i).transpose());
+            sig.setTime(m_iter);
+          }
+          const Vector & v = (*in->second)(m_iter);
+          if(i==0)
+            res.resize(n, v.size());
+          else if(v.size()!=res.cols())
+          {
+            SEND_MSG("Size of signal "+signalName+" changed from "+toString(res.cols())+" to "+
+                     toString(v.size())+" at sample "+toString(i), MSG_TYPE_ERROR);
+            return res.topRows(i);
+          }
+          res.row(i) = v.transpose();
+        }
+        return res;
+      }
+
+      /* ------------------------------------------------------------------- */
+      /* --- ENTITY -------------------------------------------------------- */
+      /* ------------------------------------------------------------------- */
+
+
+      void BatchEvaluator::display(std::ostream& os) const
+      {
+        os << "BatchEvaluator "<<getName()<<": "<<m_outputSignals.size()<<" output signals, "
+           <<m_inputSignals.size()<<" input signals, next iteration "<<m_iter;
+      }
+    } // namespace torquecontrol
+  } // namespace sot
+} // namespace dynamicgraph
@@ -0,0 +1,278 @@
+/*
+ * Copyright 2017, Andrea Del Prete, LAAS-CNRS
+ *
+ * This file is part of sot-torque-control.
+ * sot-torque-control is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ * sot-torque-control is distributed in the hope that it will be
+ * useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+ * of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU Lesser General Public License for more details.  You should
+ * have received a copy of the GNU Lesser General Public License along
+ * with sot-torque-control.  If not, see <http://www.gnu.org/licenses/>.
+ */
+
+#include <sot/torque_control/signal-recorder.hh>
+#include <sot/core/debug.hh>
+#include <dynamic-graph/factory.h>
+#include <dynamic-graph/command.h>
+#include <boost/assign/list_of.hpp>
+#include <algorithm>
+
+#include <sot/torque_control/commands-helper.hh>
+
+namespace dynamicgraph
+{
+  namespace sot
+  {
+    namespace torque_control
+    {
+      namespace dynamicgraph = ::dynamicgraph;
+      using namespace dynamicgraph;
+      using namespace dynamicgraph::command;
+      using namespace std;
+      using namespace dynamicgraph::sot::torque_control;
+
+      /// Define EntityClassName here rather than in the header file
+      /// so that it can be used by the macros DEFINE_SIGNAL_**_FUNCTION.
+      typedef SignalRecorder EntityClassName;
+
+      /* --- COMMANDS WITH RETURN VALUE ------------------------------------ */
+      class CommandGetData : public Command
+      {
+      public:
+        CommandGetData(SignalRecorder& entity, const std::string& docstring) :
+          Command(entity, boost::assign::list_of(Value::STRING), docstring)
+        {}
+        virtual Value doExecute()
+        {
+          SignalRecorder& recorder = static_cast<SignalRecorder&>(owner());
+          const std::vector<Value>& values = getParameterValues();
+          std::string signalName = values[0].value();
+          return Value(recorder.getData(signalName));
+        }
+      }; // class CommandGetData
+
+      class CommandGetLostSamples : public Command
+      {
+      public:
+        CommandGetLostSamples(SignalRecorder& entity, const std::string& docstring) :
+          Command(entity, boost::assign::list_of(Value::STRING), docstring)
+        {}
+        virtual Value doExecute()
+        {
+          SignalRecorder& recorder = static_cast<SignalRecorder&>(owner());
+          const std::vector<Value>& values = getParameterValues();
+          std::string signalName = values[0].value();
+          return Value(recorder.getLostSamples(signalName));
+        }
+      }; // class CommandGetLostSamples
+
+      /* --- DG FACTORY ---------------------------------------------------- */
+      DYNAMICGRAPH_FACTORY_ENTITY_PLUGIN(SignalRecorder,
+                                         "SignalRecorder");
+
+      /* ------------------------------------------------------------------- */
+      /* --- CONSTRUCTION -------------------------------------------------- */
+      /* ------------------------------------------------------------------- */
+      SignalRecorder::
+      SignalRecorder(const std::string& name)
+        : Entity(name)
+        ,CONSTRUCT_SIGNAL_OUT(trigger, int, sotNOSIGNAL)
+        ,m_writeIndex(0)
+        ,m_bufferSize(0)
+        ,m_initSucceeded(false)
+      {
+        Entity::signalRegistration(m_triggerSOUT);
+
+        /* Commands. */
+        addCommand("init",
+                   makeCommandVoid1(*this, &SignalRecorder::init,
+                                    docCommandVoid1("Allocate the buffers, to call before adding the input signals",
+                                                    "Number of samples that can be stored for each signal (int)")));
+
+        addCommand("addInputSignal",
+                   makeCommandVoid2(*this, &SignalRecorder::addInputSignal,
+                                    docCommandVoid2("Add a new input signal to record",
+                                                    "Name of the input signal (string)",
+                                                    "Size of the input signal (int)")));
+
+        addCommand("getData",
+                   new CommandGetData(*this,
+                                      "Get the samples of a signal recorded since the last call, as a matrix with one "
+                                      "sample per row and the iteration number in the first column (the iterations in "
+                                      "which the signal was not plugged or had the wrong size are skipped).\n"
+                                      "Input:\n - Name of the input signal (string)\n"));
+
+        addCommand("getLostSamples",
+                   new CommandGetLostSamples(*this,
+                                             "Get the number of samples of a signal overwritten before being read.\n"
+                                             "Input:\n - Name of the input signal (string)\n"));
+
+        addCommand("reset",
+                   makeCommandVoid0(*this, &SignalRecorder::reset,
+                                    docCommandVoid0("Discard all the recorded samples.")));
+      }
+
+      void SignalRecorder::init(const int& bufferSize)
+      {
+        if(bufferSize<=0)
+          return SEND_MSG("Buffer size must be positive: "+toString(bufferSize), MSG_TYPE_ERROR);
+        m_bufferSize = bufferSize;
+        m_writeIndex.store(0);
+        typedef std::map<std::string, Recording>::iterator it_type;
+        for(it_type it=m_recordings.begin(); it!=m_recordings.end(); it++)
+        {
+          it->second.buffer.setZero(m_bufferSize, it->second.buffer.cols());
+          it->second.valid.assign(m_bufferSize, 0);
+          it->second.readIndex = 0;
+          it->second.lost = 0;
+        }
+        m_initSucceeded = true;
+      }
+
+
+      /* ------------------------------------------------------------------- */
+      /* --- SIGNALS ------------------------------------------------------- */
+      /* ------------------------------------------------------------------- */
+
+      DEFINE_SIGNAL_OUT_FUNCTION(trigger, int)
+      {
+        if(!m_initSucceeded)
+        {
+          SEND_WARNING_STREAM_MSG("Cannot record signals before initialization!");
+          return s;
+        }
+
+        // this is the only thread modifying m_writeIndex
+        const long int w = m_writeIndex.load(boost::memory_order_relaxed);
+        const long int row = w % m_bufferSize;
+        typedef std::map<std::string, Recording>::iterator it_type;
+        for(it_type it=m_recordings.begin(); it!=m_recordings.end(); it++)
+        {
+          Recording & r = it->second;
+          r.valid[row] = 0;
+          if(!r.signal->isPlugged())
+            continue;
+          const Vector & v = (*r.signal)(iter);
+          if(v.size()+1!=r.buffer.cols())
+          {
+            SEND_WARNING_STREAM_MSG("Size of signal "+it->first+" is "+toString(v.size())+
+                                    " instead of "+toString(r.buffer.cols()-1));
+            continue;
+          }
+          r.buffer(row,0) = iter;
+          r.buffer.row(row).tail(v.size()) = v.transpose();
+          r.valid[row] = 1;
+        }
+        // publish the new sample only after having written it
+        m_writeIndex.store(w+1, boost::memory_order_release);
+        return s;
+      }
+
+
+      /* --- COMMANDS ---------------------------------------------------------- */
+
+      void SignalRecorder::addInputSignal(const string& signalName, const int& size)
+      {
+        if(!m_initSucceeded)
+          return SEND_MSG("Cannot add input signals before initialization!", MSG_TYPE_ERROR);
+        if(m_recordings.find(signalName) != m_recordings.end())
+          return SEND_MSG("It already exists a signal with name "+signalName, MSG_TYPE_ERROR);
+        if(size<=0)
+          return SEND_MSG("Signal size must be positive: "+toString(size), MSG_TYPE_ERROR);
+
+        Recording & r = m_recordings[signalName];
+        r.signal = new InputSignalType(NULL, getClassName()+"("+getName()+
+                                       ")::input(dynamicgraph::Vector)::"+signalName);
+        r.buffer.setZero(m_bufferSize, size+1);
+        r.valid.assign(m_bufferSize, 0);
+        r.readIndex = m_writeIndex.load(boost::memory_order_acquire);
+        r.lost = 0;
+
+        m_triggerSOUT.addDependency(*r.signal);
+        Entity::signalRegistration(*r.signal);
+      }
+
+      Matrix SignalRecorder::getData(const string& signalName)
+      {
+        std::map<std::string, Recording>::iterator it = m_recordings.find(signalName);
+        if(it == m_recordings.end())
+        {
+          SEND_MSG("There is no signal with name "+signalName, MSG_TYPE_ERROR);
+          return Matrix(0, 0);
+        }
+        Recording & r = it->second;
+
+        // skip the samples that have already been overwritten
+        const long int w = m_writeIndex.load(boost::memory_order_acquire);
+        if(w - r.readIndex > m_bufferSize)
+        {
+          r.lost += w - m_bufferSize - r.readIndex;
+          r.readIndex = w - m_bufferSize;
+        }
+
+        // copy the samples in chronological order (the buffer may wrap around)
+        const long int n = w - r.readIndex;
+        const long int start = r.readIndex % m_bufferSize;
+        const long int n1 = std::min(n, m_bufferSize - start);
+        Matrix data(n, r.buffer.cols());
+        data.topRows(n1) = r.buffer.middleRows(start, n1);
+        data.bottomRows(n-n1) = r.buffer.topRows(n-n1);
+        std::vector<char> valid(n);
+        std::copy(r.valid.begin()+start, r.valid.begin()+start+n1, valid.begin());
+        std::copy(r.valid.begin(), r.valid.begin()+(n-n1), valid.begin()+n1);
+
+        // discard the samples that the control thread overwrote during the copy
+        // (it may be writing the sample m_writeIndex, which replaces m_writeIndex-m_bufferSize)
+        boost::atomic_thread_fence(boost::memory_order_acquire);
+        const long int firstValid = m_writeIndex.load(boost::memory_order_acquire) - m_bufferSize + 1;
+        const long int nInvalid = std::max(0L, std::min(n, firstValid - r.readIndex));
+        r.lost += nInvalid;
+        r.readIndex = w;
+
+        // return only the rows in which the signal has actually been recorded
+        const long int nValid = std::count(valid.begin()+nInvalid, valid.end(), 1);
+        Matrix res(nValid, r.buffer.cols());
+        for(long int i=nInvalid, k=0; i<n; i++)
+          if(valid[i])
+            res.row(k++) = data.row(i);
+        return res;
+      }
+
+      int SignalRecorder::getLostSamples(const string& signalName)
+      {
+        std::map<std::string, Recording>::const_iterator it = m_recordings.find(signalName);
+        if(it == m_recordings.end())
+        {
+          SEND_MSG("There is no signal with name "+signalName, MSG_TYPE_ERROR);
+          return -1;
+        }
+        return (int) it->second.lost;
+      }
+
+      void SignalRecorder::reset()
+      {
+        typedef std::map<std::string, Recording>::iterator it_type;
+        for(it_type it=m_recordings.begin(); it!=m_recordings.end(); it++)
+        {
+          it->second.readIndex = m_writeIndex.load(boost::memory_order_acquire);
+          it->second.lost = 0;
+        }
+      }
+
+      /* ------------------------------------------------------------------- */
+      /* --- ENTITY -------------------------------------------------------- */
+      /* ------------------------------------------------------------------- */
+
+
+      void SignalRecorder::display(std::ostream& os) const
+      {
+        os << "SignalRecorder "<<getName()<<": "<<m_recordings.size()<<" signals, buffer of "
+           <<m_bufferSize<<" samples, "<<m_writeIndex.load()<<" samples recorded";
+      }
+    } // namespace torquecontrol
+  } // namespace sot
+} // namespace dynamicgraph
@@ -21,6 +21,9 @@
 #include <sot/torque_control/commands-helper.hh>
 #include <tsid/utils/stop-watch.hpp>
 #include <tsid/utils/statistics.hpp>
+#include <algorithm>
+#include <cmath>
+#include <cstring>
 
 namespace dynamicgraph
 {
@@ -49,6 +52,8 @@ namespace dynamicgraph
       TracePlayer(const std::string& name)
         : Entity(name)
         ,CONSTRUCT_SIGNAL_OUT(trigger, int, sotNOSIGNAL)
+        ,m_rangeStart(0)
+        ,m_rangeEnd(-1)
       {
         Entity::signalRegistration(m_triggerSOUT);
 
@@ -70,6 +75,25 @@ namespace dynamicgraph
         addCommand("clear",
                    makeCommandVoid0(*this, &TracePlayer::clear,
                                     docCommandVoid0("Clear all the output signals.")));
+
+        addCommand("seek",
+                   makeCommandVoid1(*this, &TracePlayer::seek,
+                                    docCommandVoid1("Set all the output signals to the specified sample "
+                                                    "(playNext then continues from the following one).",
+                                                    "Index of the sample (int)")));
+
+        addCommand("seekTime",
+                   makeCommandVoid1(*this, &TracePlayer::seekTime,
+                                    docCommandVoid1("Set every output signal to its first sample whose time "
+                                                    "stamp (first column of the file) is not less than the specified time.",
+                                                    "Time stamp (double)")));
+
+        addCommand("playRange",
+                   makeCommandVoid2(*this, &TracePlayer::playRange,
+                                    docCommandVoid2("Seek to the sample start and play only the samples "
+                                                    "in [start, end) (rewind goes back to start). Use end=-1 for no limit.",
+                                                    "Index of the first sample (int)",
+                                                    "Index of the first sample not played (int)")));
       }
 
 
@@ -93,10 +117,141 @@ namespace dynamicgraph
         if(m_outputSignals.find(signalName) != m_outputSignals.end())
           return SEND_MSG("It already exists a signal with name "+signalName, MSG_TYPE_ERROR);
 
-        // read the text file
+        // read the data file (binary traces end with .dgb, see utils/binary_trace.py)
+        DataHistoryType data;
+        TimeHistoryType time;
+        const string binarySuffix = ".dgb";
+        bool ok;
+        if(fileName.size()>binarySuffix.size() &&
+           fileName.compare(fileName.size()-binarySuffix.size(), binarySuffix.size(), binarySuffix)==0)
+          ok = readBinaryFile(fileName, data, time);
+        else
+          ok = readTextFile(fileName, data, time);
+        if(!ok)
+          return;
+        m_data[signalName].swap(data);
+        m_time[signalName].swap(time);
+        m_dataIndex[signalName] = m_rangeStart;
+
+        // create a new output signal
+        m_outputSignals[signalName] = new OutputSignalType(
+                                        getClassName()+"("+getName()+
+                                        ")::output(dynamicgraph::Vector)::"+
+                                        signalName);
+
+        // register the new signal
+        m_triggerSOUT.addDependency(*m_outputSignals[signalName]);
+        Entity::signalRegistration(*m_outputSignals[signalName]);
+
+      }
+
+      void TracePlayer::playNext()
+      {
+        typedef std::map<std::string, OutputSignalType* >::iterator it_type;
+        for(it_type it=m_outputSignals.begin(); it!=m_outputSignals.end(); it++)
+        {
+          const string & signalName           = it->first;
+          std::size_t & index                 = m_dataIndex[signalName];
+          const DataHistoryType & dataSet     = m_data[signalName];
+          const bool rangeEnded = m_rangeEnd>=0 && (std::size_t)m_rangeEnd<dataSet.size();
+          const std::size_t end = rangeEnded ? (std::size_t)m_rangeEnd : dataSet.size();
+
+          if( index<end )
+            ++index;
+
+          if( index>=end )
+            SEND_WARNING_STREAM_MSG("Reached end of "+string(rangeEnded ? "range" : "dataset")+
+                                    " for signal "+signalName);
+          else
+            it->second->setConstant(dataSet[index]);
+        }
+      }
+
+      void TracePlayer::rewind()
+      {
+        typedef std::map<std::string, std::size_t>::iterator it_type;
+        for(it_type it=m_dataIndex.begin(); it!=m_dataIndex.end(); it++)
+          it->second = m_rangeStart;
+      }
+
+      void TracePlayer::clear()
+      {
+        m_data.clear();
+        m_time.clear();
+        m_dataIndex.clear();
+        m_outputSignals.clear();
+      }
+
+      void TracePlayer::seek(const int& sample)
+      {
+        if(sample<0)
+          return SEND_MSG("Sample index cannot be negative: "+toString(sample), MSG_TYPE_ERROR);
+        typedef std::map<std::string, OutputSignalType* >::iterator it_type;
+        for(it_type it=m_outputSignals.begin(); it!=m_outputSignals.end(); it++)
+          setOutput(it->first, sample);
+      }
+
+      void TracePlayer::seekTime(const double& t)
+      {
+        typedef std::map<std::string, OutputSignalType* >::iterator it_type;
+        for(it_type it=m_outputSignals.begin(); it!=m_outputSignals.end(); it++)
+        {
+          const TimeHistoryType & time = m_time[it->first];
+          const std::size_t n = time.size();
+          std::size_t index = n;
+          if(n>0)
+          {
+            // the time stamps of the tracer are usually equally spaced: guess the index
+            // from the average period and check it, otherwise use a binary search
+            const double period = n>1 ? (time[n-1]-time[0])/(n-1) : 1.0;
+            const double guess = period>0.0 ? std::ceil((t-time[0])/period) : 0.0;
+            if(t<=time[0])
+              index = 0;
+            else if(guess>=0.0 && guess<n && time[(std::size_t)guess]>=t && time[(std::size_t)guess-1]<t)
+              index = (std::size_t)guess;
+            else
+              index = std::lower_bound(time.begin(), time.end(), t) - time.begin();
+          }
+          setOutput(it->first, index);
+        }
+      }
+
+      void TracePlayer::playRange(const int& start, const int& end)
+      {
+        if(start<0)
+          return SEND_MSG("Start of the range cannot be negative: "+toString(start), MSG_TYPE_ERROR);
+        if(end>=0 && end<=start)
+          return SEND_MSG("End of the range ("+toString(end)+") must be greater than its start ("+
+                          toString(start)+")", MSG_TYPE_ERROR);
+        m_rangeStart = start;
+        m_rangeEnd = end;
+        seek(start);
+      }
+
+      /* --- PROTECTED MEMBER METHODS ---------------------------------------------------------- */
+
+      void TracePlayer::setOutput(const string& signalName, std::size_t index)
+      {
+        const DataHistoryType & dataSet = m_data[signalName];
+        if(index>=dataSet.size())
+        {
+          SEND_WARNING_STREAM_MSG("Sample "+toString(index)+" is beyond the end of the dataset for signal "+
+                                  signalName+" ("+toString(dataSet.size())+" samples)");
+          m_dataIndex[signalName] = dataSet.size();
+          return;
+        }
+        m_dataIndex[signalName] = index;
+        m_outputSignals[signalName]->setConstant(dataSet[index]);
+      }
+
+      bool TracePlayer::readTextFile(const string& fileName, DataHistoryType & data, TimeHistoryType & time)
+      {
         std::ifstream datafile( fileName.c_str() );
         if(datafile.fail())
-          return SEND_MSG("Error trying to read the file "+fileName, MSG_TYPE_ERROR);
+        {
+          SEND_MSG("Error trying to read the file "+fileName, MSG_TYPE_ERROR);
+          return false;
+        }
 
         const unsigned int SIZE=1024;
         char buffer[SIZE];
@@ -110,13 +265,16 @@ namespace dynamicgraph
           datafile.getline( buffer,SIZE );
           const unsigned int gcount = datafile.gcount();
           if( gcount>=SIZE )
-            return SEND_MSG("Read error: line "+toString(nbLines)+
-                            " too long in file "+fileNameShort, MSG_TYPE_ERROR);
+          {
+            SEND_MSG("Read error: line "+toString(nbLines)+
+                     " too long in file "+fileNameShort, MSG_TYPE_ERROR);
+            return false;
+          }
 
           std::istringstream iss(buffer);
           newline.clear();
-          double x;
-          iss>>x; // discard the first value, which is the time step
+          double x, t;
+          iss>>t; // the first value is the time step
           while( 1 )
           {
             iss>>x;
@@ -136,67 +294,77 @@ namespace dynamicgraph
                        toString(nbLines), MSG_TYPE_WARNING);
               size = newline.size();
             }
-            m_data[signalName].push_back( Eigen::Map<Vector>(&newline[0], newline.size()));
+            data.push_back( Eigen::Map<Vector>(&newline[0], newline.size()));
+            time.push_back(t);
             nbLines++;
           }
         }
         SEND_MSG("Finished reading "+toString(nbLines)+" lines of "+toString(size)+
                  " elements from file "+fileNameShort, MSG_TYPE_INFO);
-        m_dataPointers[signalName] = m_data[signalName].begin();
-
-        // create a new output signal
-        m_outputSignals[signalName] = new OutputSignalType(
-                                        getClassName()+"("+getName()+
-                                        ")::output(dynamicgraph::Vector)::"+
-                                        signalName);
-
-        // register the new signal
-        m_triggerSOUT.addDependency(*m_outputSignals[signalName]);
-        Entity::signalRegistration(*m_outputSignals[signalName]);
-
+        return true;
       }
 
-      void TracePlayer::playNext()
+      bool TracePlayer::readBinaryFile(const string& fileName, DataHistoryType & data, TimeHistoryType & time)
       {
-        typedef std::map<std::string, OutputSignalType* >::iterator it_type;
-        for(it_type it=m_outputSignals.begin(); it!=m_outputSignals.end(); it++)
+        // header: magic (4 bytes), version (uint16), flags (uint16), dim (uint32), dt (double),
+        // length of the name (uint16), name; padded to a multiple of 64 bytes (little endian)
+        const std::size_t FIXED_HEADER_SIZE = 22;
+        const std::size_t HEADER_ALIGNMENT = 64;
+        const unsigned short FLAG_COMPRESSED = 1;
+        string fileNameShort = fileName.substr(1+fileName.find_last_of("/"));
+        std::ifstream datafile( fileName.c_str(), std::ios::binary );
+        if(datafile.fail())
         {
-          const string & signalName           = it->first;
-          OutputSignalType * signal           = it->second;
-          DataPointerType & dataPointer       = m_dataPointers[signalName];
-          const DataHistoryType & dataSet     = m_data[signalName];
-
-          if( dataPointer!=dataSet.end() )
-            ++dataPointer;
-
-          if( dataPointer==dataSet.end() )
-            SEND_WARNING_STREAM_MSG("Reached end of dataset for signal "+signalName);
-          else
-            signal->setConstant(*dataPointer);
+          SEND_MSG("Error trying to read the file "+fileName, MSG_TYPE_ERROR);
+          return false;
         }
-      }
 
-      void TracePlayer::rewind()
-      {
-        typedef std::map<std::string, DataPointerType>::iterator it_type;
-        for(it_type it=m_dataPointers.begin(); it!=m_dataPointers.end(); it++)
+        char header[FIXED_HEADER_SIZE];
+        datafile.read(header, FIXED_HEADER_SIZE);
+        if(datafile.gcount()!=(std::streamsize)FIXED_HEADER_SIZE || string(header, 4)!="DGBT")
         {
-          const string & signalName           = it->first;
-          DataPointerType & dataPointer       = it->second;
-          const DataHistoryType & dataSet     = m_data[signalName];
-          dataPointer = dataSet.begin();
+          SEND_MSG("File "+fileNameShort+" is not a binary trace", MSG_TYPE_ERROR);
+          return false;
         }
+        unsigned short version, flags, nameLength;
+        unsigned int dim;
+        std::memcpy(&version,    header+4,  2);
+        std::memcpy(&flags,      header+6,  2);
+        std::memcpy(&dim,        header+8,  4);
+        std::memcpy(&nameLength, header+20, 2);
+        if(version!=1)
+        {
+          SEND_MSG("Unsupported version "+toString(version)+" of binary trace "+fileNameShort, MSG_TYPE_ERROR);
+          return false;
+        }
+        if(flags & FLAG_COMPRESSED)
+        {
+          SEND_MSG("Compressed binary traces are not supported, uncompress "+fileNameShort, MSG_TYPE_ERROR);
+          return false;
+        }
+        const std::size_t headerSize = HEADER_ALIGNMENT*((FIXED_HEADER_SIZE+nameLength+HEADER_ALIGNMENT-1)/HEADER_ALIGNMENT);
+
+        // read all the records at once (an incomplete last record is ignored)
+        datafile.seekg(0, std::ios::end);
+        const std::size_t fileSize = static_cast<std::size_t>(std::streamoff(datafile.tellg()));
+        const std::size_t nbRecords = fileSize>headerSize ? (fileSize-headerSize)/((dim+1)*sizeof(double)) : 0;
+        std::vector<double> records(nbRecords*(dim+1));
+        datafile.seekg(headerSize, std::ios::beg);
+        if(nbRecords>0)
+          datafile.read(reinterpret_cast<char*>(&records[0]), records.size()*sizeof(double));
+
+        data.reserve(nbRecords);
+        time.reserve(nbRecords);
+        for(std::size_t i=0; i<nbRecords; i++)
+        {
+          time.push_back(records[i*(dim+1)]);
+          data.push_back(Eigen::Map<Vector>(&records[i*(dim+1)+1], dim));
+        }
+        SEND_MSG("Finished reading "+toString(nbRecords)+" samples of "+toString(dim)+
+                 " elements from file "+fileNameShort, MSG_TYPE_INFO);
+        return true;
       }
 
-      void TracePlayer::clear()
-      {
-        m_data.clear();
-        m_dataPointers.clear();
-        m_outputSignals.clear();
-      }
-
-      /* --- PROTECTED MEMBER METHODS ---------------------------------------------------------- */
-
 
 
       /* ------------------------------------------------------------------- */